@@ -0,0 +1,222 @@
+"""
+Native async variants of the hot read endpoints.
+
+Under ASGI the DRF views in api/views.py are sync and every request is
+handed to a worker thread. These views run on the event loop: JWT
+authentication is done from the token claims, the queries use Django's
+async ORM, and the responses are rendered with the same serializers and
+JSON renderer as their sync counterparts.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.http import HttpResponse
+from rest_framework.exceptions import APIException, ParseError, Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.authentication import ClaimsJWTAuthentication
+from api.pagination import CourseCursorPagination
+from api.readers import course_rows, course_values
+from api.renderers import FastJSONRenderer
+from api.serializers import (
+    CourseRatingSerializer,
+    CourseSerializer,
+    MyTokenObtainPairSerializer,
+    get_requested_fields,
+)
+from api.throttling import async_login_limiter, login_keys, run_hasher
+from api.views import course_read_queryset
+from core.models import Course, CourseRating
+from userauths.models import User
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def async_api_view(view):
+    """
+    GET-only async view that requires a valid JWT, mirroring
+    @api_view(["GET"]) + @permission_classes([IsAuthenticated]).
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return json_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+        try:
+            authenticated = await ClaimsJWTAuthentication().aauthenticate(request)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            return json_response(detail, status=exc.status_code)
+        if authenticated is None:
+            return json_response(
+                {"detail": "Authentication credentials were not provided."}, status=401
+            )
+
+        request.user, request.auth = authenticated
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@async_api_view
+async def get_user_details(request):
+    """
+    Async variant of api.views.get_user_details.
+    """
+    user = request.user
+    return json_response({
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "role": user.role,
+    })
+
+
+@async_api_view
+async def get_course_ratings(request, course_id):
+    """
+    Async variant of api.views.get_course_ratings.
+    """
+    if not await Course.objects.filter(id=course_id).aexists():
+        return json_response({"detail": "Course not found."}, status=404)
+
+    ratings = CourseRating.objects.filter(course_id=course_id).order_by("created_at")
+    ratings = [rating async for rating in ratings]
+    return json_response(CourseRatingSerializer(ratings, many=True).data)
+
+
+@async_api_view
+async def user_course_review(request, course_id):
+    """
+    Async variant of api.views.UserCourseReviewView.get.
+    """
+    try:
+        course = await Course.objects.only("id").aget(id=course_id)
+    except Course.DoesNotExist:
+        return json_response({"detail": "Course not found."}, status=404)
+
+    review = await CourseRating.objects.filter(course=course, user=request.user).afirst()
+    if review is None:
+        return json_response({"detail": "No review found for this course."}, status=404)
+    return json_response(CourseRatingSerializer(review).data)
+
+
+@async_api_view
+async def course_list(request):
+    """
+    Async variant of CourseViewSet.list, with the same cursor pagination
+    and `?fields=` support.
+    """
+    drf_request = Request(request)
+    paginator = CourseCursorPagination()
+    if settings.API_FAST_COURSE_READS:
+        # One thread hop for the page query and the students query.
+        results = await sync_to_async(
+            lambda: course_rows(
+                paginator.paginate_queryset(course_values(), drf_request),
+                get_requested_fields(drf_request),
+            )
+        )()
+    else:
+        # The cursor paginator evaluates the page itself, so it runs as a
+        # single thread hop covering the page query and the students prefetch.
+        page = await sync_to_async(paginator.paginate_queryset)(
+            course_read_queryset(drf_request), drf_request
+        )
+        results = CourseSerializer(page, many=True, context={"request": drf_request}).data
+    return json_response(paginator.get_paginated_response(results).data)
+
+
+@async_api_view
+async def course_detail(request, pk):
+    """
+    Async variant of CourseViewSet.retrieve.
+    """
+    drf_request = Request(request)
+    try:
+        course = await course_read_queryset(drf_request).aget(pk=pk)
+    except Course.DoesNotExist:
+        return json_response({"detail": "Not found."}, status=404)
+    serializer = CourseSerializer(course, context={"request": drf_request})
+    return json_response(serializer.data)
+
+
+async def check_credentials(email, password):
+    """
+    ModelBackend.authenticate() with the hashing moved onto the hashing
+    executor. Returns the active user the credentials belong to, or None.
+    """
+    user = await User._default_manager.filter(**{User.USERNAME_FIELD: email}).afirst()
+    if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords.
+        await run_hasher(make_password, password)
+        return None
+
+    outdated = []
+    is_correct = await run_hasher(check_password, password, user.password, outdated.append)
+    if outdated:
+        # Stored with an old hasher or cost: upgrade it, as check_password would.
+        user.password = await run_hasher(make_password, password)
+        await user.asave(update_fields=["password"])
+    if not is_correct or not user.is_active:
+        return None
+    return user
+
+
+async def token_obtain(request):
+    """
+    Async variant of MyTokenObtainPairView, with the same request body,
+    responses and concurrency limits.
+    """
+    if request.method != "POST":
+        return json_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+    parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+    try:
+        data = Request(request, parsers=parsers).data
+    except ParseError as exc:
+        return json_response({"detail": exc.detail}, status=exc.status_code)
+    if not isinstance(data, dict):
+        detail = f"Invalid data. Expected a dictionary, but got {type(data).__name__}."
+        return json_response({api_settings.NON_FIELD_ERRORS_KEY: [detail]}, status=400)
+
+    errors = {}
+    for field in (User.USERNAME_FIELD, "password"):
+        if not data.get(field):
+            errors[field] = ["This field is required."]
+        elif not isinstance(data[field], str):
+            errors[field] = ["Not a valid string."]
+    if errors:
+        return json_response(errors, status=400)
+
+    email = data[User.USERNAME_FIELD]
+    try:
+        async with async_login_limiter.ahold(login_keys(request, email)):
+            user = await check_credentials(email, data["password"])
+    except Throttled as exc:
+        return json_response(
+            {"detail": exc.detail}, status=exc.status_code, headers={"Retry-After": str(exc.wait)}
+        )
+    if user is None:
+        detail = MyTokenObtainPairSerializer.default_error_messages["no_active_account"]
+        return json_response({"detail": str(detail)}, status=401)
+
+    # Recording the refresh token for the blacklist is a database write.
+    refresh = await sync_to_async(MyTokenObtainPairSerializer.get_token)(user)
+    return json_response({"refresh": str(refresh), "access": str(refresh.access_token)})
+
+
+# Token auth, like the DRF views. (Django 4.2's csrf_exempt decorator would
+# turn the view into a sync one, so the flag is set directly.)
+token_obtain.csrf_exempt = True
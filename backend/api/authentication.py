@@ -0,0 +1,101 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from userauths.cache import AUTH_USER_FIELDS, cached_user, remember_user, user_cache
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds `request.user` from the verified token
+    claims (id, email, username, full_name, role, is_staff) instead of
+    loading the User row on every request.
+
+    The user is a real `User` instance whose other fields are deferred, so
+    it works in ORM filters and FK assignments and only hits the database
+    when a view reads a field the token does not carry.
+
+    The claims are only trusted with AUTH_USER_CACHE set (see
+    userauths/cache.py): a role change or deactivation pins fresh state in
+    that shared cache, overriding older tokens' claims, and tokens issued
+    before the claims existed fall back to one database query, cached for
+    `AUTH_USER_CACHE_TTL` seconds. Without it, role and is_active are read
+    from the database on every request.
+    """
+
+    def get_user(self, validated_token):
+        user_id, snapshot = self.cached_snapshot(validated_token)
+        if snapshot is None:
+            snapshot = self.user_queryset(user_id).first()
+            self.remember_snapshot(user_id, snapshot)
+        return self.user_from_snapshot(snapshot)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of authenticate() for native async views; only
+        tokens without the custom claims touch the database.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        user_id, snapshot = self.cached_snapshot(validated_token)
+        if snapshot is None:
+            snapshot = await self.user_queryset(user_id).afirst()
+            self.remember_snapshot(user_id, snapshot)
+        return self.user_from_snapshot(snapshot), validated_token
+
+    def cached_snapshot(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if user_cache() is None:
+            return user_id, None
+        snapshot = cached_user(user_id)
+        if snapshot is None:
+            snapshot = self.snapshot_from_claims(user_id, validated_token)
+        return user_id, snapshot
+
+    def user_queryset(self, user_id):
+        return self.user_model.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).values(*AUTH_USER_FIELDS)
+
+    @staticmethod
+    def remember_snapshot(user_id, snapshot):
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        remember_user(user_id, snapshot)
+
+    def user_from_snapshot(self, snapshot):
+        if not snapshot["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # from_db() expects the loaded values in model field order.
+        field_names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in AUTH_USER_FIELDS
+        ]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS, field_names, [snapshot[field] for field in field_names]
+        )
+
+    @staticmethod
+    def snapshot_from_claims(user_id, validated_token):
+        claims = ("email", "username", "full_name", "role", "is_staff")
+        if any(claim not in validated_token for claim in claims):
+            return None
+        snapshot = {claim: validated_token[claim] for claim in claims}
+        # Tokens are only ever issued to active users; deactivation pins
+        # the new state through userauths.cache.invalidate_user.
+        snapshot.update(id=user_id, is_active=True)
+        return snapshot
@@ -0,0 +1,150 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def version_key(scope):
+    return f"api:version:{scope}"
+
+
+def version_timeout():
+    # Versions expire with the responses cached under them. With a cache per
+    # process, a worker that never sees a write would otherwise keep its old
+    # version forever and, once the data expired, rebuild newer data under
+    # the same ETag (and keep answering 304 to it).
+    return getattr(settings, "API_CACHE_TIMEOUT", 300)
+
+
+def get_versions(scopes):
+    """
+    Current version of every scope. A scope with no version yet starts at
+    the current time in milliseconds, so versions never repeat after the
+    cache is flushed or restarted, or after a version expires.
+    """
+    cache = get_cache()
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: int(time.time() * 1000) for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, version_timeout())
+        versions.update(cache.get_many(list(missing)))
+    return [versions.get(key, missing.get(key)) for key in keys]
+
+
+def bump_versions(*scopes):
+    """
+    Invalidate every cached response built from the given scopes.
+    """
+    cache = get_cache()
+    for scope in scopes:
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), version_timeout())
+
+
+def make_etag(request, scopes):
+    versions = get_versions(scopes)
+    digest = hashlib.sha1()
+    for part in (
+        request.path,
+        request.META.get("QUERY_STRING", ""),
+        request.META.get("HTTP_ACCEPT", ""),
+        *(f"{scope}={version}" for scope, version in zip(scopes, versions)),
+    ):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request, etag):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_response(request, scopes, render):
+    """
+    Serve a read endpoint through the versioned cache.
+
+    `scopes` name the data the response is built from and `render` is called
+    (and its data cached) only when nothing is cached for the current
+    versions. A matching If-None-Match is answered with 304 straight away.
+    """
+    etag = make_etag(request, scopes)
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    cache = get_cache()
+    data_key = f"api:response:{etag}"
+    data = cache.get(data_key)
+    if data is None:
+        response = render()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        cache.set(data_key, data, getattr(settings, "API_CACHE_TIMEOUT", 300))
+
+    return Response(data, headers={"ETag": etag})
+
+
+def idempotent_response(request, respond):
+    """
+    Replay the response to an earlier request with the same Idempotency-Key
+    header (per user) instead of calling `respond` again. Reusing a key with
+    a different body is a 422, and a retry that arrives while the first
+    request is still running gets a 409. Without the header `respond` just
+    runs.
+    """
+    key = request.META.get("HTTP_IDEMPOTENCY_KEY")
+    if not key:
+        return respond()
+
+    cache = get_cache()
+    user_id = request.user.pk if request.user.is_authenticated else None
+    cache_key = "api:idempotency:" + hashlib.sha1(
+        f"{user_id}\0{request.path}\0{key}".encode()
+    ).hexdigest()
+    fingerprint = hashlib.sha1(request.body).hexdigest()
+    timeout = getattr(settings, "IDEMPOTENCY_KEY_TIMEOUT", 24 * 60 * 60)
+
+    if not cache.add(cache_key, {"fingerprint": fingerprint}, timeout):
+        stored = cache.get(cache_key) or {}
+        if stored.get("fingerprint") != fingerprint:
+            return Response(
+                {"detail": "Idempotency-Key was already used with a different request body."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if "status" not in stored:
+            return Response(
+                {"detail": "A request with this Idempotency-Key is still in progress."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(stored["data"], status=stored["status"], headers={"Idempotent-Replayed": "true"})
+
+    try:
+        response = respond()
+    except Exception:
+        cache.delete(cache_key)
+        raise
+    if response.status_code >= 500:
+        cache.delete(cache_key)
+    else:
+        cache.set(
+            cache_key,
+            {"fingerprint": fingerprint, "status": response.status_code, "data": response.data},
+            timeout,
+        )
+    return response
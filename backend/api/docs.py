@@ -0,0 +1,98 @@
+"""
+OpenAPI metadata for the views in api/views.py.
+
+It is attached here rather than with decorators in the views module, so that
+serving the API does not import drf_yasg: api.schema imports this module
+before generating the schema, which only happens where the docs are mounted
+(or in `manage.py generate_openapi`).
+"""
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+
+from api import views
+
+swagger_auto_schema(
+    method="get",
+    manual_parameters=[
+        openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+        openapi.Parameter("page", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ],
+)(views.CourseViewSet.search)
+
+swagger_auto_schema(
+    method="put",
+    operation_description="Update the description of a course. Only the 'description' field is allowed.",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "description": openapi.Schema(
+                type=openapi.TYPE_STRING,
+                description="The new description for the course.",
+                example="This is an updated course description."
+            ),
+        },
+        required=["description"],  # Mark 'description' as required
+    ),
+    responses={
+        200: "Course description updated successfully.",
+        400: "Invalid input.",
+        403: "Permission denied.",
+        404: "Course not found.",
+    },
+)(views.update_description)
+
+swagger_auto_schema(
+    method='post',
+    operation_description="Rate a course by providing a score between 1 and 5.",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'rating': openapi.Schema(
+                type=openapi.TYPE_INTEGER,
+                description='Rating between 1 and 5',
+                example=4
+            ),
+        },
+        required=['rating'],  # Mark 'rating' as required
+    ),
+    responses={
+        201: "Rating created successfully.",
+        200: "Rating updated successfully.",
+        400: "Invalid rating.",
+        404: "Course not found.",
+    },
+)(views.rate_course)
+
+swagger_auto_schema(
+    method="post",
+    operation_description=(
+        "Create or update many ratings in one upsert. Admins may rate on behalf "
+        "of other users with `user_email`; everyone else only rates as themselves. "
+        "Send an Idempotency-Key header to make retries safe."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "ratings": openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "course": openapi.Schema(type=openapi.TYPE_INTEGER, example=1),
+                        "rating": openapi.Schema(type=openapi.TYPE_INTEGER, example=4),
+                        "user_email": openapi.Schema(type=openapi.TYPE_STRING),
+                    },
+                    required=["course", "rating"],
+                ),
+            ),
+        },
+        required=["ratings"],
+    ),
+    responses={
+        200: "Per-rating results and a summary.",
+        400: "Invalid input.",
+        409: "A request with the same Idempotency-Key is in progress.",
+        422: "The Idempotency-Key was used with a different body.",
+    },
+)(views.rate_courses_bulk)
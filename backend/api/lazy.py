@@ -0,0 +1,18 @@
+from django.utils.module_loading import import_string
+
+
+def lazy_view(dotted_path):
+    """
+    A view that imports the view at `dotted_path` when it is first called,
+    so that mounting rarely used pages (the API docs) costs nothing at
+    startup.
+    """
+    view = None
+
+    def load_and_call(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path)
+        return view(request, *args, **kwargs)
+
+    return load_and_call
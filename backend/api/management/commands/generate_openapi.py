@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.schema import generate_schema, schema_path, write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema into OPENAPI_SCHEMA_PATH, where the "
+        "schema views serve it from. Run it whenever the API changes (e.g. at "
+        "build time); running workers pick the new file up on their own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Write the schema here instead.")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Write nothing; fail if the stored schema is missing or out of date.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or schema_path()
+        content = generate_schema()
+
+        if options["check"]:
+            try:
+                stored = open(path, "rb").read()
+            except FileNotFoundError:
+                raise CommandError(f"No schema at {path}.")
+            if stored != content:
+                raise CommandError(f"The schema at {path} is out of date.")
+            self.stdout.write(self.style.SUCCESS(f"The schema at {path} is up to date."))
+            return
+
+        write_schema(content, path)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(content)} bytes to {path}."))
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import list_profiles, profile_dir, read_profile, to_speedscope
+
+
+class Command(BaseCommand):
+    help = (
+        "List the request profiles in PROFILE_DIR (newest first), or print "
+        "one of them as collapsed stacks or speedscope JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("profile", nargs="?", help="Profile id (as in X-Profile-Id) to fetch.")
+        parser.add_argument(
+            "--format",
+            choices=["collapsed", "speedscope"],
+            default="collapsed",
+            help="Output format when fetching a profile.",
+        )
+        parser.add_argument("--output", help="Write the profile to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        name = options["profile"]
+        if name is None:
+            names = list_profiles()
+            if not names:
+                self.stdout.write(f"No profiles in {profile_dir()}.")
+            for name in names:
+                samples = sum(
+                    int(line.rpartition(" ")[2]) for line in read_profile(name).splitlines()
+                )
+                self.stdout.write(f"{name}  {samples} samples")
+            return
+
+        try:
+            collapsed = read_profile(name)
+        except FileNotFoundError:
+            raise CommandError(f"No profile {name!r} in {profile_dir()}.")
+        if options["format"] == "speedscope":
+            collapsed = json.dumps(to_speedscope(name, collapsed))
+
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                stream.write(collapsed)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            self.stdout.write(collapsed, ending="")
@@ -0,0 +1,291 @@
+"""
+Per-request performance metrics for the API, cheap enough to leave on.
+
+MetricsMiddleware measures every request routed to api/urls.py: wall time,
+time in the database, number of queries, how many of them repeated the SQL
+of an earlier query of the same request (the N+1 signature) and time spent
+serializing (serializers' to_representation(), or the dict building of the
+fast read paths in api/readers.py). They go out with the response as a
+Server-Timing header and into per-endpoint histograms that /api/v1/metrics/
+serves (admins only) in the Prometheus text format.
+
+Queries are observed by an execute wrapper installed once per database
+connection that only looks at a context variable, so nothing is recorded
+outside a request and DEBUG's query log is not needed. The histograms live
+in the worker process: with several workers, scrape each of them.
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+API_ROUTE_PREFIX = "api/v1/"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# (name, help, buckets) of every histogram; observed per endpoint and method.
+HISTOGRAMS = (
+    ("api_request_duration_seconds", "Wall time of API requests.", SECONDS_BUCKETS),
+    ("api_request_db_seconds", "Time API requests spent in database queries.", SECONDS_BUCKETS),
+    ("api_request_serializer_seconds", "Time API requests spent serializing.", SECONDS_BUCKETS),
+    ("api_request_queries", "Database queries per API request.", COUNT_BUCKETS),
+    (
+        "api_request_duplicate_queries",
+        "Queries per API request repeating an earlier statement of the same request.",
+        COUNT_BUCKETS,
+    ),
+)
+
+_current = ContextVar("api_request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("db_time", "queries", "statements", "serializer_time", "serializing")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.statements = {}
+        self.serializer_time = 0.0
+        self.serializing = False
+
+    @property
+    def duplicates(self):
+        return self.queries - len(self.statements)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+        # The same statement again (whatever the parameters): usually a
+        # lookup in a loop, i.e. an N+1.
+        metrics.statements[sql] = metrics.statements.get(sql, 0) + 1
+
+
+@contextmanager
+def recording():
+    """
+    Record the queries and serializer time of the enclosed block into the
+    RequestMetrics it yields.
+    """
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@contextmanager
+def serializing():
+    """
+    Count the enclosed block as serializer time of the current request.
+    Nested blocks are only counted once, by the outermost one.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+        metrics.serializing = False
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent in to_representation() to the current request's
+    metrics. Only the outermost serializer is timed, so nested serializers
+    are not counted twice.
+    """
+
+    def to_representation(self, instance):
+        # serializing() inlined: this runs once per serialized object.
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializing = False
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._requests = {}
+
+    def observe(self, endpoint, method, status, values):
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for (name, _, buckets), value in zip(HISTOGRAMS, values):
+                histogram = self._histograms.get((name, endpoint, method))
+                if histogram is None:
+                    histogram = self._histograms[name, endpoint, method] = Histogram(buckets)
+                histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+    def render(self):
+        """
+        Everything observed so far in the Prometheus text exposition format.
+        """
+        with self._lock:
+            lines = [
+                "# HELP api_requests_total API requests by endpoint, method and status.",
+                "# TYPE api_requests_total counter",
+            ]
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'api_requests_total{{endpoint="{_label_value(endpoint)}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+            for name, help_text, _ in HISTOGRAMS:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (metric, endpoint, method), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = f'endpoint="{_label_value(endpoint)}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def endpoint_label(request):
+    """
+    The URL pattern the request was routed to, e.g.
+    "api/v1/courses/<course_id>/ratings/", or None outside api/urls.py.
+    """
+    return route_label(getattr(request, "resolver_match", None))
+
+
+def route_label(match):
+    """
+    endpoint_label() of a ResolverMatch.
+    """
+    if match is None or not match.route.startswith(API_ROUTE_PREFIX):
+        return None
+    route = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"<\1>", match.route)
+    route = re.sub(r"<\w+:(\w+)>", r"<\1>", route)
+    return route.replace("^", "").replace("$", "")
+
+
+def server_timing(total, metrics):
+    return (
+        f"total;dur={total * 1000:.1f}, "
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries, '
+        f'{metrics.duplicates} duplicates", '
+        f"serializer;dur={metrics.serializer_time * 1000:.1f}"
+    )
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    @staticmethod
+    def start():
+        # Connections opened before this module was imported have no recorder yet.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics), time.perf_counter()
+
+    @staticmethod
+    def finish(request, response, metrics, started):
+        endpoint = endpoint_label(request)
+        if endpoint is None:
+            return response
+        total = time.perf_counter() - started
+        response["Server-Timing"] = server_timing(total, metrics)
+        registry.observe(endpoint, request.method, response.status_code, (
+            total, metrics.db_time, metrics.serializer_time, metrics.queries, metrics.duplicates,
+        ))
+        return response
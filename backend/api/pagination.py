@@ -0,0 +1,93 @@
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CourseCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the course list.
+    `id` breaks ties between courses created in the same instant.
+    """
+    ordering = ("created_at", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class StudentCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the students enrolled in a course.
+    """
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class TopCoursesPagination(CursorPagination):
+    """
+    Keyset pagination down the top-rated leaderboard (CourseRanking rows).
+    """
+    ordering = ("-top_score", "-course_id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class TrendingCoursesPagination(TopCoursesPagination):
+    ordering = ("-trending_score", "-course_id")
+
+
+class SearchPagination(BasePagination):
+    """
+    Page-number pagination for ranked search results. Rank is not a stable
+    keyset, so pages are offsets; one extra hit is fetched to tell whether
+    there is a next page, instead of counting every match.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    page_query_param = "page"
+
+    def get_int(self, request, name, default, maximum=None):
+        try:
+            value = int(request.query_params[name])
+        except (KeyError, ValueError):
+            return default
+        if value < 1:
+            return default
+        return min(value, maximum) if maximum else value
+
+    def paginate_hits(self, search, request):
+        """
+        `search(limit, offset)` returns the hits for a slice of the ranking.
+        """
+        self.request = request
+        self.page = self.get_int(request, self.page_query_param, 1)
+        self.page_size = self.get_int(
+            request, self.page_size_query_param, self.page_size, self.max_page_size
+        )
+        hits = search(self.page_size + 1, (self.page - 1) * self.page_size)
+        self.has_next = len(hits) > self.page_size
+        return hits[:self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page + 1)
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page - 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
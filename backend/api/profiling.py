@@ -0,0 +1,333 @@
+"""
+On-demand profiles of single API requests from a live process.
+
+Staff can profile one request by sending `X-Profile: 1` (or `?profile=1`)
+with their token. That request is traced deterministically (sys.setprofile),
+so even a 3 ms request gives a complete picture, weighted in microseconds of
+self time. With PROFILE_ONE_IN = N, every Nth request to each API endpoint
+(the first one included) is additionally profiled by a background thread
+that samples its stack every PROFILE_SAMPLE_INTERVAL seconds, which costs
+next to nothing; counting per endpoint means rarely used endpoints get
+profiled too. Requests outside the API (admin, static files, the docs) are
+never profiled.
+
+Profiles are written in the collapsed-stack format ("frame;frame;frame
+weight" per line, readable by speedscope, flamegraph.pl and inferno) to
+PROFILE_DIR, which keeps only the newest PROFILE_KEEP files. The response
+names its profile in X-Profile-Id; `manage.py profiles` lists and fetches
+them.
+
+Under ASGI only the native async views (api/async_views.py) are profiled:
+they run on the event loop's thread, so other requests running on the same
+loop can show up in their profiles. The other views run in a thread of
+their own there, which the profilers do not follow; profile those under
+WSGI.
+"""
+import os
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import APIException
+
+from api.authentication import ClaimsJWTAuthentication
+from api.metrics import route_label
+
+SUFFIX = ".collapsed"
+
+_lock = threading.Lock()
+# endpoint -> count of its requests, for the 1-in-PROFILE_ONE_IN lottery
+_requests = defaultdict(itertools.count)
+
+
+def frame_label(code):
+    return f"{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Counts the collapsed stacks of one thread, sampled from a daemon thread.
+    """
+
+    kind = "sampled"
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(frames))] += 1
+
+
+class CallTracer:
+    """
+    Self time per call stack, in microseconds, of everything the calling
+    thread runs between start() and stop().
+    """
+
+    kind = "traced"
+
+    def __init__(self):
+        self.stacks = Counter()
+        self._path = []
+        # [started, time spent in callees] per open call
+        self._open = []
+
+    def start(self):
+        sys.setprofile(self._event)
+        return self
+
+    def stop(self):
+        sys.setprofile(None)
+        return Counter({stack: round(seconds * 1e6) for stack, seconds in self.stacks.items()})
+
+    def _event(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == "call":
+            self._path.append(frame_label(frame.f_code))
+            self._open.append([now, 0.0])
+        elif event == "c_call":
+            self._path.append(f"{getattr(arg, '__qualname__', arg)} (builtin)")
+            self._open.append([now, 0.0])
+        elif self._open:  # a return; ignore those of calls made before start()
+            started, in_callees = self._open.pop()
+            elapsed = now - started
+            self.stacks[";".join(self._path)] += elapsed - in_callees
+            self._path.pop()
+            if self._open:
+                self._open[-1][1] += elapsed
+
+
+def short_path(filename):
+    # Project files relative to the backend, libraries from site-packages on.
+    base = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(base):
+        return filename[len(base):]
+    _, marker, rest = filename.partition("site-packages" + os.sep)
+    return rest if marker else filename
+
+
+def profile_dir():
+    return Path(settings.PROFILE_DIR)
+
+
+def save_profile(stacks, kind, method, endpoint):
+    """
+    Write `stacks` as a new profile and drop the oldest beyond PROFILE_KEEP.
+    Returns the profile's id (its file name).
+    """
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = "".join(char if char.isalnum() else "-" for char in endpoint.removeprefix("api/v1/"))
+    name = f"{time.time_ns()}-{os.getpid()}-{kind}-{method}-{slug.strip('-')}{SUFFIX}"
+    path = directory / name
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.items()))
+
+    for stale in list_profiles()[settings.PROFILE_KEEP:]:
+        try:
+            (directory / stale).unlink()
+        except FileNotFoundError:
+            pass  # another worker pruned it first
+    return name
+
+
+def written_at(name):
+    """
+    When the profile `name` was written (ns since the epoch), or None for a
+    file that is not one of ours.
+    """
+    if not name.endswith(SUFFIX):
+        return None
+    stamp = name.split("-", 1)[0]
+    return int(stamp) if stamp.isdigit() else None
+
+
+def list_profiles():
+    """
+    Profile ids, newest first.
+    """
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    names = [path.name for path in directory.iterdir() if written_at(path.name) is not None]
+    return sorted(names, key=written_at, reverse=True)
+
+
+def read_profile(name):
+    """
+    The collapsed stacks of a profile; raises FileNotFoundError for unknown
+    or malformed ids.
+    """
+    if name != os.path.basename(name) or not name.endswith(SUFFIX):
+        raise FileNotFoundError(name)
+    return (profile_dir() / name).read_text()
+
+
+def to_speedscope(name, collapsed):
+    """
+    A collapsed profile as a speedscope "sampled" profile document.
+    """
+    frames = []
+    index = {}
+    samples = []
+    weights = []
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        sample = []
+        for frame in stack.split(";"):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(int(count))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "microseconds" if "-traced-" in name else "none",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
+
+
+def resolve_route(request):
+    """
+    The ResolverMatch the request will be routed to, or None.
+    """
+    try:
+        return resolve(request.path_info, getattr(request, "urlconf", None))
+    except Resolver404:
+        return None
+
+
+def asks_for_profile(request):
+    return request.headers.get("X-Profile") == "1" or request.GET.get("profile") == "1"
+
+
+def may_profile(request):
+    # Without sampling only requests asking for a profile are looked at, so
+    # the others do not pay for resolving their route a second time.
+    return bool(settings.PROFILE_ONE_IN) or asks_for_profile(request)
+
+
+def choose_profiler(endpoint, traced):
+    """
+    A CallTracer when `traced` (a staff request asking to be profiled), a
+    StackSampler when it is the endpoint's turn (every PROFILE_ONE_IN-th
+    request), otherwise None.
+    """
+    if traced:
+        return CallTracer()
+    one_in = settings.PROFILE_ONE_IN
+    if one_in:
+        with _lock:
+            turn = next(_requests[endpoint]) % one_in == 0
+        if turn:
+            return StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL)
+    return None
+
+
+def is_staff(request):
+    # DRF authenticates inside the view, so check the token here too.
+    try:
+        authenticated = ClaimsJWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    if authenticated is not None:
+        return authenticated[0].is_staff
+    user = getattr(request, "user", None)
+    return bool(user is not None and user.is_staff)
+
+
+async def ais_staff(request):
+    # Only tokens: the async views do not take session users.
+    try:
+        authenticated = await ClaimsJWTAuthentication().aauthenticate(request)
+    except APIException:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not may_profile(request):
+            return self.get_response(request)
+        endpoint = route_label(resolve_route(request))
+        profiler = None
+        if endpoint is not None:
+            profiler = choose_profiler(endpoint, asks_for_profile(request) and is_staff(request))
+        if profiler is None:
+            return self.get_response(request)
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = profiler.stop()
+        return self.finish(request, response, endpoint, profiler.kind, stacks)
+
+    async def __acall__(self, request):
+        if not may_profile(request):
+            return await self.get_response(request)
+        match = resolve_route(request)
+        endpoint = route_label(match)
+        profiler = None
+        if endpoint is not None and iscoroutinefunction(match.func):
+            traced = asks_for_profile(request) and await ais_staff(request)
+            profiler = choose_profiler(endpoint, traced)
+        if profiler is None:
+            return await self.get_response(request)
+        profiler.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stacks = profiler.stop()
+        return self.finish(request, response, endpoint, profiler.kind, stacks)
+
+    @staticmethod
+    def finish(request, response, endpoint, kind, stacks):
+        if stacks:
+            response["X-Profile-Id"] = save_profile(stacks, kind, request.method, endpoint)
+        return response
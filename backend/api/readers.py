@@ -0,0 +1,106 @@
+"""
+Read-only fast path for the course list endpoints.
+
+Most of the time a CourseSerializer list spends goes into DRF's field
+machinery: a nested TeacherMiniSerializer and a SlugRelatedField call per
+student, for every course. course_rows() builds the very same dicts from
+values() rows instead: same keys in the same order, same value formatting
+and the same student order, so the rendered JSON is byte for byte what the
+serializer produces (api/tests.py compares the two). It takes two queries
+however many courses there are: the courses with their teacher joined in,
+then the (course, student email) pairs, the latter skipped when `?fields=`
+leaves the students out.
+
+Only reads go through here; set API_FAST_COURSE_READS = False to render
+every course with CourseSerializer again.
+"""
+import functools
+from collections import defaultdict
+
+from api.exports import value_formatter
+from api.metrics import serializing
+from api.serializers import CourseSerializer
+from core.models import Course, average_rating
+from userauths.models import User
+
+# What course_rows() needs of each course (created_at and id also keep the
+# rows usable by CourseCursorPagination).
+COURSE_COLUMNS = (
+    "id", "title", "description", "created_at",
+    "teacher_id", "teacher__full_name", "teacher__email",
+    "rating_count", "rating_sum",
+)
+
+
+@functools.cache
+def course_fields():
+    """
+    The fields CourseSerializer renders, in its order.
+    """
+    return tuple(name for name, field in CourseSerializer().fields.items() if not field.write_only)
+
+
+def course_values(queryset=None):
+    """
+    `queryset` (all courses by default) as the values() rows course_rows()
+    takes.
+    """
+    if queryset is None:
+        queryset = Course.objects.all()
+    return queryset.values(*COURSE_COLUMNS)
+
+
+def student_emails(course_ids):
+    """
+    Enrolled students' emails per course id, ordered by user id like the
+    students prefetch of api.views.course_read_queryset().
+    """
+    emails = defaultdict(list)
+    pairs = User.objects.filter(enrolled_courses__in=course_ids).values_list(
+        "enrolled_courses", "email"
+    ).order_by("id")
+    for course_id, email in pairs:
+        emails[course_id].append(email)
+    return emails
+
+
+def course_rows(values, fields=None):
+    """
+    CourseSerializer(courses, many=True).data for the course_values() rows
+    of those courses, as plain dicts. `fields` is the `?fields=` selection
+    (see api.serializers.get_requested_fields), None for every field.
+    """
+    names = [name for name in course_fields() if fields is None or name in fields]
+    emails = student_emails([row["id"] for row in values]) if "students" in names else {}
+    format_value = value_formatter()
+
+    with serializing():
+        rows = []
+        for row in values:
+            teacher_id = row["teacher_id"]
+            data = {
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+                "created_at": format_value(row["created_at"]),
+                "teacher": None if teacher_id is None else {
+                    "id": teacher_id,
+                    "full_name": row["teacher__full_name"],
+                    "email": row["teacher__email"],
+                },
+                "students": emails.get(row["id"], []),
+                "average_rating": average_rating(row["rating_sum"], row["rating_count"]),
+            }
+            if len(names) < len(data):
+                data = {name: data[name] for name in names}
+            rows.append(data)
+    return rows
+
+
+def course_rows_by_id(ids, fields=None):
+    """
+    course_rows() of the courses with the given ids, keyed by id; unknown
+    ids are left out.
+    """
+    values = list(course_values(Course.objects.filter(id__in=ids)))
+    return dict(zip((row["id"] for row in values), course_rows(values, fields)))
@@ -0,0 +1,156 @@
+"""
+The OpenAPI schema, generated once rather than on every request.
+
+drf_yasg's schema views introspect every view and serializer each time the
+schema is asked for. SchemaView serves it from OPENAPI_SCHEMA_PATH instead,
+which `manage.py generate_openapi` writes at build time; a process that
+finds no file generates it once and stores it. With DEBUG on, each process
+generates a fresh one (runserver restarts on code changes). The JSON and
+YAML documents go out with an ETag, and with Cache-Control allowing
+OPENAPI_CACHE_MAX_AGE seconds of reuse. The Swagger UI pages are still
+rendered by drf_yasg (they depend on the user) and load the schema from the
+stored file too.
+
+The URLconfs mount these views with api.lazy.lazy_view, so drf_yasg's views
+and generator, and the views' metadata in api.docs, are only imported once
+the docs are first asked for.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml, yaml_sane_dump
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+import api.docs  # noqa: F401  (attaches the views' OpenAPI metadata)
+from api.cache import etag_matches
+
+SCHEMA_INFO = openapi.Info(
+    title="Educational Platform API",
+    default_version="v1.0.0",
+    description="This is the API documentation for the educational project APIs",
+)
+
+_lock = threading.Lock()
+# (modification time of the file, {"json"|"yaml": (content, etag)})
+_document = None
+
+
+def generate_schema():
+    """
+    The schema of every API route as JSON bytes, as drf_yasg renders it
+    (minus `host` and `schemes`, which came from the request).
+    """
+    schema = OpenAPISchemaGenerator(SCHEMA_INFO).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def schema_path():
+    return Path(settings.OPENAPI_SCHEMA_PATH)
+
+
+def write_schema(content, path=None):
+    """
+    Store `content` at `path` (OPENAPI_SCHEMA_PATH by default) atomically,
+    so a worker never reads a half-written schema.
+    """
+    path = Path(path or schema_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".{path.name}.{os.getpid()}")
+    partial.write_bytes(content)
+    os.replace(partial, path)
+
+
+def with_etag(content):
+    return content, f'"{hashlib.sha1(content).hexdigest()}"'
+
+
+def stored_version():
+    try:
+        return schema_path().stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_document():
+    content = None
+    if not settings.DEBUG:
+        try:
+            content = schema_path().read_bytes()
+        except FileNotFoundError:
+            pass
+    if content is None:
+        content = generate_schema()
+        try:
+            write_schema(content)
+        except OSError:
+            pass  # a read-only deployment still serves it from memory
+    spec = json.loads(content, object_pairs_hook=OrderedDict)
+    return stored_version(), {
+        "json": with_etag(content),
+        "yaml": with_etag(yaml_sane_dump(spec, binary=True)),
+    }
+
+
+def schema_document(spec_format):
+    """
+    (content, etag) of the stored schema in "json" or "yaml". The file is
+    read once per process, and again whenever generate_openapi rewrites it.
+    """
+    global _document
+    with _lock:
+        if _document is not None and not settings.DEBUG and _document[0] != stored_version():
+            _document = None
+        if _document is None:
+            _document = load_document()
+        return _document[1][spec_format]
+
+
+def reset():
+    """
+    Forget the loaded schema; the next request loads it again.
+    """
+    global _document
+    with _lock:
+        _document = None
+
+
+class SchemaView(get_schema_view(
+    SCHEMA_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+    authentication_classes=[],
+)):
+    """
+    drf_yasg's schema view, serving the JSON and YAML schema from
+    schema_document() instead of generating it.
+    """
+
+    def get(self, request, version="", format=None):
+        codec = getattr(request.accepted_renderer, "codec_class", None)
+        if codec is None:  # one of the UI pages
+            return super().get(request, version, format)
+
+        content, etag = schema_document("yaml" if codec is OpenAPICodecYaml else "json")
+        if etag_matches(request, etag):
+            response = HttpResponse(status=304)
+        else:
+            renderer = request.accepted_renderer
+            response = HttpResponse(
+                content, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = f"public, max-age={settings.OPENAPI_CACHE_MAX_AGE}"
+        return response
+
+
+schema_view = SchemaView.without_ui()
+schema_ui_view = SchemaView.with_ui("swagger")
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
 from api import models as api_models
+from api.metrics import TimedSerializerMixin
+from api.tokens import RevocableRefreshToken
 from userauths.models import Profile, User
+from userauths.services import register_user
 from core.models import Course, CourseRating
 
 
@@ -15,9 +18,11 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         TokenObtainPairSerializer (type): The base TokenObtainPairSerializer class.
 
     Returns:
-        type: A token containing user's full name, email, and username.
+        type: A token containing user's full name, email, username, role and staff flag.
     """
 
+    token_class = RevocableRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -26,11 +31,21 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token["email"] = user.email
         token["username"] = user.username
         token["role"] = user.role
+        token["is_staff"] = user.is_staff
 
         return token
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer checking and recording rotated refresh tokens
+    through api.tokens.RevocableRefreshToken.
+    """
+
+    token_class = RevocableRefreshToken
+
+
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Custom serializer for user registration.
 
@@ -62,22 +77,15 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attr
 
     def create(self, validated_data):
-        user = User.objects.create(
-            full_name=validated_data["full_name"],
+        return register_user(
             email=validated_data["email"],
-            role=validated_data["role"],
+            password=validated_data["password"],
+            full_name=validated_data["full_name"],
+            role=validated_data.get("role", "student"),
         )
 
-        email_username, _ = user.email.split("@")
-        user.username = email_username
-        user.role = validated_data["role"]
-        user.set_password(validated_data["password"])
-        user.save()
-
-        return user
-
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializes User model data.
 
@@ -90,7 +98,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializes Profile model data.
 
@@ -102,17 +110,47 @@ class ProfileSerializer(serializers.ModelSerializer):
         model = Profile
         fields = "__all__"
 
-class TeacherMiniSerializer(serializers.ModelSerializer):
+def get_requested_fields(request):
+    """
+    Parse the `?fields=a,b,c` sparse-fieldset parameter.
+    Returns None when the client did not ask for a subset.
+    """
+    if request is None:
+        return None
+    fields = request.query_params.get("fields")
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(",") if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Drop every readable field the client did not list in `?fields=`.
+    Write-only fields are kept so the parameter never breaks a write.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(self.context.get("request"))
+        if requested is None:
+            return
+        for name in list(self.fields):
+            if name not in requested and not self.fields[name].write_only:
+                self.fields.pop(name)
+
+
+class TeacherMiniSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model  = User
         fields = ("id", "full_name", "email") 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(TimedSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """
     Full course representation.
     * `teacher`   → read-only nested object
     * `teacher_id`→ write-only FK you post from the client
     * `students`  → list of student emails (read-only)
+    Pass `?fields=id,title,...` to render only some of the fields.
     """
     teacher     = TeacherMiniSerializer(read_only=True)
     teacher_id  = serializers.PrimaryKeyRelatedField(
@@ -137,7 +175,7 @@ class CourseSerializer(serializers.ModelSerializer):
         return obj.get_average_rating()  # Use the method from the Course model
 
 
-class CourseEnrollSerializer(serializers.ModelSerializer):
+class CourseEnrollSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer to enroll users into a course (only students field exposed).
     """
@@ -149,18 +187,20 @@ class CourseEnrollSerializer(serializers.ModelSerializer):
             'students': {'required': True}
         }
 
-class CourseDescriptionSerializer(serializers.ModelSerializer):
+class CourseDescriptionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = ['description']  # Only include the 'description' field
 
-class StudentMiniSerializer(serializers.ModelSerializer):
+class StudentMiniSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    country = serializers.CharField(source="profile.country", read_only=True)
+
     class Meta:
         model = User
         fields = ["id", "full_name", "email", "country"]
 
 
-class CourseRatingSerializer(serializers.ModelSerializer):
+class CourseRatingSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for CourseRating model.
     """
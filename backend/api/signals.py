@@ -0,0 +1,62 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.cache import bump_versions
+from core.models import Course, CourseRating
+from core.ratings import ratings_upserted
+from userauths.importing import users_imported
+from userauths.models import User
+
+
+def bump_course(sender, instance, **kwargs):
+    bump_versions("courses", f"course:{instance.pk}")
+
+
+def bump_enrollment(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # Remember which courses lose the student; they are gone by post_clear.
+        instance._cache_cleared_course_ids = list(
+            instance.enrolled_courses.values_list("id", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        bump_versions("courses", f"course:{instance.pk}")
+    else:
+        course_ids = pk_set if action != "post_clear" else getattr(
+            instance, "_cache_cleared_course_ids", []
+        )
+        bump_versions("courses", *(f"course:{course_id}" for course_id in course_ids or ()))
+
+
+def bump_rating(sender, instance, **kwargs):
+    bump_versions("courses", f"course:{instance.course_id}", f"ratings:{instance.course_id}")
+
+
+def bump_upserted_ratings(sender, course_ids, **kwargs):
+    bump_versions(
+        "courses",
+        *(f"course:{course_id}" for course_id in course_ids),
+        *(f"ratings:{course_id}" for course_id in course_ids),
+    )
+
+
+def bump_users(sender, instance, **kwargs):
+    # Teacher names and student emails are rendered inside course responses.
+    bump_versions("users")
+
+
+def bump_imported_users(sender, users, **kwargs):
+    bump_versions("users")
+
+
+post_save.connect(bump_course, sender=Course)
+post_delete.connect(bump_course, sender=Course)
+m2m_changed.connect(bump_enrollment, sender=Course.students.through)
+post_save.connect(bump_rating, sender=CourseRating)
+post_delete.connect(bump_rating, sender=CourseRating)
+ratings_upserted.connect(bump_upserted_ratings, sender=CourseRating)
+post_save.connect(bump_users, sender=User)
+post_delete.connect(bump_users, sender=User)
+users_imported.connect(bump_imported_users, sender=User)
@@ -1,3 +1,1111 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import schema as api_schema
+from api.metrics import recording, registry
+from api.profiling import choose_profiler, list_profiles
+from api.readers import course_rows, course_values
+from api.renderers import FastJSONRenderer
+from api.serializers import CourseSerializer, MyTokenObtainPairSerializer
+from api.throttling import KeyedLimiter, login_keys, login_limiter
+from api.tokens import RevocableRefreshToken, revocation_key
+from api.views import course_read_queryset
+
+from core.models import Course, CourseRanking, CourseRating
+from userauths.models import Profile, User
+from userauths.services import register_user
+
+
+class CourseListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def create_courses(self, count):
+        start = Course.objects.count()
+        for index in range(start, start + count):
+            course = Course.objects.create(
+                title=f"Course {index}", description="", teacher=self.teacher
+            )
+            student = User.objects.create(email=f"student{index}@example.com")
+            course.students.add(student)
+            CourseRating.objects.create(course=course, user=student, rating=4)
+
+    def assert_list_queries(self, expected_courses):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/v1/courses/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), expected_courses)
+
+    def test_course_list_query_count_is_constant(self):
+        self.create_courses(1)
+        self.assert_list_queries(1)
+
+        self.create_courses(20)
+        self.assert_list_queries(21)
+
+    def test_course_list_renders_teacher_students_and_rating(self):
+        self.create_courses(1)
+        response = self.client.get("/api/v1/courses/")
+        course = response.data["results"][0]
+        self.assertEqual(course["teacher"]["email"], "teacher@example.com")
+        self.assertEqual(course["students"], ["student0@example.com"])
+        self.assertEqual(course["average_rating"], 4)
+
+    def test_course_list_is_cursor_paginated(self):
+        self.create_courses(3)
+        response = self.client.get("/api/v1/courses/", {"page_size": 2})
+        self.assertEqual(
+            [course["title"] for course in response.data["results"]],
+            ["Course 0", "Course 1"],
+        )
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [course["title"] for course in response.data["results"]], ["Course 2"]
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_fields_parameter_skips_the_students_prefetch(self):
+        self.create_courses(3)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/v1/courses/", {"fields": "id,title"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title"})
+
+    def test_course_students_sub_resource(self):
+        self.create_courses(1)
+        course = Course.objects.get()
+        course.students.add(User.objects.create(email="extra@example.com"))
+        first = course.students.order_by("id")[0]
+        Profile.objects.filter(user=first).update(country="Romania")
+
+        response = self.client.get(
+            f"/api/v1/courses/{course.id}/students/", {"page_size": 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["results"],
+            [{"id": first.id, "full_name": "student0", "email": "student0@example.com",
+              "country": "Romania"}],
+        )
+        self.assertIsNotNone(response.data["next"])
+
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.other_teacher = User.objects.create(email="other@example.com", role="teacher")
+        self.course = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        self.students = [
+            User.objects.create(email=f"student{index}@example.com") for index in range(3)
+        ]
+        self.course.students.add(self.students[0])
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def test_enroll_bulk_reports_per_email_results(self):
+        emails = [student.email for student in self.students] + [
+            "other@example.com", "missing@example.com",
+        ]
+        with self.assertNumQueries(9):
+            response = self.client.post(
+                f"/api/v1/courses/{self.course.id}/enroll_bulk/",
+                {"student_emails": emails}, format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {row["email"]: row["status"] for row in response.data["results"]},
+            {
+                "student0@example.com": "already_enrolled",
+                "student1@example.com": "enrolled",
+                "student2@example.com": "enrolled",
+                "other@example.com": "wrong_role",
+                "missing@example.com": "not_found",
+            },
+        )
+        self.assertEqual(self.course.students.count(), 3)
+
+    def test_enroll_bulk_accepts_csv_upload(self):
+        upload = SimpleUploadedFile(
+            "cohort.csv", b"email\nstudent1@example.com\nstudent2@example.com\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(
+            f"/api/v1/courses/{self.course.id}/enroll_bulk/", {"file": upload},
+            format="multipart",
+        )
+        self.assertEqual(response.data["summary"], {"enrolled": 2})
+
+    def test_unenroll_bulk(self):
+        response = self.client.post(
+            f"/api/v1/courses/{self.course.id}/unenroll_bulk/",
+            {"student_emails": ["student0@example.com", "student1@example.com"]},
+            format="json",
+        )
+        self.assertEqual(response.data["summary"], {"unenrolled": 1, "not_enrolled": 1})
+        self.assertFalse(self.course.students.exists())
+
+    def test_bulk_action_requires_emails(self):
+        response = self.client.post(
+            f"/api/v1/courses/{self.course.id}/enroll_bulk/", {}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_action_rejects_unreadable_input(self):
+        path = f"/api/v1/courses/{self.course.id}/enroll_bulk/"
+        enrolled = self.course.students.count()
+        for body in [["student1@example.com"], {"student_emails": {"email": "student1@example.com"}}]:
+            response = self.client.post(path, body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+
+        upload = SimpleUploadedFile("cohort.csv", b"\xff\xfe\x00s", content_type="text/csv")
+        response = self.client.post(path, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.course.students.count(), enrolled)
+
+
+class TeacherStudentsTests(TestCase):
+    def test_roster_is_served_paginated(self):
+        teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        course = Course.objects.create(title="Algebra", description="", teacher=teacher)
+        course.students.add(*[
+            User.objects.create(email=f"student{index}@example.com") for index in range(3)
+        ])
+        client = APIClient()
+        client.force_authenticate(teacher)
+
+        response = client.get("/api/v1/teacher/students/", {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [student["email"] for student in response.data["results"]],
+            ["student0@example.com", "student1@example.com"],
+        )
+        response = client.get(response.data["next"])
+        self.assertEqual(
+            [student["email"] for student in response.data["results"]],
+            ["student2@example.com"],
+        )
+
+
+@override_settings(AUTH_USER_CACHE="default")
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.client = APIClient()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_user_is_built_from_token_claims(self):
+        token = MyTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.authenticate(token)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/user/me/")
+        self.assertEqual(response.data["role"], "teacher")
+        self.assertEqual(response.data["email"], "teacher@example.com")
+
+    def test_tokens_without_claims_are_loaded_once_and_cached(self):
+        self.authenticate(AccessToken.for_user(self.teacher))
+        with self.assertNumQueries(1):
+            self.client.get("/api/v1/user/me/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/user/me/")
+        self.assertEqual(response.data["full_name"], "teacher")
+
+    def test_role_change_overrides_older_token_claims(self):
+        token = MyTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.authenticate(token)
+
+        self.teacher.role = "student"
+        self.teacher.save()
+
+        response = self.client.get("/api/v1/user/me/")
+        self.assertEqual(response.data["role"], "student")
+
+    def test_deleted_user_is_rejected(self):
+        token = MyTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.authenticate(token)
+        self.teacher.delete()
+
+        response = self.client.get("/api/v1/user/me/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_user_saved_without_loading_is_invalidated(self):
+        token = MyTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.authenticate(token)
+        User(pk=self.teacher.pk, email=self.teacher.email, role="teacher", is_active=False).save()
+
+        response = self.client.get("/api/v1/user/me/")
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE=None)
+    def test_without_a_shared_cache_state_is_read_from_the_database(self):
+        token = MyTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.authenticate(token)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/v1/user/me/").status_code, 200)
+
+        # Changed by another worker, bypassing this process entirely.
+        User.objects.filter(pk=self.teacher.pk).update(is_active=False)
+        response = self.client.get("/api/v1/user/me/")
+        self.assertEqual(response.status_code, 401)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.student = User.objects.create(email="student@example.com")
+        self.course = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        response = self.client.get("/api/v1/courses/")
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_cached_response_is_served_without_queries(self):
+        first = self.client.get(f"/api/v1/courses/{self.course.id}/")
+        with self.assertNumQueries(0):
+            second = self.client.get(f"/api/v1/courses/{self.course.id}/")
+        self.assertEqual(first.data, second.data)
+
+    def test_writes_change_the_etag(self):
+        urls = [
+            "/api/v1/courses/",
+            f"/api/v1/courses/{self.course.id}/",
+            f"/api/v1/courses/{self.course.id}/ratings/",
+        ]
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+
+        CourseRating.objects.create(course=self.course, user=self.student, rating=5)
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200, url)
+        self.assertEqual(self.client.get(urls[1]).data["average_rating"], 5)
+
+        etag = self.client.get(urls[1])["ETag"]
+        self.course.students.add(self.student)
+        response = self.client.get(urls[1], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data["students"], ["student@example.com"])
+
+    def test_teacher_list_is_invalidated_by_user_changes(self):
+        etag = self.client.get("/api/v1/teachers/")["ETag"]
+        User.objects.create(email="second@example.com", role="teacher")
+        response = self.client.get("/api/v1/teachers/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.data), 2)
+
+    def test_rebuild_commands_invalidate_what_they_rewrite(self):
+        CourseRating.objects.create(course=self.course, user=self.student, rating=4)
+        for command, url in [
+            ("rebuild_rating_aggregates", f"/api/v1/courses/{self.course.id}/"),
+            ("rebuild_course_rankings", "/api/v1/courses/top/"),
+        ]:
+            Course.objects.filter(id=self.course.id).update(rating_count=3, rating_sum=3)
+            etag = self.client.get(url)["ETag"]
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command(command, stdout=StringIO())
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, command)
+
+    def test_versions_expire_with_the_cached_responses(self):
+        etag = self.client.get("/api/v1/courses/")["ETag"]
+
+        # A write this process never saw (another worker's), then the
+        # cached response and the version both expire.
+        Course.objects.filter(id=self.course.id).update(title="Geometry")
+        later = time.time() + settings.API_CACHE_TIMEOUT + 1
+        with mock.patch("time.time", return_value=later):
+            response = self.client.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["results"][0]["title"], "Geometry")
+
+
+class FastCourseReadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(
+            email="zoe@example.com", full_name="Zoë Algebra", role="teacher"
+        )
+        students = [User.objects.create(email=f"student{index}@example.com") for index in range(4)]
+        for index, ratings in enumerate([(5, 4, 4), (1,), ()]):
+            course = Course.objects.create(
+                title=f"Algebra {index} \u2028 ünïcode",
+                description='Quotes " and \\ backslashes',
+                teacher=self.teacher,
+            )
+            # Enrolled out of id order: both paths must sort the same way.
+            course.students.add(*reversed(students[index:]))
+            for student, rating in zip(students, ratings):
+                CourseRating.objects.create(course=course, user=student, rating=rating)
+        Course.objects.create(title="Orphan algebra", description="", teacher=None)
+        token = MyTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_course_rows_match_the_serializer(self):
+        courses = course_read_queryset(None).order_by("id")
+        serialized = CourseSerializer(courses, many=True).data
+        rows = course_rows(list(course_values().order_by("id")))
+        self.assertEqual(rows, serialized)
+        self.assertEqual([list(row) for row in rows], [list(data) for data in serialized])
+        self.assertEqual(rows[0]["students"], [f"student{index}@example.com" for index in range(4)])
+
+    def test_list_endpoints_render_the_same_bytes(self):
+        for path in [
+            "courses/",
+            "courses/?page_size=2",
+            "courses/?fields=title,students,average_rating",
+            "courses/?fields=teacher",
+            "courses/top/",
+            "courses/trending/?fields=id",
+            "courses/search/?q=algebra",
+            "async/courses/",
+        ]:
+            with override_settings(API_FAST_COURSE_READS=False):
+                cache.clear()
+                expected = self.client.get(f"/api/v1/{path}")
+            cache.clear()
+            response = self.client.get(f"/api/v1/{path}")
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.content, expected.content, path)
+
+    def test_fast_renderer_matches_the_json_renderer(self):
+        for data in [
+            {"small": 1e-05, "large": [1e16], "mean": 4.333333333333333, "zero": 0},
+            {1: "int key", None: "null key", "big": 2 ** 70},
+            {"at": timezone.now(), "on": timezone.now().date(), "line": "a\u2028b\u2029c"},
+            ["text :1e5 looking like a float", -0.0, "\x00\x1f ü /"],
+        ]:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render({"a": 1}, "application/json; indent=2"),
+            JSONRenderer().render({"a": 1}, "application/json; indent=2"),
+        )
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.student = User.objects.create(email="student@example.com")
+        self.course = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        self.course.students.add(self.student)
+        CourseRating.objects.create(course=self.course, user=self.teacher, rating=4)
+        token = MyTokenObtainPairSerializer.get_token(self.teacher).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_async_variants_match_the_sync_views(self):
+        for path in [
+            "user/me/",
+            "courses/",
+            "courses/?fields=id,title",
+            f"courses/{self.course.id}/",
+            f"courses/{self.course.id}/ratings/",
+            f"courses/{self.course.id}/user-review/",
+            "courses/999/",
+            "courses/999/ratings/",
+        ]:
+            sync = self.client.get(f"/api/v1/{path}")
+            native = self.client.get(f"/api/v1/async/{path}")
+            self.assertEqual(native.status_code, sync.status_code, path)
+            sync_data = sync.json()
+            native_data = native.json()
+            if "next" in sync_data:
+                self.assertEqual(native_data["results"], sync_data["results"], path)
+            else:
+                self.assertEqual(native_data, sync_data, path)
+
+    def test_async_views_require_a_token(self):
+        response = APIClient().get("/api/v1/async/user/me/")
+        self.assertEqual(response.status_code, 401)
+
+        response = APIClient(HTTP_AUTHORIZATION="Bearer invalid").get("/api/v1/async/user/me/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+
+class TokenEndpointTests(TestCase):
+    def setUp(self):
+        self.user = register_user("learner@example.com", "s3cret-pass")
+
+    def test_sync_and_async_token_endpoints_agree(self):
+        for path in ["/api/v1/user/token/", "/api/v1/async/user/token/"]:
+            response = self.client.post(
+                path, {"email": "learner@example.com", "password": "s3cret-pass"}
+            )
+            self.assertEqual(response.status_code, 200, path)
+            access = AccessToken(response.json()["access"])
+            self.assertEqual(access["user_id"], self.user.id)
+            self.assertEqual(access["role"], "student")
+
+            response = self.client.post(
+                path, {"email": "learner@example.com", "password": "wrong"}
+            )
+            self.assertEqual(response.status_code, 401, path)
+            response = self.client.post(path, {"email": "nobody@example.com", "password": "x"})
+            self.assertEqual(response.status_code, 401, path)
+            response = self.client.post(path, {"email": "learner@example.com"})
+            self.assertEqual(response.status_code, 400, path)
+            self.assertIn("password", response.json())
+
+    def test_malformed_bodies_are_rejected(self):
+        paths = ["/api/v1/user/token/", "/api/v1/async/user/token/", "/api/v1/user/register/"]
+        for path in paths:
+            for body in ["{", "[]", '{"email": ["learner@example.com"], "password": "s3cret-pass"}']:
+                response = self.client.post(path, body, content_type="application/json")
+                self.assertEqual(response.status_code, 400, (path, body))
+
+    def test_new_passwords_use_the_configured_hasher(self):
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+
+    def test_async_login_upgrades_old_hashes(self):
+        self.user.password = make_password("s3cret-pass", hasher="pbkdf2_sha256")
+        self.user.save()
+        response = self.client.post(
+            "/api/v1/async/user/token/",
+            {"email": "learner@example.com", "password": "s3cret-pass"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+
+    @override_settings(LOGIN_QUEUE_TIMEOUT=0)
+    def test_busy_account_is_throttled(self):
+        request = self.client.request().wsgi_request
+        with login_limiter.hold(login_keys(request, "Learner@example.com ")):
+            response = self.client.post(
+                "/api/v1/user/token/",
+                {"email": "learner@example.com", "password": "s3cret-pass"},
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(login_limiter.active_keys(), [])
+
+
+class KeyedLimiterTests(TestCase):
+    def test_waiters_queue_for_a_slot_and_time_out(self):
+        limiter = KeyedLimiter(asyncio.Semaphore)
+        keys = [("ip", 1)]
+        order = []
+
+        async def login(name, hold_for, timeout):
+            try:
+                async with limiter.ahold(keys, timeout=timeout):
+                    order.append(name)
+                    await asyncio.sleep(hold_for)
+            except Throttled:
+                order.append(f"{name} throttled")
+
+        async def burst():
+            await asyncio.gather(
+                login("first", 0.05, 1),
+                login("queued", 0, 1),
+                login("impatient", 0, 0.01),
+            )
+
+        asyncio.run(burst())
+        self.assertEqual(order, ["first", "impatient throttled", "queued"])
+        self.assertEqual(limiter.active_keys(), [])
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        register_user("learner@example.com", "s3cret-pass")
+        response = self.client.post(
+            "/api/v1/user/token/", {"email": "learner@example.com", "password": "s3cret-pass"}
+        )
+        self.refresh = response.json()["refresh"]
+
+    def refresh_token(self, token):
+        return self.client.post("/api/v1/user/token/refresh/", {"refresh": token})
+
+    def test_rotated_refresh_token_is_rejected(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("refresh", response.json())
+        self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION_CACHE="default")
+    def test_revocation_cache_replaces_the_blacklist_lookup(self):
+        rotated = self.refresh_token(self.refresh).json()["refresh"]
+        self.assertTrue(cache.get(revocation_key(RevocableRefreshToken(self.refresh, verify=False)["jti"])))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.refresh_token(self.refresh).status_code, 401)
+        self.assertEqual(self.refresh_token(rotated).status_code, 200)
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(
+            email="ada@example.com", full_name="Ada Lovelace", role="teacher"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def create_course(self, title, description=""):
+        return Course.objects.create(title=title, description=description, teacher=self.teacher)
+
+    def search(self, query, **params):
+        response = self.client.get("/api/v1/courses/search/", {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def titles(self, query):
+        return [course["title"] for course in self.search(query)["results"]]
+
+    def test_results_are_ranked_and_highlighted(self):
+        self.create_course("Statistics", "Builds on algebra and calculus.")
+        self.create_course("Linear <Algebra>", "Vectors and matrices.")
+
+        results = self.search("algebra")["results"]
+        self.assertEqual([course["title"] for course in results], ["Linear <Algebra>", "Statistics"])
+        self.assertEqual(results[0]["highlight"]["title"], "Linear &lt;<mark>Algebra</mark>&gt;")
+        self.assertIn("<mark>algebra</mark>", results[1]["highlight"]["description"])
+        self.assertEqual(results[0]["teacher"]["email"], "ada@example.com")
+
+    def test_terms_are_prefixes_and_all_must_match(self):
+        self.create_course("Linear Algebra")
+        self.create_course("Abstract Algebra")
+        self.assertEqual(self.titles("lin alg"), ["Linear Algebra"])
+        self.assertEqual(self.titles("lovelace abstract"), ["Abstract Algebra"])
+        self.assertEqual(self.titles("geometry"), [])
+
+    def test_index_follows_course_and_teacher_changes(self):
+        course = self.create_course("Geometry")
+        course.title = "Topology"
+        course.save()
+        self.assertEqual(self.titles("geometry"), [])
+        self.assertEqual(self.titles("topology"), ["Topology"])
+
+        self.teacher.full_name = "Emmy Noether"
+        self.teacher.save()
+        self.assertEqual(self.titles("noether"), ["Topology"])
+        self.assertEqual(self.titles("lovelace"), [])
+
+        course.delete()
+        self.assertEqual(self.titles("topology"), [])
+
+    def test_unsupported_databases_keep_courses_writable(self):
+        with mock.patch.dict("core.search.INDEXES", clear=True):
+            course = self.create_course("Geometry")
+            course.title = "Topology"
+            course.save()
+            self.teacher.full_name = "Emmy Noether"
+            self.teacher.save()
+            course.delete()
+            response = self.client.get("/api/v1/courses/search/", {"q": "topology"})
+        self.assertEqual(response.status_code, 501)
+
+    def test_results_are_paginated(self):
+        for index in range(3):
+            self.create_course(f"Algebra {index}")
+        page = self.search("algebra", page_size=2)
+        self.assertEqual(len(page["results"]), 2)
+        self.assertIsNone(page["previous"])
+
+        page = self.client.get(page["next"]).data
+        self.assertEqual(len(page["results"]), 1)
+        self.assertIsNone(page["next"])
+        self.assertIsNotNone(page["previous"])
+
+    def test_query_is_required(self):
+        response = self.client.get("/api/v1/courses/search/", {"q": " ?! "})
+        self.assertEqual(response.status_code, 400)
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.students = [
+            User.objects.create(email=f"student{index}@example.com") for index in range(6)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def create_course(self, title, ratings=(), enrolled=0):
+        course = Course.objects.create(title=title, description="", teacher=self.teacher)
+        for student, rating in zip(self.students, ratings):
+            CourseRating.objects.create(course=course, user=student, rating=rating)
+        course.students.add(*self.students[:enrolled])
+        return course
+
+    def leaderboard(self, name, **params):
+        response = self.client.get(f"/api/v1/courses/{name}/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_top_uses_a_bayesian_average(self):
+        self.create_course("One perfect rating", [5])
+        self.create_course("Consistently good", [5, 4, 5, 5, 4, 5])
+        self.create_course("Poor", [1, 2])
+        self.create_course("Unrated", enrolled=2)
+
+        with self.assertNumQueries(3):
+            results = self.leaderboard("top")["results"]
+        self.assertEqual(
+            [course["title"] for course in results],
+            ["Consistently good", "One perfect rating", "Poor"],
+        )
+        self.assertLess(results[1]["score"], 5)
+
+    def test_rating_changes_update_the_ranking(self):
+        good = self.create_course("Good", [4, 4])
+        self.create_course("Average", [3, 3])
+        CourseRating.objects.filter(course=good).delete()
+        self.assertEqual([course["title"] for course in self.leaderboard("top")["results"]], ["Average"])
+
+    def test_trending_favours_recent_activity(self):
+        old = self.create_course("Old favourite", [5, 5, 5])
+        CourseRating.objects.filter(course=old).update(created_at=timezone.now() - timedelta(days=60))
+        call_command("rebuild_course_rankings", stdout=StringIO())
+        self.create_course("New and busy", [4], enrolled=3)
+
+        results = self.leaderboard("trending")["results"]
+        self.assertEqual([course["title"] for course in results], ["New and busy", "Old favourite"])
+        self.assertAlmostEqual(results[0]["score"], 0.8 + 3 * 0.5, places=2)
+
+    def test_leaderboards_are_paginated(self):
+        for index in range(3):
+            self.create_course(f"Course {index}", [index + 1])
+        page = self.leaderboard("top", page_size=2)
+        self.assertEqual([course["title"] for course in page["results"]], ["Course 2", "Course 1"])
+        page = self.client.get(page["next"]).data
+        self.assertEqual([course["title"] for course in page["results"]], ["Course 0"])
+
+    def test_rebuild_matches_incremental_scores(self):
+        course = self.create_course("Algebra", [5, 3], enrolled=2)
+        self.create_course("Geometry", [2])
+        before = CourseRanking.objects.get(course=course)
+        CourseRanking.objects.update(top_score=None, trending_ratings=0, trending_score=0)
+
+        call_command("rebuild_course_rankings", stdout=StringIO())
+        after = CourseRanking.objects.get(course=course)
+        mean = (10 * 3 + 10) / (10 + 3)
+        self.assertAlmostEqual(after.top_score, (10 * mean + 8) / (10 + 2))
+        self.assertAlmostEqual(after.trending_score / before.trending_score, 1)
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.course = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def export(self, path, file_format):
+        response = self.client.get(path, {"format": file_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_exports_match_the_json_endpoints(self):
+        for index in range(3):
+            student = User.objects.create(email=f"student{index}@example.com")
+            self.course.students.add(student)
+            CourseRating.objects.create(course=self.course, user=student, rating=index + 2)
+
+        path = f"/api/v1/courses/{self.course.id}/ratings/"
+        expected = self.client.get(path).json()
+        rows = [json.loads(line) for line in self.export(path, "ndjson").splitlines()]
+        self.assertEqual(rows, expected)
+        rows = list(csv.DictReader(self.export(path, "csv").splitlines()))
+        self.assertEqual(rows, [{key: str(value) for key, value in row.items()} for row in expected])
+
+        roster = list(csv.DictReader(self.export("/api/v1/teacher/students/", "csv").splitlines()))
+        self.assertEqual(
+            [row["email"] for row in roster],
+            [f"student{index}@example.com" for index in range(3)],
+        )
+        self.assertEqual(list(roster[0]), ["id", "full_name", "email", "country"])
+
+    def test_export_of_a_missing_course_is_404(self):
+        response = self.client.get("/api/v1/courses/999/ratings/", {"format": "csv"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_memory_stays_flat_for_100k_rows(self):
+        small = Course.objects.create(title="Small", description="", teacher=self.teacher)
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000)
+                INSERT INTO userauths_user (
+                    password, is_superuser, first_name, last_name, is_staff, is_active,
+                    date_joined, username, email, full_name, role
+                )
+                SELECT '', FALSE, '', '', FALSE, TRUE, CURRENT_TIMESTAMP,
+                       's' || i, 's' || i || '@example.com', 's' || i, 'student'
+                FROM n
+            """)
+            for course, count in [(small, 10_000), (self.course, 100_000)]:
+                cursor.execute(
+                    """
+                    INSERT INTO core_courserating (course_id, user_id, rating, created_at)
+                    SELECT %s, id, 4, CURRENT_TIMESTAMP FROM userauths_user
+                    WHERE role = 'student' ORDER BY id LIMIT %s
+                    """,
+                    [course.id, count],
+                )
+
+        def peak_memory(course):
+            response = self.client.get(f"/api/v1/courses/{course.id}/ratings/", {"format": "csv"})
+            tracemalloc.start()
+            lines = sum(chunk.count(b"\n") for chunk in response.streaming_content)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return lines, peak
+
+        small_lines, small_peak = peak_memory(small)
+        large_lines, large_peak = peak_memory(self.course)
+        self.assertEqual((small_lines, large_lines), (10_001, 100_001))
+        # Ten times the rows, but not (anywhere near) ten times the memory.
+        self.assertLess(large_peak, 2 * small_peak)
+        self.assertLess(large_peak, 5 * 1024 * 1024)
+
+
+class RatingSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.algebra = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        self.geometry = Course.objects.create(title="Geometry", description="", teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def rate(self, course, rating, days_ago=0):
+        student = User.objects.create(email=f"s{User.objects.count()}@example.com")
+        created = CourseRating.objects.create(course=course, user=student, rating=rating)
+        CourseRating.objects.filter(pk=created.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return created
+
+    def test_course_summary_is_aggregated_in_one_query(self):
+        for rating, days_ago in [(5, 0), (4, 0), (2, 7), (5, 14)]:
+            self.rate(self.algebra, rating, days_ago)
+        self.rate(self.geometry, 1)
+
+        path = f"/api/v1/courses/{self.algebra.id}/ratings/summary/"
+        with self.assertNumQueries(1):
+            response = self.client.get(path)
+        summary = response.json()
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["mean"], 4.0)
+        self.assertEqual(summary["median"], 4.5)
+        self.assertEqual(summary["histogram"], {"1": 0, "2": 1, "3": 0, "4": 1, "5": 2})
+        self.assertEqual([week["count"] for week in summary["weekly"]], [1, 1, 2])
+        self.assertEqual(summary["weekly"][-1]["mean"], 4.5)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(path).json(), summary)
+
+    def test_teacher_summary_covers_every_course_and_follows_rating_writes(self):
+        self.rate(self.algebra, 5)
+        rating = self.rate(self.geometry, 1)
+        path = "/api/v1/teacher/ratings/summary/"
+        self.assertEqual(self.client.get(path).json()["histogram"], {"1": 1, "2": 0, "3": 0, "4": 0, "5": 1})
+
+        rating.rating = 3
+        rating.save()
+        summary = self.client.get(path).json()
+        self.assertEqual((summary["count"], summary["mean"], summary["median"]), (2, 4.0, 4.0))
+
+        self.geometry.delete()
+        self.assertEqual(self.client.get(path).json()["count"], 1)
+
+        other = User.objects.create(email="other@example.com", role="teacher")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(path).json()["count"], 0)
+
+    def test_summary_of_a_missing_course_is_404_and_students_cannot_see_teacher_summary(self):
+        self.assertEqual(self.client.get("/api/v1/courses/999/ratings/summary/").status_code, 404)
+        self.assertEqual(
+            self.client.get(f"/api/v1/courses/{self.algebra.id}/ratings/summary/").json()["median"], None
+        )
+        self.client.force_authenticate(User.objects.create(email="student@example.com"))
+        self.assertEqual(self.client.get("/api/v1/teacher/ratings/summary/").status_code, 403)
+
+
+class BulkRatingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.algebra = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        self.geometry = Course.objects.create(title="Geometry", description="", teacher=self.teacher)
+        self.student = User.objects.create(email="student@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def post(self, ratings, key=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post("/api/v1/ratings/bulk/", {"ratings": ratings}, format="json", **headers)
+
+    def test_upserts_many_ratings_and_reports_each(self):
+        CourseRating.objects.create(course=self.algebra, user=self.student, rating=2)
+        response = self.post([
+            {"course": self.algebra.id, "rating": 4},
+            {"course": self.geometry.id, "rating": "5"},
+            {"course": self.geometry.id, "rating": 9},
+            {"course": 999, "rating": 3},
+            {"course": self.algebra.id, "rating": 3, "user_email": "teacher@example.com"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["updated", "created", "invalid_rating", "course_not_found", "forbidden"],
+        )
+        self.algebra.refresh_from_db()
+        self.assertEqual((self.algebra.rating_count, self.algebra.rating_sum), (1, 4))
+        self.assertIsNotNone(CourseRanking.objects.get(course=self.geometry).top_score)
+
+        summary = f"/api/v1/courses/{self.geometry.id}/ratings/summary/"
+        self.assertEqual(self.client.get(summary).json()["count"], 1)
+        self.post([{"course": self.geometry.id, "rating": 1}])
+        self.assertEqual(self.client.get(summary).json()["histogram"]["1"], 1)
+
+    def test_admins_rate_on_behalf_of_others(self):
+        self.client.force_authenticate(User.objects.create(email="admin@example.com", is_staff=True))
+        response = self.post([{"course": self.algebra.id, "rating": 5, "user_email": "student@example.com"}])
+        self.assertEqual(response.json()["summary"], {"created": 1})
+        self.assertTrue(CourseRating.objects.filter(course=self.algebra, user=self.student).exists())
+
+    def test_idempotency_key_replays_without_touching_the_database(self):
+        ratings = [{"course": self.algebra.id, "rating": 4}]
+        first = self.post(ratings, key="retry-1")
+        with self.assertNumQueries(0):
+            replay = self.post(ratings, key="retry-1")
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+
+        self.assertEqual(self.post([{"course": self.algebra.id, "rating": 1}], key="retry-1").status_code, 422)
+        self.assertEqual(self.post(ratings, key="retry-2").json()["summary"], {"unchanged": 1})
+
+    def test_rate_course_upserts(self):
+        path = f"/api/v1/courses/{self.algebra.id}/rate/"
+        self.assertEqual(self.client.post(path, {"rating": 3}).status_code, 201)
+        self.assertEqual(self.client.post(path, {"rating": 5}).status_code, 200)
+        self.assertEqual(self.client.post(path, {"rating": "five"}).status_code, 400)
+        self.algebra.refresh_from_db()
+        self.assertEqual((self.algebra.rating_count, self.algebra.rating_sum), (1, 5))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def test_server_timing_counts_queries_and_duplicates(self):
+        course = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        timing = self.client.get(f"/api/v1/courses/{course.id}/")["Server-Timing"]
+        self.assertRegex(
+            timing,
+            r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries, 0 duplicates", serializer;dur=[\d.]+$',
+        )
+
+        User.objects.create(email="student@example.com")
+        with recording() as metrics:
+            for user in User.objects.all():
+                list(Course.objects.filter(teacher=user))
+        self.assertEqual((metrics.queries, metrics.duplicates), (3, 1))
+
+    def test_metrics_endpoint_is_admin_only_prometheus_text(self):
+        self.client.get("/api/v1/teacher/students/")
+        self.assertEqual(self.client.get("/api/v1/metrics/").status_code, 403)
+
+        self.client.force_authenticate(User.objects.create(email="admin@example.com", is_staff=True))
+        response = self.client.get("/api/v1/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn(
+            'api_requests_total{endpoint="api/v1/teacher/students/",method="GET",status="200"} 1', body
+        )
+        self.assertIn(
+            'api_request_queries_bucket{endpoint="api/v1/teacher/students/",method="GET",le="+Inf"} 1',
+            body,
+        )
+        self.assertIn('api_request_duration_seconds_count{endpoint="api/v1/metrics/",method="GET"} 1', body)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            PROFILE_DIR=directory.name, PROFILE_KEEP=2, PROFILE_SAMPLE_INTERVAL=0.0001
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.staff = User.objects.create(email="admin@example.com", role="teacher", is_staff=True)
+        self.token = str(MyTokenObtainPairSerializer.get_token(self.staff).access_token)
+
+    def get(self, token, **extra):
+        return APIClient().get(
+            "/api/v1/teacher/students/", HTTP_AUTHORIZATION=f"Bearer {token}", **extra
+        )
+
+    def test_staff_profiles_land_in_a_bounded_ring(self):
+        ids = [self.get(self.token, HTTP_X_PROFILE="1")["X-Profile-Id"] for _ in range(3)]
+        self.assertEqual(list_profiles(), ids[:0:-1])
+
+        out = StringIO()
+        call_command("profiles", ids[-1], "--format", "speedscope", stdout=out)
+        document = json.loads(out.getvalue())
+        self.assertEqual(document["profiles"][0]["type"], "sampled")
+        self.assertIn("students_in_teacher_courses (api/views.py:", json.dumps(document["shared"]))
+
+        with self.assertRaises(CommandError):
+            call_command("profiles", "../settings.py")
+
+    def test_only_staff_can_ask_and_one_in_n_samples_everyone(self):
+        teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        token = str(MyTokenObtainPairSerializer.get_token(teacher).access_token)
+        self.assertNotIn("X-Profile-Id", self.get(token, HTTP_X_PROFILE="1"))
+        self.assertEqual(list_profiles(), [])
+
+        with override_settings(PROFILE_ONE_IN=1):
+            sampler = choose_profiler("api/v1/teacher/students/", traced=False).start()
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                sum(range(1000))
+            stacks = sampler.stop()
+        self.assertIn(
+            "test_only_staff_can_ask_and_one_in_n_samples_everyone (api/tests.py:", "".join(stacks)
+        )
+
+    def test_one_in_n_counts_each_endpoint_separately(self):
+        with override_settings(PROFILE_ONE_IN=3), \
+                mock.patch("api.profiling.StackSampler") as sampler:
+            picked = [
+                choose_profiler(endpoint, traced=False) is not None
+                for endpoint in ["api/v1/test-a/"] * 4 + ["api/v1/test-b/"]
+            ]
+        self.assertEqual(picked, [True, False, False, True, True])
+        self.assertEqual(sampler.call_count, 3)
+
+    def test_requests_outside_the_api_are_never_profiled(self):
+        with override_settings(PROFILE_ONE_IN=1), \
+                mock.patch("api.profiling.choose_profiler") as choose:
+            APIClient().get("/no-such-page/")
+        choose.assert_not_called()
+
+    @override_settings(PROFILE_ONE_IN=0)
+    def test_routes_are_not_resolved_when_profiling_is_off(self):
+        with mock.patch("api.profiling.resolve_route") as resolve_route:
+            self.assertEqual(self.get(self.token).status_code, 200)
+        resolve_route.assert_not_called()
+
+    async def test_under_asgi_only_async_views_are_profiled(self):
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {self.token}", "X-Profile": "1"}
+        response = await client.get("/api/v1/async/user/me/", headers=headers)
+        self.assertIn("X-Profile-Id", response)
+        # A sync view runs in another thread, which the tracer does not follow.
+        response = await client.get("/api/v1/teacher/students/", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+
+    def test_foreign_files_in_the_profile_dir_are_ignored(self):
+        profile_id = self.get(self.token, HTTP_X_PROFILE="1")["X-Profile-Id"]
+        directory = Path(settings.PROFILE_DIR)
+        (directory / "notes.collapsed").write_text("")
+        (directory / "1-2-x.txt").write_text("")
+        self.assertEqual(list_profiles(), [profile_id])
+
+
+@skipUnless(apps.is_installed("drf_yasg"), "API-only workers do not serve the docs")
+class ApiOnlyStartupTests(TestCase):
+    def test_api_only_workers_do_not_import_drf_yasg(self):
+        # A fresh interpreter: this one loaded the full profile already.
+        script = (
+            "import sys, backend.wsgi\n"
+            "from django.urls import resolve\n"
+            "resolve('/api/v1/courses/')\n"
+            "print('drf_yasg' in sys.modules)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=settings.BASE_DIR,
+            env=dict(os.environ, API_ONLY="1"), check=True, capture_output=True, text=True,
+        ).stdout
+        self.assertEqual(output.splitlines()[-1], "False")
+
+
+class StoredSchemaTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "openapi.json"
+        settings = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        api_schema.reset()
+        self.addCleanup(api_schema.reset)
+
+    def test_schema_is_generated_once_and_stored(self):
+        with mock.patch("api.schema.generate_schema", wraps=api_schema.generate_schema) as generate:
+            document = self.client.get("/swagger.json/")
+            self.client.get("/swagger.yaml/")
+            self.client.get("/api/v1/swagger/", {"format": "openapi"})
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(self.path.read_bytes(), document.content)
+        self.assertIn("/courses/", json.loads(document.content)["paths"])
+
+        self.assertEqual(document["Cache-Control"], "public, max-age=86400")
+        response = self.client.get("/swagger.json/", HTTP_IF_NONE_MATCH=document["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_generate_openapi_command(self):
+        call_command("generate_openapi", stdout=StringIO())
+        call_command("generate_openapi", "--check", stdout=StringIO())
+        self.assertEqual(self.client.get("/swagger.json/").content, self.path.read_bytes())
+
+        # Workers serve a rewritten file without a restart.
+        api_schema.write_schema(b'{"swagger": "2.0"}')
+        modified = self.path.stat().st_mtime_ns + 10 ** 9
+        os.utime(self.path, ns=(modified, modified))
+        self.assertEqual(self.client.get("/swagger.json/").content, b'{"swagger": "2.0"}')
+        with self.assertRaises(CommandError):
+            call_command("generate_openapi", "--check", stdout=StringIO())
@@ -0,0 +1,135 @@
+"""
+Concurrency limits for the endpoints that hash passwords.
+
+A login or registration holds its worker for as long as the hasher runs, so
+a burst of them (semester start) can occupy every worker and stall the rest
+of the API. Requests here take a slot per account, per client address and
+per process before hashing; when those are full they wait in line for up to
+LOGIN_QUEUE_TIMEOUT seconds instead of piling onto the CPU, and are then
+turned away with 429.
+"""
+import asyncio
+import functools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+
+
+def login_keys(request, email=None):
+    """
+    The slots a request needs, narrowest first: waiting on the account or
+    address slot never ties up a process-wide one.
+    """
+    limits = settings.LOGIN_CONCURRENCY
+    keys = []
+    if isinstance(email, str) and email:
+        keys.append((("account", email.strip().lower()), limits["account"]))
+    keys.append((("ip", request.META.get("REMOTE_ADDR")), limits["ip"]))
+    keys.append((("global", None), limits["global"]))
+    return keys
+
+
+class KeyedLimiter:
+    """
+    At most `limit` holders per key. Semaphores are created on first use and
+    dropped once nobody holds or waits on them, so only active keys are kept.
+
+    `semaphore_class` is threading.BoundedSemaphore for sync views (use
+    hold()) and asyncio.Semaphore for async ones (use ahold()).
+    """
+
+    def __init__(self, semaphore_class):
+        self.semaphore_class = semaphore_class
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def _checkout(self, key, limit):
+        with self._lock:
+            entry = self._slots.get(key)
+            if entry is None:
+                entry = self._slots[key] = [self.semaphore_class(limit), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _checkin(self, key):
+        with self._lock:
+            entry = self._slots[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._slots[key]
+
+    def active_keys(self):
+        with self._lock:
+            return list(self._slots)
+
+    @staticmethod
+    def _throttled(timeout):
+        return Throttled(
+            wait=max(1, math.ceil(timeout)),
+            detail="Too many concurrent login attempts, please retry shortly.",
+        )
+
+    @contextmanager
+    def hold(self, keys, timeout=None):
+        timeout = settings.LOGIN_QUEUE_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with ExitStack() as stack:
+            for key, limit in keys:
+                semaphore = self._checkout(key, limit)
+                stack.callback(self._checkin, key)
+                if not semaphore.acquire(timeout=max(0, deadline - time.monotonic())):
+                    raise self._throttled(timeout)
+                stack.callback(semaphore.release)
+            yield
+
+    @asynccontextmanager
+    async def ahold(self, keys, timeout=None):
+        timeout = settings.LOGIN_QUEUE_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        async with AsyncExitStack() as stack:
+            for key, limit in keys:
+                semaphore = self._checkout(key, limit)
+                stack.callback(self._checkin, key)
+                # wait_for() with no time left gives up even on a free slot.
+                if not semaphore.locked():
+                    await semaphore.acquire()
+                else:
+                    try:
+                        await asyncio.wait_for(
+                            semaphore.acquire(), max(0, deadline - time.monotonic())
+                        )
+                    except asyncio.TimeoutError:
+                        raise self._throttled(timeout)
+                stack.callback(semaphore.release)
+            yield
+
+
+login_limiter = KeyedLimiter(threading.BoundedSemaphore)
+async_login_limiter = KeyedLimiter(asyncio.Semaphore)
+
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+
+
+def hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+        return _hash_executor
+
+
+async def run_hasher(function, *args):
+    """
+    Run a pure hashing call (no database access) on the bounded hashing
+    executor, keeping the event loop and Django's sync thread free.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor(), functools.partial(function, *args))
@@ -0,0 +1,50 @@
+"""
+Refresh tokens whose revocation can be checked without the database.
+
+simplejwt's blacklist app looks every refresh token up in
+token_blacklist_blacklistedtoken before accepting it. With
+TOKEN_REVOCATION_CACHE set to a cache alias, revoked `jti`s are also written
+to that cache, each entry expiring with its token, and the refresh path only
+asks the cache. The cache must be shared by every worker (Redis, Memcached)
+and should survive restarts, or a rotated-out token becomes usable again
+until it expires.
+"""
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def revocation_cache():
+    alias = getattr(settings, "TOKEN_REVOCATION_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def revocation_key(jti):
+    return f"token:revoked:{jti}"
+
+
+class RevocableRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        cache = revocation_cache()
+        if cache is None:
+            return super().check_blacklist()
+        if cache.get(revocation_key(self.payload[api_settings.JTI_CLAIM])):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        # The blacklist tables stay the durable record (and what the admin
+        # shows); the cache entry is what refreshes are checked against.
+        result = super().blacklist()
+        cache = revocation_cache()
+        if cache is not None:
+            expires_in = self.payload["exp"] - datetime.now(timezone.utc).timestamp()
+            if expires_in > 0:
+                cache.set(
+                    revocation_key(self.payload[api_settings.JTI_CLAIM]), True, int(expires_in) + 1
+                )
+        return result
@@ -1,10 +1,9 @@
+from api import async_views
 from api import views as api_views
+from django.apps import apps
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework import routers
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-from rest_framework import permissions
+from api.lazy import lazy_view
 from api.views import (
     students_in_teacher_courses,
     get_user_details,
@@ -17,33 +16,37 @@ from api.views import (
 router = routers.DefaultRouter()
 router.register(r"courses", api_views.CourseViewSet, basename="course")
 
-# Add Bearer Token Authorization to Swagger
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Educational Platform API",
-        default_version="v1",
-        description="API documentation for the Educational Platform",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-    authentication_classes=[],
-)
-
 urlpatterns = [
     # Authentication Endpoints
     path("user/token/", api_views.MyTokenObtainPairView.as_view()),
-    path("user/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("user/token/refresh/", api_views.MyTokenRefreshView.as_view(), name="token_refresh"),
     path("user/register/", api_views.RegisterView.as_view(), name="register"),
     path("user/me/", get_user_details, name="get-user-details"),  # New endpoint
+    path("users/import/", api_views.import_users, name="import-users"),
     path("teachers/", api_views.TeacherListView.as_view(), name="teacher-list"),
     path("teacher/students/", students_in_teacher_courses, name="teacher-students"),
+    path("metrics/", api_views.metrics, name="metrics"),
     path("courses/<int:course_id>/rate/", rate_course, name="rate-course"),
+    path("ratings/bulk/", api_views.rate_courses_bulk, name="rate-courses-bulk"),
     path("courses/<int:course_id>/user-review/", UserCourseReviewView.as_view(), name="user-course-review"),
     path("courses/<int:course_id>/ratings/", get_course_ratings, name="get-course-ratings"),
+    path("courses/<int:course_id>/ratings/summary/", api_views.course_ratings_summary, name="course-ratings-summary"),
+    path("teacher/ratings/summary/", api_views.teacher_ratings_summary, name="teacher-ratings-summary"),
 
-    # Swagger UI
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    # Native async variants of the read endpoints (for ASGI deployments)
+    path("async/user/token/", async_views.token_obtain, name="async-token-obtain"),
+    path("async/user/me/", async_views.get_user_details, name="async-get-user-details"),
+    path("async/courses/", async_views.course_list, name="async-course-list"),
+    path("async/courses/<int:pk>/", async_views.course_detail, name="async-course-detail"),
+    path("async/courses/<int:course_id>/user-review/", async_views.user_course_review, name="async-user-course-review"),
+    path("async/courses/<int:course_id>/ratings/", async_views.get_course_ratings, name="async-get-course-ratings"),
 
     # Include the router URLs
     path("", include(router.urls)),
-]
\ No newline at end of file
+]
+
+if apps.is_installed("drf_yasg"):
+    # Swagger UI, imported on first use (not mounted on API-only workers)
+    urlpatterns.append(
+        path("swagger/", lazy_view("api.schema.schema_ui_view"), name="schema-swagger-ui")
+    )
@@ -1,22 +1,51 @@
+import csv
+import io
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, Prefetch
+from django.http import HttpResponse
 from django.shortcuts import render
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from api import serializers as api_serializer
 from rest_framework import generics, viewsets, permissions, status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from userauths.importing import UserImporter, iter_rows, open_text
 from userauths.models import User
-from core.models import Course, CourseRating
+from core.analytics import rating_summary
+from core.models import Course, CourseRanking, CourseRating, trending_now
+from core.ratings import import_ratings, parse_rating, upsert_ratings
+from core.search import search_available, search_courses, search_terms
+from core.enrollment import bulk_add_students, bulk_remove_students
+from api import metrics as api_metrics
+from api.cache import cached_response, idempotent_response
+from api.exports import EXPORT_RENDERERS, export_format, streaming_export
+from api.readers import course_rows, course_rows_by_id, course_values
+from api.throttling import login_keys, login_limiter
+from api.pagination import (
+    CourseCursorPagination,
+    SearchPagination,
+    StudentCursorPagination,
+    TopCoursesPagination,
+    TrendingCoursesPagination,
+)
 from api.permissions import IsTeacherOrReadOnly
 from api.serializers import CourseDescriptionSerializer, CourseRatingSerializer, TeacherMiniSerializer
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from api.serializers import StudentMiniSerializer
-from rest_framework.decorators import permission_classes
+from api.serializers import StudentMiniSerializer, get_requested_fields
+from rest_framework.decorators import permission_classes, renderer_classes
+from rest_framework.settings import api_settings
 from core.models import Course
 from rest_framework.views import APIView
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+
+
+def login_email(request):
+    # Bodies that are not an object are left for the serializer to reject.
+    return request.data.get("email") if isinstance(request.data, dict) else None
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
@@ -29,6 +58,23 @@ class MyTokenObtainPairView(TokenObtainPairView):
 
     serializer_class = api_serializer.MyTokenObtainPairSerializer
 
+    def post(self, request, *args, **kwargs):
+        # Password checks queue per account, address and process instead of
+        # taking over every worker during a login burst.
+        with login_limiter.hold(login_keys(request, login_email(request))):
+            return super().post(request, *args, **kwargs)
+
+
+class MyTokenRefreshView(TokenRefreshView):
+    """
+    Custom view for refreshing tokens.
+
+    Args:
+        TokenRefreshView (type): Base class for token refresh views.
+    """
+
+    serializer_class = api_serializer.MyTokenRefreshSerializer
+
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -42,6 +88,35 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     serializer_class = api_serializer.RegisterSerializer
 
+    def create(self, request, *args, **kwargs):
+        with login_limiter.hold(login_keys(request, login_email(request))):
+            return super().create(request, *args, **kwargs)
+
+
+def student_rows(students):
+    """
+    Only what StudentMiniSerializer renders, the country joined from Profile.
+    """
+    return students.select_related("profile").only("id", "full_name", "email", "profile__country")
+
+
+def course_read_queryset(request):
+    """
+    Load everything CourseSerializer renders up front: the teacher is
+    joined, student emails come from a single prefetch query (skipped when
+    `?fields=` leaves them out) and the average rating is read from the
+    denormalized columns on Course.
+    """
+    queryset = Course.objects.select_related("teacher")
+    requested = get_requested_fields(request)
+    if requested is not None and "students" not in requested:
+        return queryset
+    return queryset.prefetch_related(
+        # Ordered like api.readers.student_emails(), which the fast path uses.
+        Prefetch("students", queryset=User.objects.only("id", "email").order_by("id"))
+    )
+
+
 class CourseViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing Courses with CRUD operations.
@@ -50,6 +125,13 @@ class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = api_serializer.CourseSerializer
     permission_classes = [IsTeacherOrReadOnly]          # already blocks non-teachers
+    pagination_class = CourseCursorPagination
+
+    def get_queryset(self):
+        if self.action in ("enroll", "unenroll", "enroll_bulk", "unenroll_bulk",
+                           "destroy", "students"):
+            return super().get_queryset().select_related("teacher")
+        return course_read_queryset(self.request)
 
     # ---------- EXISTING ACTION ----------
     @action(detail=True, methods=["post"], permission_classes=[IsTeacherOrReadOnly])
@@ -96,6 +178,222 @@ class CourseViewSet(viewsets.ModelViewSet):
         return Response({"status": f"{student.email} removed from course."},
                         status=status.HTTP_200_OK)
 
+    def _resolve_student_emails(self, request):
+        """
+        Read the emails for a bulk action, either from a JSON body
+        {"student_emails": [...]} or from an uploaded CSV `file` whose
+        first column holds the emails. Returns (emails, students_by_email,
+        results) where `results` already covers unknown or non-student emails.
+        Raises ParseError (400) for a body or file that cannot be read.
+        """
+        upload = request.FILES.get("file")
+        if upload is not None:
+            reader = csv.reader(io.TextIOWrapper(upload, encoding="utf-8-sig"))
+            try:
+                raw_emails = [row[0] for row in reader if row]
+            except (UnicodeDecodeError, csv.Error):
+                raise ParseError("file must be a UTF-8 encoded CSV file.")
+        else:
+            if not isinstance(request.data, dict):
+                raise ParseError("Expected a JSON object with student_emails.")
+            raw_emails = request.data.get("student_emails") or []
+            if isinstance(raw_emails, str):
+                raw_emails = [raw_emails]
+            elif not isinstance(raw_emails, list):
+                raise ParseError("student_emails must be a list of emails.")
+
+        emails = []
+        seen = set()
+        for email in raw_emails:
+            email = str(email).strip()
+            if email and email.lower() not in ("email", "student_email") and email not in seen:
+                seen.add(email)
+                emails.append(email)
+
+        users = User.objects.filter(email__in=emails).only("id", "email", "role")
+        users_by_email = {user.email: user for user in users}
+
+        students_by_email = {}
+        results = {}
+        for email in emails:
+            user = users_by_email.get(email)
+            if user is None:
+                results[email] = "not_found"
+            elif user.role != "student":
+                results[email] = "wrong_role"
+            else:
+                students_by_email[email] = user
+        return emails, students_by_email, results
+
+    @staticmethod
+    def _bulk_response(emails, results):
+        summary = {}
+        for result in results.values():
+            summary[result] = summary.get(result, 0) + 1
+        return Response({
+            "results": [{"email": email, "status": results[email]} for email in emails],
+            "summary": summary,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["post"], permission_classes=[IsTeacherOrReadOnly])
+    def enroll_bulk(self, request, pk=None):
+        """
+        Enrol many students at once.
+        Body: {"student_emails": ["...", ...]} or a multipart CSV `file`.
+        Every email gets one of: enrolled, already_enrolled, not_found, wrong_role.
+        """
+        course = self.get_object()
+        emails, students_by_email, results = self._resolve_student_emails(request)
+        if not emails:
+            return Response({"error": "student_emails or file is required"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        new_ids = bulk_add_students(
+            course, [student.id for student in students_by_email.values()]
+        )
+
+        for email, student in students_by_email.items():
+            results[email] = "enrolled" if student.id in new_ids else "already_enrolled"
+        return self._bulk_response(emails, results)
+
+    @action(detail=True, methods=["post"], permission_classes=[IsTeacherOrReadOnly])
+    def unenroll_bulk(self, request, pk=None):
+        """
+        Remove many students at once.
+        Body: {"student_emails": ["...", ...]} or a multipart CSV `file`.
+        Every email gets one of: unenrolled, not_enrolled, not_found, wrong_role.
+        """
+        course = self.get_object()
+        emails, students_by_email, results = self._resolve_student_emails(request)
+        if not emails:
+            return Response({"error": "student_emails or file is required"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        enrolled = bulk_remove_students(
+            course, [student.id for student in students_by_email.values()]
+        )
+
+        for email, student in students_by_email.items():
+            results[email] = "unenrolled" if student.id in enrolled else "not_enrolled"
+        return self._bulk_response(emails, results)
+
+    def list(self, request, *args, **kwargs):
+        def render():
+            if not settings.API_FAST_COURSE_READS:
+                return super(CourseViewSet, self).list(request, *args, **kwargs)
+            page = self.paginate_queryset(course_values())
+            return self.get_paginated_response(course_rows(page, get_requested_fields(request)))
+
+        return cached_response(request, ["courses", "users"], render)
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request, [f"course:{kwargs[self.lookup_field]}", "users"],
+            lambda: super(CourseViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    def courses_by_id(self, request, ids):
+        """
+        The rendered courses with the given ids, keyed by id: built from
+        values() rows (api/readers.py), or by the serializer when
+        API_FAST_COURSE_READS is off.
+        """
+        if settings.API_FAST_COURSE_READS:
+            return course_rows_by_id(ids, get_requested_fields(request))
+        return {
+            course_id: self.get_serializer(course).data
+            for course_id, course in course_read_queryset(request).in_bulk(ids).items()
+        }
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Full-text search over course titles, descriptions and teacher names,
+        best matches first. Each result has a `highlight` object with the
+        matched words wrapped in <mark> (the rest is HTML-escaped).
+        """
+        if not search_available():
+            return Response({"detail": "Course search is not available on this database."},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        query = request.query_params.get("q", "")
+        if not search_terms(query):
+            return Response({"detail": "Query parameter 'q' is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        def render():
+            paginator = SearchPagination()
+            hits = paginator.paginate_hits(
+                lambda limit, offset: search_courses(query, limit, offset), request
+            )
+            courses = self.courses_by_id(request, [hit.course_id for hit in hits])
+            results = []
+            for hit in hits:
+                if hit.course_id in courses:
+                    data = courses[hit.course_id]
+                    data["highlight"] = hit.highlight
+                    results.append(data)
+            return paginator.get_paginated_response(results)
+
+        return cached_response(request, ["courses", "users"], render)
+
+    def ranked_courses(self, request, rankings, paginator, score):
+        """
+        One leaderboard page: the CourseRanking page in index order, then
+        the courses on it, each with its `score`.
+        """
+        def render():
+            page = paginator.paginate_queryset(rankings, request, view=self)
+            courses = self.courses_by_id(request, [ranking.course_id for ranking in page])
+            results = []
+            for ranking in page:
+                if ranking.course_id in courses:
+                    data = courses[ranking.course_id]
+                    data["score"] = round(score(ranking), 4)
+                    results.append(data)
+            return paginator.get_paginated_response(results)
+
+        return cached_response(request, ["courses", "users"], render)
+
+    @action(detail=False, methods=["get"])
+    def top(self, request):
+        """
+        Rated courses by Bayesian average rating: each course's ratings are
+        blended with a few at the site-wide mean, so one five-star rating
+        does not outrank fifty four-star ones.
+        """
+        return self.ranked_courses(
+            request,
+            CourseRanking.objects.filter(top_score__isnull=False).only("course_id", "top_score"),
+            TopCoursesPagination(),
+            lambda ranking: ranking.top_score,
+        )
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        """
+        Courses by recent activity: ratings and new enrollments, each
+        counting half as much for every TRENDING_HALF_LIFE_DAYS of age.
+        """
+        return self.ranked_courses(
+            request,
+            CourseRanking.objects.only("course_id", "trending_score"),
+            TrendingCoursesPagination(),
+            lambda ranking: trending_now(ranking.trending_score),
+        )
+
+    @action(detail=True, methods=["get"])
+    def students(self, request, pk=None):
+        """
+        Paginated list of the students enrolled in the course.
+        """
+        course = self.get_object()
+        students = student_rows(course.students.all())
+
+        paginator = StudentCursorPagination()
+        page = paginator.paginate_queryset(students, request, view=self)
+        serializer = StudentMiniSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     def destroy(self, request, *args, **kwargs):
         """
         Override the destroy method to ensure only teachers can delete courses.
@@ -114,33 +412,85 @@ class TeacherListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     queryset = User.objects.filter(role="teacher")
 
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request, ["users"], lambda: super(TeacherListView, self).list(request, *args, **kwargs)
+        )
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + EXPORT_RENDERERS)
 def students_in_teacher_courses(request):
     """
     Fetch all students enrolled in the courses taught by the logged-in teacher.
+    Served from the materialized TeacherRoster and cursor-paginated, or
+    streamed whole with `?format=csv|ndjson`.
     """
     try:
         if request.user.role != "teacher":
             return Response({"detail": "Only teachers can view their students."},
                             status=403)
 
-        # Get all courses taught by the teacher
-        teacher_courses = Course.objects.filter(teacher=request.user)
+        students = User.objects.filter(role="student", teacher_rosters__teacher=request.user)
 
-        # Get all students enrolled in those courses
-        students = User.objects.filter(role="student", enrolled_courses__in=teacher_courses).distinct()
+        if export_format(request):
+            return streaming_export(
+                request, students.annotate(country=F("profile__country")).order_by("id"),
+                StudentMiniSerializer.Meta.fields, "students",
+            )
+        students = student_rows(students)
 
-        # Serialize the students
-        student_data = [
-            {"id": student.id, "full_name": student.full_name, "email": student.email}
-            for student in students
-        ]
-        return Response(student_data, status=200)
+        paginator = StudentCursorPagination()
+        page = paginator.paginate_queryset(students, request)
+        serializer = StudentMiniSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     except Exception as e:
         return Response({"error": str(e)}, status=500)
     
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def import_users(request):
+    """
+    Admin-only bulk import of users from an uploaded CSV or JSONL `file`
+    (see `manage.py import_users` for the columns). Pass `?enroll=0` to
+    ignore the courses column. Files over USER_IMPORT_REQUEST_MAX_BYTES or
+    USER_IMPORT_REQUEST_MAX_ROWS rows are refused; import those with the
+    command.
+    """
+    upload = request.FILES.get("file")
+    if upload is None:
+        return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
+    too_large = Response(
+        {"error": (
+            f"Files over {settings.USER_IMPORT_REQUEST_MAX_BYTES} bytes or "
+            f"{settings.USER_IMPORT_REQUEST_MAX_ROWS} rows must be imported with "
+            "manage.py import_users."
+        )},
+        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    )
+    if upload.size > settings.USER_IMPORT_REQUEST_MAX_BYTES:
+        return too_large
+
+    file_format = request.query_params.get("format") or (
+        "jsonl" if upload.name.endswith((".jsonl", ".ndjson")) else "csv"
+    )
+    importer = UserImporter(
+        batch_size=settings.USER_IMPORT_BATCH_SIZE,
+        workers=settings.USER_IMPORT_REQUEST_WORKERS,
+        enroll=request.query_params.get("enroll") != "0",
+    )
+    try:
+        rows = list(islice(
+            iter_rows(open_text(upload), file_format), settings.USER_IMPORT_REQUEST_MAX_ROWS + 1
+        ))
+        if len(rows) > settings.USER_IMPORT_REQUEST_MAX_ROWS:
+            return too_large
+        report = importer.run(rows)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report, status=status.HTTP_200_OK)
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_user_details(request):
@@ -155,28 +505,6 @@ def get_user_details(request):
         "role": user.role,
     })
 
-@swagger_auto_schema(
-    method="put",
-    operation_description="Update the description of a course. Only the 'description' field is allowed.",
-    request_body=openapi.Schema(
-        type=openapi.TYPE_OBJECT,
-        properties={
-            "description": openapi.Schema(
-                type=openapi.TYPE_STRING,
-                description="The new description for the course.",
-                example="This is an updated course description."
-            ),
-        },
-        required=["description"],  # Mark 'description' as required
-    ),
-    responses={
-        200: "Course description updated successfully.",
-        400: "Invalid input.",
-        403: "Permission denied.",
-        404: "Course not found.",
-    },
-)
-
 @action(detail=True, methods=["put"], permission_classes=[IsTeacherOrReadOnly])
 def update_description(self, request, pk=None):
     """
@@ -193,27 +521,6 @@ def update_description(self, request, pk=None):
 
     return Response({"message": "Course description updated successfully!"}, status=status.HTTP_200_OK)
 
-@swagger_auto_schema(
-    method='post',
-    operation_description="Rate a course by providing a score between 1 and 5.",
-    request_body=openapi.Schema(
-        type=openapi.TYPE_OBJECT,
-        properties={
-            'rating': openapi.Schema(
-                type=openapi.TYPE_INTEGER,
-                description='Rating between 1 and 5',
-                example=4
-            ),
-        },
-        required=['rating'],  # Mark 'rating' as required
-    ),
-    responses={
-        201: "Rating created successfully.",
-        200: "Rating updated successfully.",
-        400: "Invalid rating.",
-        404: "Course not found.",
-    },
-)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def rate_course(request, course_id):
@@ -227,23 +534,57 @@ def rate_course(request, course_id):
         return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
 
     # Get the rating from the request data
-    rating = request.data.get('rating')
-    if not rating or not (1 <= int(rating) <= 5):
+    rating = parse_rating(request.data.get('rating'))
+    if rating is None:
         return Response({"detail": "Rating must be an integer between 1 and 5."}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Check if the user has already rated the course
+    # Create or update in one upsert, so double submissions cannot race
     user = request.user
-    course_rating, created = CourseRating.objects.update_or_create(
-        course=course,
-        user=user,
-        defaults={'rating': rating}
-    )
+    statuses = upsert_ratings([(course.id, user.id, rating)])
 
-    if created:
+    if statuses[course.id, user.id] == "created":
         return Response({"detail": "Rating created successfully."}, status=status.HTTP_201_CREATED)
     else:
         return Response({"detail": "Rating updated successfully."}, status=status.HTTP_200_OK)
     
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def rate_courses_bulk(request):
+    """
+    Create or update many ratings at once. Body: {"ratings": [{"course": 1,
+    "rating": 5, "user_email": "..."}, ...]}. Every rating gets one of:
+    created, updated, unchanged, invalid_row, invalid_rating,
+    course_not_found, user_not_found, forbidden.
+    """
+    def respond():
+        rows = request.data.get("ratings") if isinstance(request.data, dict) else None
+        if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+            return Response({"error": "ratings must be a non-empty list of objects"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.RATING_BULK_MAX:
+            return Response({"error": f"At most {settings.RATING_BULK_MAX} ratings per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        own_email = request.user.email
+        rows = [{**row, "user_email": str(row.get("user_email") or own_email).strip()} for row in rows]
+        allowed = [request.user.is_staff or row["user_email"] == own_email for row in rows]
+        imported = iter(import_ratings([row for row, ok in zip(rows, allowed) if ok]))
+        results = [next(imported) if ok else "forbidden" for ok in allowed]
+
+        summary = {}
+        for result in results:
+            summary[result] = summary.get(result, 0) + 1
+        return Response({
+            "results": [
+                {"course": row.get("course"), "user_email": row["user_email"], "status": result}
+                for row, result in zip(rows, results)
+            ],
+            "summary": summary,
+        }, status=status.HTTP_200_OK)
+
+    return idempotent_response(request, respond)
+
+
 class UserCourseReviewView(APIView):
     """
     View to retrieve a user's review for a specific course.
@@ -268,17 +609,78 @@ class UserCourseReviewView(APIView):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + EXPORT_RENDERERS)
 def get_course_ratings(request, course_id):
     """
     Retrieve all ratings for a specific course.
+    Served from the versioned response cache, with ETag support, or
+    streamed with `?format=csv|ndjson`.
     """
-    try:
-        # Ensure the course exists
-        course = Course.objects.get(id=course_id)
-    except Course.DoesNotExist:
-        return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+    if export_format(request):
+        if not Course.objects.filter(id=course_id).exists():
+            return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        ratings = CourseRating.objects.filter(course_id=course_id).order_by("created_at")
+        return streaming_export(
+            request, ratings, CourseRatingSerializer.Meta.fields, f"course-{course_id}-ratings"
+        )
+
+    def render():
+        try:
+            # Ensure the course exists
+            course = Course.objects.get(id=course_id)
+        except Course.DoesNotExist:
+            return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Fetch all ratings for the course
+        ratings = CourseRating.objects.filter(course=course).order_by("created_at")
+        serializer = CourseRatingSerializer(ratings, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    return cached_response(request, [f"ratings:{course_id}"], render)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def course_ratings_summary(request, course_id):
+    """
+    Rating breakdown for a course: count, mean, median, count per star and
+    ratings per week, aggregated in a single query and cached until the
+    course's ratings change.
+    """
+    def render():
+        summary = rating_summary(CourseRating.objects.filter(course_id=course_id))
+        if not summary["count"] and not Course.objects.filter(id=course_id).exists():
+            return Response({"detail": "Course not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(summary, status=status.HTTP_200_OK)
+
+    return cached_response(request, [f"ratings:{course_id}"], render)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def teacher_ratings_summary(request):
+    """
+    The same breakdown over every rating of the logged-in teacher's courses.
+    Cached per set of courses, so it is invalidated by a rating on any of
+    them and by a course being added, removed or reassigned.
+    """
+    if request.user.role != "teacher":
+        return Response({"detail": "Only teachers can view their ratings."}, status=403)
 
-    # Fetch all ratings for the course
-    ratings = CourseRating.objects.filter(course=course)
-    serializer = CourseRatingSerializer(ratings, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+    course_ids = Course.objects.filter(teacher=request.user).order_by("id").values_list("id", flat=True)
+    scopes = [f"ratings:{course_id}" for course_id in course_ids]
+
+    def render():
+        return Response(rating_summary(CourseRating.objects.filter(course__teacher=request.user)))
+
+    return cached_response(request, scopes, render)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """
+    Per-endpoint request metrics of this worker process in the Prometheus
+    text format (see api/metrics.py).
+    """
+    return HttpResponse(api_metrics.registry.render(), content_type=api_metrics.CONTENT_TYPE)
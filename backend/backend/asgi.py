@@ -8,9 +8,16 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
 
 import os
+from importlib import import_module
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Import every view now rather than on the first request. Under gunicorn
+# with preload_app (gunicorn.conf.py) that happens once, in the master, and
+# the forked workers share the loaded code copy-on-write.
+import_module(settings.ROOT_URLCONF)
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 import os
+import tempfile
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -65,27 +66,63 @@ SWAGGER_SETTINGS = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.ClaimsJWTAuthentication",
     ),
     # optional – make everything private by default
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # JSONRenderer's exact output, rendered by orjson when it is installed
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 MIDDLEWARE = [
+    # Timings, query counts and Server-Timing for /api/v1/ (see api/metrics.py)
+    "api.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # ⚡ Must be very high (top 3)
     "django.middleware.common.CommonMiddleware",
     'django.middleware.security.SecurityMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Staff-requested and 1-in-PROFILE_ONE_IN request profiles (see api/profiling.py)
+    "api.profiling.ProfilingMiddleware",
 ]
 
+# API-only workers (API_ONLY=1) serve /api/v1/ and nothing else: no admin,
+# Swagger UI, sessions, messages or static files, no browsable API, and only
+# the middleware JWT requests go through. Run the admin and the docs on
+# workers with the full profile.
+API_ONLY = os.environ.get("API_ONLY", "0") == "1"
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in (
+            "jazzmin",
+            "django.contrib.admin",
+            "django.contrib.sessions",
+            "django.contrib.messages",
+            "django.contrib.staticfiles",
+            "drf_yasg",
+        )
+    ]
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in (
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "django.middleware.csrf.CsrfViewMiddleware",
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+            "django.contrib.messages.middleware.MessageMiddleware",
+            "django.middleware.clickjacking.XFrameOptionsMiddleware",
+        )
+    ]
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ("api.renderers.FastJSONRenderer",)
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -130,18 +167,170 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
+# Cache alias rotated-out refresh tokens are recorded in and checked against
+# on refresh, instead of querying the token_blacklist tables. Must be shared
+# by all workers (see api/tokens.py); unset keeps the database check.
+TOKEN_REVOCATION_CACHE = os.environ.get("TOKEN_REVOCATION_CACHE") or None
+
+# Cache used for API responses and their version counters. It must be shared
+# by all worker processes, or a version bump only reaches the worker that made
+# the write: files in a temporary directory by default, or point
+# DJANGO_CACHE_BACKEND at e.g. django.core.cache.backends.redis.RedisCache
+# (with its URL as DJANGO_CACHE_LOCATION). gunicorn.conf.py refuses to start
+# several workers on a per-process cache such as LocMemCache.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "DJANGO_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.environ.get(
+            "DJANGO_CACHE_LOCATION", os.path.join(tempfile.gettempdir(), "educational-platform-cache")
+        ),
+    }
+}
+
+API_CACHE_ALIAS = "default"
+# Seconds a rendered response stays cached (it is invalidated earlier by any
+# version bump). Version counters expire after as long, which bounds how
+# stale a single process with its own local memory cache can be.
+API_CACHE_TIMEOUT = 300
+
+# Build course list responses (/courses/, /courses/search/, top, trending)
+# straight from values() rows instead of CourseSerializer; same JSON, less
+# CPU (see api/readers.py).
+API_FAST_COURSE_READS = True
+
+# Cache alias holding users' authentication state (see userauths/cache.py).
+# Must be shared by all workers; with it, requests are authenticated from the
+# token claims alone. Unset, each request reads role and is_active from the
+# database.
+AUTH_USER_CACHE = os.environ.get("AUTH_USER_CACHE") or None
+# Seconds a user loaded from the database (for tokens without the custom
+# claims) stays in AUTH_USER_CACHE.
+AUTH_USER_CACHE_TTL = 60
+
+# Bulk user import (manage.py import_users and /api/v1/users/import/):
+# rows per INSERT batch and password-hashing processes (None = one per CPU).
+USER_IMPORT_BATCH_SIZE = 1000
+USER_IMPORT_WORKERS = None
+# The endpoint imports inside the request, on a web worker: it hashes in
+# that process (0) and only takes small files; larger ones go through
+# manage.py import_users.
+USER_IMPORT_REQUEST_WORKERS = 0
+USER_IMPORT_REQUEST_MAX_BYTES = 256 * 1024
+USER_IMPORT_REQUEST_MAX_ROWS = 200
+
+# Request profiles (X-Profile: 1 from staff, or every PROFILE_ONE_IN-th
+# request to each API endpoint when set): where they go, how many are kept,
+# and the seconds between stack samples.
+PROFILE_DIR = os.environ.get("PROFILE_DIR", BASE_DIR / "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+PROFILE_ONE_IN = int(os.environ.get("PROFILE_ONE_IN", "0"))
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+# The OpenAPI schema served at /swagger.json/ and by the Swagger UI: the file
+# `manage.py generate_openapi` writes (and the first request writes when it
+# is missing), and the seconds clients may reuse it for.
+OPENAPI_SCHEMA_PATH = os.environ.get("OPENAPI_SCHEMA_PATH", BASE_DIR / "openapi.json")
+OPENAPI_CACHE_MAX_AGE = 24 * 60 * 60
+
+# Bulk ratings (manage.py import_ratings and /api/v1/ratings/bulk/): rows per
+# upsert batch, the most ratings one request may carry, and how long a
+# response is replayed for a repeated Idempotency-Key.
+RATING_IMPORT_BATCH_SIZE = 1000
+RATING_BULK_MAX = 1000
+IDEMPOTENCY_KEY_TIMEOUT = 24 * 60 * 60
+
+# Course leaderboards (/courses/top/ and /courses/trending/): how many
+# ratings at the site-wide mean each course's average is blended with, the
+# half-life of a rating's or enrollment's trending contribution, and an
+# enrollment's weight relative to a five-star rating.
+RANKING_PRIOR_WEIGHT = 10
+TRENDING_HALF_LIFE_DAYS = 7
+TRENDING_ENROLLMENT_WEIGHT = 0.5
+
+# Password hashing. PASSWORD_HASHER picks the hasher for new passwords
+# (argon2 needs the argon2-cffi package); the others stay listed so
+# existing hashes keep verifying and are upgraded on the next login.
+_PASSWORD_HASHERS = {
+    "scrypt": "userauths.hashers.TunedScryptPasswordHasher",
+    "argon2": "userauths.hashers.TunedArgon2PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "scrypt")
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+]
+SCRYPT_WORK_FACTOR = int(os.environ.get("SCRYPT_WORK_FACTOR", 2 ** 14))
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", 102400))
+ARGON2_PARALLELISM = int(os.environ.get("ARGON2_PARALLELISM", 8))
+
+# Login and registration spend most of their time hashing. Per process, at
+# most LOGIN_CONCURRENCY["global"] of them run at once, ["ip"] per client
+# address and ["account"] per email; the rest queue for up to
+# LOGIN_QUEUE_TIMEOUT seconds and are then answered with 429.
+LOGIN_CONCURRENCY = {"account": 1, "ip": 4, "global": 8}
+LOGIN_QUEUE_TIMEOUT = 5
+# Threads the async token endpoint verifies passwords on.
+PASSWORD_HASH_WORKERS = 4
+
 WSGI_APPLICATION = 'backend.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Configured from the environment (see the README for both profiles):
+#   DATABASE_ENGINE        sqlite (default) or postgres
+#   DATABASE_CONN_MAX_AGE  seconds to keep a connection open, 0 = per request
+#   DATABASE_CONN_HEALTH_CHECKS  check reused connections before each request
+DATABASE_ENGINE = os.environ.get("DATABASE_ENGINE", "sqlite")
+DATABASE_CONN_MAX_AGE = int(os.environ.get("DATABASE_CONN_MAX_AGE", "60"))
+DATABASE_CONN_HEALTH_CHECKS = os.environ.get("DATABASE_CONN_HEALTH_CHECKS", "1") == "1"
+
+if DATABASE_ENGINE == "postgres":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("DATABASE_NAME", "educational_platform"),
+            'USER': os.environ.get("DATABASE_USER", "postgres"),
+            'PASSWORD': os.environ.get("DATABASE_PASSWORD", ""),
+            'HOST': os.environ.get("DATABASE_HOST", "localhost"),
+            'PORT': os.environ.get("DATABASE_PORT", "5432"),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
+            # Behind PgBouncer in transaction mode a named cursor may land on
+            # another server connection, so server-side cursors must go.
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get("DATABASE_PGBOUNCER", "0") == "1",
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get("DATABASE_CONNECT_TIMEOUT", "5")),
+                'application_name': "educational-platform",
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'backend.sqlite3',
+            'NAME': os.environ.get("DATABASE_NAME", BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
+            'OPTIONS': {
+                # Seconds the sqlite3 module waits on a locked database.
+                'timeout': int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")) / 1000,
+                # WAL lets readers run alongside the single writer.
+                'init_command': "; ".join([
+                    "PRAGMA journal_mode=WAL",
+                    "PRAGMA synchronous=NORMAL",
+                    f"PRAGMA mmap_size={os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)}",
+                    f"PRAGMA cache_size={os.environ.get('SQLITE_CACHE_SIZE', -64000)}",
+                    f"PRAGMA busy_timeout={os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)}",
+                ]),
+                'transaction_mode': "IMMEDIATE",
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -0,0 +1,44 @@
+"""
+SQLite backend with per-connection tuning.
+
+Adds two OPTIONS on top of django.db.backends.sqlite3, named after their
+Django 5.1 equivalents so the settings carry over unchanged:
+
+* ``init_command``: ``;``-separated statements (typically PRAGMAs such as
+  ``journal_mode=WAL``) run on every new connection.
+* ``transaction_mode``: ``DEFERRED``, ``IMMEDIATE`` or ``EXCLUSIVE``.
+  ``IMMEDIATE`` takes the write lock when a transaction starts, so a
+  read-then-write transaction waits on the busy timeout instead of
+  failing with "database is locked" when it upgrades its lock.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.init_command = kwargs.pop("init_command", None)
+        transaction_mode = kwargs.pop("transaction_mode", None)
+        if transaction_mode is not None and transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES['{self.alias}']['OPTIONS']['transaction_mode'] "
+                f"must be one of {', '.join(TRANSACTION_MODES)}."
+            )
+        self.transaction_mode = transaction_mode and transaction_mode.upper()
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in (self.init_command or "").split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if getattr(self, "transaction_mode", None):
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
+        else:
+            super()._start_transaction_under_autocommit()
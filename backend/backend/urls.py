@@ -14,34 +14,26 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from api.lazy import lazy_view
 
+urlpatterns = []
+if apps.is_installed("drf_yasg"):
+    # The schema is generated once and stored (see api/schema.py)
+    urlpatterns += [
+        path("swagger<format>/", lazy_view("api.schema.schema_view"), name="schema-json"),
+        path("", lazy_view("api.schema.schema_ui_view"), name="schema-swagger-ui"),
+    ]
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Educational Platform API",
-        default_version="v1.0.0",
-        description="This is the API documentation for the educational project APIs"
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
-
-urlpatterns = [
-    path(
-        "swagger<format>/", schema_view.without_ui(cache_timeout=0), name="schema-json"
-    ),
-    path("", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
-    path('admin/', admin.site.urls),
-    path('api/v1/', include('api.urls')),
-]
+    urlpatterns.append(path('admin/', admin.site.urls))
+urlpatterns.append(path('api/v1/', include('api.urls')))
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+if apps.is_installed("django.contrib.staticfiles"):
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
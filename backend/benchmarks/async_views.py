@@ -0,0 +1,127 @@
+"""
+Requests/sec of the read endpoints under WSGI, sync views under ASGI and
+the native async views, all on the same seeded dataset.
+
+Run from the backend directory:
+
+    python -m benchmarks.async_views --courses 200 --students 500 --requests 400
+
+The dataset lives in a throwaway test database, and the response cache is
+disabled so every request does the full work.
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+ENDPOINTS = [
+    "user/me/",
+    "courses/?page_size=50",
+    "courses/{course_id}/",
+    "courses/{course_id}/ratings/",
+]
+
+
+def seed(courses, students):
+    from api.serializers import MyTokenObtainPairSerializer
+    from core.models import Course, CourseRating
+    from userauths.models import User
+
+    teacher = User.objects.create(email="bench-teacher@example.com", role="teacher")
+    learners = [
+        User.objects.create(email=f"bench-student{index}@example.com")
+        for index in range(students)
+    ]
+    course_ids = []
+    for index in range(courses):
+        course = Course.objects.create(
+            title=f"Course {index}", description="Benchmark course", teacher=teacher
+        )
+        course.students.add(*learners[index % students:][:25])
+        for learner in learners[:10]:
+            CourseRating.objects.create(course=course, user=learner, rating=1 + index % 5)
+        course_ids.append(course.id)
+
+    token = MyTokenObtainPairSerializer.get_token(teacher).access_token
+    return str(token), course_ids[len(course_ids) // 2]
+
+
+def wsgi_rps(paths, token, requests, concurrency):
+    def worker(count):
+        client = Client()
+        headers = {"Authorization": f"Bearer {token}"}
+        for index in range(count):
+            response = client.get(paths[index % len(paths)], headers=headers)
+            assert response.status_code == 200, (response.status_code, response.content[:200])
+
+    per_worker = requests // concurrency
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, [per_worker] * concurrency))
+    return per_worker * concurrency / (time.perf_counter() - started)
+
+
+def asgi_rps(paths, token, requests, concurrency):
+    async def worker(count):
+        client = AsyncClient()
+        headers = {"Authorization": f"Bearer {token}"}
+        for index in range(count):
+            response = await client.get(paths[index % len(paths)], headers=headers)
+            assert response.status_code == 200, (response.status_code, response.content[:200])
+
+    async def run():
+        per_worker = requests // concurrency
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+        return per_worker * concurrency / (time.perf_counter() - started)
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=200)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        ):
+            token, course_id = seed(args.courses, args.students)
+            rows = []
+            for endpoint in ENDPOINTS:
+                path = endpoint.format(course_id=course_id)
+                sync_paths = [f"/api/v1/{path}"]
+                async_paths = [f"/api/v1/async/{path}"]
+                rows.append((
+                    path,
+                    wsgi_rps(sync_paths, token, args.requests, args.concurrency),
+                    asgi_rps(sync_paths, token, args.requests, args.concurrency),
+                    asgi_rps(async_paths, token, args.requests, args.concurrency),
+                ))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{'endpoint':32} {'WSGI':>10} {'sync/ASGI':>10} {'async':>10}   (requests/sec)")
+    for path, wsgi, sync_asgi, native in rows:
+        print(f"{path:32} {wsgi:10.1f} {sync_asgi:10.1f} {native:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Load driver: simulated users hitting a running server, with p50/p95/p99
+latency, throughput and queries per request for every endpoint.
+
+Seed the server's database, start the server, then drive it from the
+backend directory:
+
+    python -m benchmarks.seed --reset
+    gunicorn backend.wsgi -w 4 -b 127.0.0.1:8000  # or manage.py runserver
+    python -m benchmarks.load --url http://127.0.0.1:8000 --users 16 --duration 30
+
+Each simulated user logs in as one student and one teacher from the
+manifest and then loops over a weighted mix of requests (see SCENARIO) on
+keep-alive connections. Only the standard library is used: requests go out
+over asyncio streams, so one process can keep many users busy. Logins are
+subject to LOGIN_CONCURRENCY like any other client, so with many users from
+one address the token endpoint shows queueing (and 429s) by design.
+Queries per request are read from the Server-Timing header.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+# (name, weight): how often each request is picked after logging in.
+SCENARIO = [
+    ("course list", 30),
+    ("course detail", 25),
+    ("rate", 15),
+    ("enroll", 10),
+    ("roster", 10),
+    ("token refresh", 5),
+    ("token obtain", 5),
+]
+
+# The query count api.metrics.MetricsMiddleware reports in Server-Timing.
+QUERIES_PATTERN = re.compile(r'db;[^,]*desc="(\d+) queries')
+
+
+class Connection:
+    """
+    A minimal keep-alive HTTP/1.1 client connection over asyncio streams.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        """
+        Send one request; returns (status, headers with lowercase names, body).
+        A keep-alive connection the server already closed is reopened once.
+        """
+        for attempt in range(2):
+            reused = self.writer is not None
+            if not reused:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await self._exchange(method, path, headers or {}, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if not reused or attempt:
+                    raise
+
+    async def _exchange(self, method, path, headers, body):
+        payload = b"" if body is None else body
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        lines.append(f"Content-Length: {len(payload)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunks.append(await self.reader.readexactly(size + 2))
+                if not size:
+                    break
+            content = b"".join(chunk[:-2] for chunk in chunks)
+        elif "content-length" in response_headers:
+            content = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            content = await self.reader.read()
+            response_headers["connection"] = "close"
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, content
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.queries = defaultdict(list)
+
+    def record(self, name, seconds, status, headers):
+        self.latencies[name].append(seconds)
+        if not 200 <= status < 300:
+            self.errors[name] += 1
+        queries = QUERIES_PATTERN.search(headers.get("server-timing", ""))
+        if queries:
+            self.queries[name].append(int(queries.group(1)))
+
+
+def percentile(values, share):
+    """
+    Nearest-rank percentile of `values` (share between 0 and 100).
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share / 100 * len(ordered)) - 1)]
+
+
+class SimulatedUser:
+    def __init__(self, base, stats, manifest, index, rng):
+        self.base = base
+        self.stats = stats
+        self.rng = rng
+        self.manifest = manifest
+        self.password = manifest["password"]
+        self.teacher = manifest["teachers"][index % len(manifest["teachers"])]
+        self.student_email = manifest["students"][index % len(manifest["students"])]
+        self.connection = Connection(base.hostname, base.port or 80)
+        self.tokens = {}
+
+    async def call(self, name, method, path, body=None, role=None):
+        headers = {"Accept": "application/json"}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(body).encode()
+        if role is not None:
+            headers["Authorization"] = f"Bearer {self.tokens[role]['access']}"
+        started = time.perf_counter()
+        status, response_headers, content = await self.connection.request(
+            method, f"/api/v1/{path}", headers, body
+        )
+        self.stats.record(name, time.perf_counter() - started, status, response_headers)
+        return status, content
+
+    async def login(self, role):
+        email = self.student_email if role == "student" else self.teacher["email"]
+        status, content = await self.call(
+            "token obtain", "POST", "user/token/", {"email": email, "password": self.password}
+        )
+        if status == 200:
+            self.tokens[role] = json.loads(content)
+        return status == 200
+
+    async def refresh(self):
+        status, content = await self.call(
+            "token refresh", "POST", "user/token/refresh/",
+            {"refresh": self.tokens["student"]["refresh"]},
+        )
+        if status == 200:
+            # Refresh tokens rotate: keep the new one for the next refresh.
+            self.tokens["student"].update(json.loads(content))
+
+    async def step(self, name):
+        courses = self.manifest["courses"]
+        if name == "course list":
+            await self.call(name, "GET", "courses/?page_size=20", role="student")
+        elif name == "course detail":
+            await self.call(name, "GET", f"courses/{self.rng.choice(courses)}/", role="student")
+        elif name == "rate":
+            await self.call(
+                name, "POST", f"courses/{self.rng.choice(courses)}/rate/",
+                {"rating": self.rng.randint(1, 5)}, role="student",
+            )
+        elif name == "enroll":
+            course_id = self.rng.choice(self.teacher["courses"] or courses)
+            await self.call(
+                name, "POST", f"courses/{course_id}/enroll/",
+                {"student_email": self.rng.choice(self.manifest["students"])}, role="teacher",
+            )
+        elif name == "roster":
+            await self.call(name, "GET", "teacher/students/", role="teacher")
+        elif name == "token refresh":
+            await self.refresh()
+        elif name == "token obtain":
+            await self.login("student")
+
+    async def run(self, deadline):
+        try:
+            for role in ("student", "teacher"):
+                while role not in self.tokens:
+                    if time.monotonic() >= deadline:
+                        return
+                    await self.login(role)
+            names = [name for name, _ in SCENARIO]
+            weights = [weight for _, weight in SCENARIO]
+            while time.monotonic() < deadline:
+                await self.step(self.rng.choices(names, weights)[0])
+        finally:
+            await self.connection.close()
+
+
+async def drive(url, manifest, users, duration, seed_value):
+    base = urlsplit(url)
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        SimulatedUser(base, stats, manifest, index, random.Random(seed_value + index)).run(deadline)
+        for index in range(users)
+    ))
+    return stats, time.perf_counter() - started
+
+
+def report(stats, elapsed):
+    """
+    One row per endpoint (plus a total): requests, errors, requests/sec,
+    latency percentiles in milliseconds and mean queries per request.
+    """
+    rows = []
+    names = [name for name, _ in SCENARIO if name in stats.latencies]
+    everything = [latency for name in names for latency in stats.latencies[name]]
+    all_queries = [count for name in names for count in stats.queries[name]]
+    for name, latencies, errors, queries in [
+        *((name, stats.latencies[name], stats.errors[name], stats.queries[name]) for name in names),
+        ("total", everything, sum(stats.errors.values()), all_queries),
+    ]:
+        if not latencies:
+            continue
+        rows.append({
+            "endpoint": name,
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "queries": sum(queries) / len(queries) if queries else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default="benchmark-manifest.json")
+    parser.add_argument("--users", type=int, default=16, help="Concurrent simulated users.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Also write the report rows to this file.")
+    args = parser.parse_args()
+
+    with open(args.manifest) as stream:
+        manifest = json.load(stream)
+    stats, elapsed = asyncio.run(drive(args.url, manifest, args.users, args.duration, args.seed))
+    rows = report(stats, elapsed)
+
+    print(f"{args.users} users for {elapsed:.1f}s against {args.url}")
+    print(
+        f"{'endpoint':16} {'requests':>9} {'errors':>7} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+    )
+    for row in rows:
+        queries = "-" if row["queries"] is None else f"{row['queries']:.1f}"
+        print(
+            f"{row['endpoint']:16} {row['requests']:9} {row['errors']:7} {row['rps']:8.1f} "
+            f"{row['p50_ms']:8.1f} {row['p95_ms']:8.1f} {row['p99_ms']:8.1f} {queries:>8}"
+        )
+    if args.json:
+        with open(args.json, "w") as stream:
+            json.dump({"users": args.users, "seconds": elapsed, "endpoints": rows}, stream, indent=2)
+
+
+if __name__ == "__main__":
+    main()
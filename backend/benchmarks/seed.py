@@ -0,0 +1,175 @@
+"""
+Seed the configured database with a reproducible benchmark dataset and
+write the manifest the load driver reads.
+
+Run from the backend directory, against the database the local server uses:
+
+    python -m benchmarks.seed --teachers 20 --courses 500 --students 5000 --reset
+
+Every row goes in through bulk_create() (so signals never fire) and the
+denormalized tables are rebuilt afterwards with the rebuild_* commands. All
+benchmark accounts have emails starting with "bench-" and share one
+password, so --reset can find and delete them.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import transaction  # noqa: E402
+
+from core.models import Course, CourseRating  # noqa: E402
+from userauths.importing import UserImporter  # noqa: E402
+from userauths.models import User  # noqa: E402
+from userauths.services import build_user  # noqa: E402
+
+EMAIL_PREFIX = "bench-"
+PASSWORD = "bench-password"
+
+REBUILD_COMMANDS = [
+    "rebuild_rating_aggregates",
+    "rebuild_teacher_roster",
+    "rebuild_course_rankings",
+    "rebuild_search_index",
+]
+
+WORDS = (
+    "algebra geometry calculus statistics physics chemistry biology history "
+    "literature philosophy economics programming databases networks design "
+    "music painting astronomy ecology psychology"
+).split()
+
+
+def create_users(emails, role, password_hash, batch_size):
+    users = []
+    for start in range(0, len(emails), batch_size):
+        batch = []
+        for email in emails[start:start + batch_size]:
+            # Hash once for everyone: build_user() would hash per user.
+            user = build_user(email, None, role=role)
+            user.password = password_hash
+            batch.append(user)
+        users += UserImporter.insert(batch)
+    return users
+
+
+def seed(teachers, courses, students, enrollments, rating_share, seed_value, batch_size):
+    """
+    Insert the dataset and return the manifest describing it.
+    """
+    rng = random.Random(seed_value)
+    password_hash = make_password(PASSWORD)
+
+    with transaction.atomic():
+        teacher_users = create_users(
+            [f"{EMAIL_PREFIX}teacher{index}@example.com" for index in range(teachers)],
+            "teacher", password_hash, batch_size,
+        )
+        student_users = create_users(
+            [f"{EMAIL_PREFIX}student{index}@example.com" for index in range(students)],
+            "student", password_hash, batch_size,
+        )
+
+        course_rows = Course.objects.bulk_create(
+            [
+                Course(
+                    title=" ".join(rng.sample(WORDS, 3)).title(),
+                    description=" ".join(rng.choices(WORDS, k=40)),
+                    teacher=teacher_users[index % teachers],
+                )
+                for index in range(courses)
+            ],
+            batch_size=batch_size,
+        )
+        course_ids = [course.id for course in course_rows]
+
+        Enrollment = Course.students.through
+        enrollment_rows = []
+        rating_rows = []
+        for student in student_users:
+            for course_id in rng.sample(course_ids, min(enrollments, len(course_ids))):
+                enrollment_rows.append(Enrollment(course_id=course_id, user_id=student.id))
+                if rng.random() < rating_share:
+                    rating_rows.append(CourseRating(
+                        course_id=course_id, user_id=student.id, rating=rng.randint(1, 5)
+                    ))
+        Enrollment.objects.bulk_create(enrollment_rows, batch_size=batch_size)
+        CourseRating.objects.bulk_create(rating_rows, batch_size=batch_size)
+
+    for command in REBUILD_COMMANDS:
+        call_command(command, stdout=io.StringIO())
+
+    courses_by_teacher = {teacher.id: [] for teacher in teacher_users}
+    for course in course_rows:
+        courses_by_teacher[course.teacher_id].append(course.id)
+    return {
+        "password": PASSWORD,
+        "teachers": [
+            {"email": teacher.email, "courses": courses_by_teacher[teacher.id]}
+            for teacher in teacher_users
+        ],
+        "students": [student.email for student in student_users],
+        "courses": course_ids,
+        "counts": {
+            "teachers": teachers,
+            "courses": courses,
+            "students": students,
+            "enrollments": len(enrollment_rows),
+            "ratings": len(rating_rows),
+        },
+    }
+
+
+def reset():
+    # Deleting the users cascades to their courses, enrollments and ratings.
+    deleted, _ = User.objects.filter(email__startswith=EMAIL_PREFIX).delete()
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--teachers", type=int, default=20)
+    parser.add_argument("--courses", type=int, default=500)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--enrollments", type=int, default=5, help="Courses per student.")
+    parser.add_argument(
+        "--rating-share", type=float, default=0.5, help="Share of enrollments that are rated."
+    )
+    parser.add_argument("--seed", type=int, default=1, help="Random seed; same seed, same data.")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--manifest", default="benchmark-manifest.json")
+    parser.add_argument(
+        "--reset", action="store_true", help="Delete an earlier benchmark dataset first."
+    )
+    args = parser.parse_args()
+
+    existing = User.objects.filter(email__startswith=EMAIL_PREFIX)
+    if args.reset:
+        print(f"Deleted {reset()} row(s) of an earlier dataset.")
+    elif existing.exists():
+        parser.error("A benchmark dataset already exists; pass --reset to replace it.")
+
+    started = time.perf_counter()
+    manifest = seed(
+        args.teachers, args.courses, args.students, args.enrollments,
+        args.rating_share, args.seed, args.batch_size,
+    )
+    with open(args.manifest, "w") as stream:
+        json.dump(manifest, stream)
+
+    counts = ", ".join(f"{count} {name}" for name, count in manifest["counts"].items())
+    print(f"Seeded {counts} in {time.perf_counter() - started:.1f}s; manifest in {args.manifest}.")
+
+
+if __name__ == "__main__":
+    main()
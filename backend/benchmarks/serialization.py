@@ -0,0 +1,144 @@
+"""
+Course list serialization: CourseSerializer against the values() fast path
+(api/readers.py), each rendered with JSONRenderer and FastJSONRenderer.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization --courses 1000 --students 20
+
+The courses, their teachers and enrolled students are inserted inside a
+transaction that is rolled back at the end, so any database will do. Every
+path renders all courses as one list (the page size plays no part), and
+each is timed from the first query to the rendered bytes. The best of
+--repeat runs is reported per 1,000 courses, split into building the data
+and rendering it, with the speedup over CourseSerializer + JSONRenderer.
+All four outputs are checked to be byte-identical first.
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import transaction  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.readers import course_rows, course_values  # noqa: E402
+from api.renderers import FastJSONRenderer, orjson  # noqa: E402
+from api.serializers import CourseSerializer  # noqa: E402
+from api.views import course_read_queryset  # noqa: E402
+from benchmarks.seed import EMAIL_PREFIX, WORDS, create_users  # noqa: E402
+from core.models import Course  # noqa: E402
+
+BUILDERS = {
+    "serializer": lambda ids: CourseSerializer(
+        course_read_queryset(None).filter(id__in=ids).order_by("id"), many=True
+    ).data,
+    "values()": lambda ids: course_rows(
+        list(course_values(Course.objects.filter(id__in=ids)).order_by("id"))
+    ),
+}
+RENDERERS = {"json": JSONRenderer(), "orjson": FastJSONRenderer()}
+
+
+def insert_courses(courses, students, seed_value):
+    """
+    Insert `courses` courses with `students` enrolled students each and
+    rating aggregates; returns their ids.
+    """
+    rng = random.Random(seed_value)
+    teachers = create_users(
+        [f"{EMAIL_PREFIX}serialization-teacher{index}@example.com" for index in range(20)],
+        "teacher", "!", 5000,
+    )
+    pool = create_users(
+        [
+            f"{EMAIL_PREFIX}serialization-student{index}@example.com"
+            for index in range(max(students * 5, 1))
+        ],
+        "student", "!", 5000,
+    )
+    rows = []
+    for index in range(courses):
+        counts = [rng.randint(0, 10) for _ in range(5)]
+        rows.append(Course(
+            title=" ".join(rng.sample(WORDS, 3)).title(),
+            description=" ".join(rng.choices(WORDS, k=40)),
+            teacher=teachers[index % len(teachers)],
+            rating_count=sum(counts),
+            rating_sum=sum(stars * count for stars, count in enumerate(counts, 1)),
+            **{f"rating_count_{stars}": count for stars, count in enumerate(counts, 1)},
+        ))
+    inserted = Course.objects.bulk_create(rows, batch_size=5000)
+    Enrollment = Course.students.through
+    Enrollment.objects.bulk_create(
+        [
+            Enrollment(course_id=course.id, user_id=student.id)
+            for course in inserted
+            for student in rng.sample(pool, min(students, len(pool)))
+        ],
+        batch_size=5000,
+    )
+    return [course.id for course in inserted]
+
+
+def measure(ids, builder, renderer, repeat):
+    """
+    Best (build seconds, render seconds) out of `repeat` runs, and the bytes.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = builder(ids)
+        built = time.perf_counter()
+        content = renderer.render(data)
+        timing = (built - started, time.perf_counter() - built)
+        if best is None or sum(timing) < sum(best):
+            best = timing
+    return best, content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=1000)
+    parser.add_argument("--students", type=int, default=20, help="Enrolled students per course.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path; the best is kept.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if orjson is None:
+        print("orjson is not installed: the orjson rows render with json.")
+
+    with transaction.atomic():
+        ids = insert_courses(args.courses, args.students, args.seed)
+        results = {}
+        for build_name, builder in BUILDERS.items():
+            for render_name, renderer in RENDERERS.items():
+                results[build_name, render_name] = measure(ids, builder, renderer, args.repeat)
+        transaction.set_rollback(True)
+
+    outputs = {content for _, content in results.values()}
+    if len(outputs) != 1:
+        raise SystemExit("The paths rendered different JSON.")
+
+    scale = 1000 / args.courses
+    baseline = sum(results["serializer", "json"][0])
+    print(
+        f"{args.courses} courses, {args.students} students each, "
+        f"{len(outputs.pop()) / 1024:.0f} KiB of JSON; ms per 1,000 courses:"
+    )
+    print(f"{'data':12} {'renderer':9} {'build':>8} {'render':>8} {'total':>8} {'speedup':>8}")
+    for (build_name, render_name), ((build, render), _) in results.items():
+        print(
+            f"{build_name:12} {render_name:9} {build * scale * 1000:8.1f} "
+            f"{render * scale * 1000:8.1f} {(build + render) * scale * 1000:8.1f} "
+            f"{baseline / (build + render):7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
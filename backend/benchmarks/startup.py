@@ -0,0 +1,231 @@
+"""
+Worker startup: the full settings profile against API_ONLY=1, and gunicorn's
+--preload against every worker loading the app itself.
+
+Run from the backend directory, against a migrated database:
+
+    python -m benchmarks.startup --runs 5 --workers 4
+
+Each run is a fresh interpreter per profile that loads the app the way
+backend/wsgi.py does (settings, apps, URLconf and views), then sends one
+authenticated GET /api/v1/courses/ through the WSGI handler in-process. It
+reports the load time, the first request's latency, the modules imported
+and the RSS after each; the median of --runs runs is printed.
+
+The preload comparison forks --workers workers the way gunicorn does: after
+loading the app (preload_app, see gunicorn.conf.py) or before. Once every
+worker has served its first request, their Pss (their share of the pages
+they map) and their private memory are read from /proc/<pid>/smaps_rollup,
+so it needs Linux. Only the standard library is imported by this process;
+Django is only loaded in the children.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROFILES = {"full": "0", "api-only": "1"}
+FIRST_REQUEST = "/api/v1/courses/"
+
+
+def memory(pid="self"):
+    """
+    {field: kB} of the /proc status and smaps_rollup fields we report.
+    """
+    fields = {}
+    for name in ("status", "smaps_rollup"):
+        try:
+            lines = open(f"/proc/{pid}/{name}").read().splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "Pss", "Private_Clean", "Private_Dirty"):
+                fields[key] = int(value.split()[0])
+    return fields
+
+
+def load_app():
+    import backend.wsgi
+
+    return backend.wsgi.application
+
+
+def bearer_token():
+    # An access token for a user who is never saved: with AUTH_USER_CACHE
+    # set (see run_child), ClaimsJWTAuthentication builds the user from the
+    # claims, so nothing is written to the database.
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from userauths.models import User
+
+    user = User(id=1, email="startup@example.com", username="startup", full_name="Startup")
+    token = AccessToken.for_user(user)
+    for claim in ("full_name", "email", "username", "role", "is_staff"):
+        token[claim] = getattr(user, claim)
+    return str(token)
+
+
+def request(application, token):
+    """
+    Seconds taken by GET FIRST_REQUEST through `application`.
+    """
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": FIRST_REQUEST,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "localhost",
+        "HTTP_AUTHORIZATION": f"Bearer {token}",
+        "wsgi.input": sys.stdin.buffer,
+        "wsgi.url_scheme": "http",
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    statuses = []
+    started = time.perf_counter()
+    body = b"".join(application(environ, lambda status, headers: statuses.append(status)))
+    elapsed = time.perf_counter() - started
+    if not statuses[0].startswith("200"):
+        raise SystemExit(f"GET {FIRST_REQUEST}: {statuses[0]} {body[:200]!r}")
+    return elapsed
+
+
+def measure_startup():
+    modules = len(sys.modules)
+    started = time.perf_counter()
+    application = load_app()
+    loaded = time.perf_counter() - started
+    after_load = memory()["VmRSS"]
+    first_request = request(application, bearer_token())
+    return {
+        "load_ms": loaded * 1000,
+        "first_request_ms": first_request * 1000,
+        "modules": len(sys.modules) - modules,
+        "rss_loaded_kb": after_load,
+        "rss_served_kb": memory()["VmRSS"],
+    }
+
+
+def measure_workers(workers, preload):
+    """
+    Memory of `workers` forked workers, each after its first request.
+    """
+    if preload:
+        import gc
+
+        from django.db import connections
+
+        load_app()
+        connections.close_all()
+        gc.freeze()
+
+    pids = []
+    ready_read, ready_write = os.pipe()
+    go_read, go_write = os.pipe()
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            os.close(go_write)
+            request(load_app(), bearer_token())
+            os.write(ready_write, b".")
+            os.read(go_read, 1)  # stay alive until the master has measured us
+            os._exit(0)
+        pids.append(pid)
+    os.close(ready_write)
+    os.close(go_read)
+
+    for _ in range(workers):
+        if not os.read(ready_read, 1):
+            raise SystemExit("A worker died before serving its first request.")
+    readings = [memory(pid) for pid in pids]
+    os.close(go_write)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    if not all("Pss" in reading for reading in readings):
+        return None
+    return {
+        "rss_kb": statistics.mean(reading["VmRSS"] for reading in readings),
+        "pss_kb": statistics.mean(reading["Pss"] for reading in readings),
+        "private_kb": statistics.mean(
+            reading["Private_Clean"] + reading["Private_Dirty"] for reading in readings
+        ),
+    }
+
+
+def child(args):
+    if args.workers:
+        result = measure_workers(args.workers, args.preload)
+    else:
+        result = measure_startup()
+    print(json.dumps(result))
+
+
+def run_child(profile, *arguments):
+    environment = dict(os.environ, API_ONLY=PROFILES[profile])
+    environment.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    environment.setdefault("AUTH_USER_CACHE", "default")
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", *arguments],
+        env=environment, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def median(results, key):
+    return statistics.median(result[key] for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per profile.")
+    parser.add_argument("--workers", type=int, default=4, help="Workers to fork; 0 skips it.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--preload", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    print(f"Loading the app and serving GET {FIRST_REQUEST}, median of {args.runs} runs:")
+    print(
+        f"{'profile':9} {'load ms':>8} {'1st req ms':>10} {'modules':>8} "
+        f"{'RSS loaded':>11} {'RSS served':>11}"
+    )
+    for profile in PROFILES:
+        results = [run_child(profile, "--workers", "0") for _ in range(args.runs)]
+        print(
+            f"{profile:9} {median(results, 'load_ms'):8.1f} "
+            f"{median(results, 'first_request_ms'):10.1f} {median(results, 'modules'):8.0f} "
+            f"{median(results, 'rss_loaded_kb') / 1024:8.1f} MB "
+            f"{median(results, 'rss_served_kb') / 1024:8.1f} MB"
+        )
+
+    if not args.workers:
+        return
+    print(f"\nMemory per worker of {args.workers} forked workers, after one request each:")
+    print(f"{'profile':9} {'preload':8} {'RSS':>9} {'Pss':>9} {'private':>9}")
+    for profile in PROFILES:
+        for preload in (False, True):
+            flags = ["--workers", str(args.workers)] + (["--preload"] if preload else [])
+            result = run_child(profile, *flags)
+            if result is None:
+                print("/proc/<pid>/smaps_rollup is not readable here; skipping.")
+                return
+            print(
+                f"{profile:9} {'yes' if preload else 'no':8} "
+                f"{result['rss_kb'] / 1024:6.1f} MB {result['pss_kb'] / 1024:6.1f} MB "
+                f"{result['private_kb'] / 1024:6.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Rating breakdowns computed in the database.
+
+A summary comes from a single GROUP BY query over the ratings in scope:
+one row per week (truncated in the current time zone) carrying the week's
+count, sum and count per star through conditional aggregation. The overall
+histogram, mean and median are then folded from those rows in Python, so
+no rating is ever loaded individually.
+"""
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncWeek
+
+from core.models import RATING_CHOICES
+
+
+def histogram_median(histogram):
+    """
+    Median of the ratings counted in `histogram` ({stars: count}), the mean
+    of the two middle ratings when there is an even number of them.
+    """
+    count = sum(histogram.values())
+    if not count:
+        return None
+
+    def nth(position):
+        seen = 0
+        for stars in sorted(histogram):
+            seen += histogram[stars]
+            if seen > position:
+                return stars
+
+    return (nth((count - 1) // 2) + nth(count // 2)) / 2
+
+
+def rating_summary(ratings):
+    """
+    Breakdown of the CourseRating queryset `ratings`: count, mean, median,
+    count per star and ratings per week (Monday first, oldest week first).
+    """
+    rows = (
+        ratings.order_by()
+        .annotate(week=TruncWeek("created_at", output_field=DateField()))
+        .values("week")
+        .annotate(
+            count=Count("id"),
+            total=Sum("rating"),
+            **{f"stars_{stars}": Count("id", filter=Q(rating=stars)) for stars in RATING_CHOICES},
+        )
+        .order_by("week")
+    )
+
+    count = total = 0
+    histogram = {stars: 0 for stars in RATING_CHOICES}
+    weekly = []
+    for row in rows:
+        count += row["count"]
+        total += row["total"]
+        for stars in RATING_CHOICES:
+            histogram[stars] += row[f"stars_{stars}"]
+        weekly.append({
+            "week": row["week"],
+            "count": row["count"],
+            "mean": round(row["total"] / row["count"], 2),
+        })
+
+    return {
+        "count": count,
+        "mean": round(total / count, 2) if count else None,
+        "median": histogram_median(histogram),
+        "histogram": histogram,
+        "weekly": weekly,
+    }
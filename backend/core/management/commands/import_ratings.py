@@ -0,0 +1,48 @@
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ratings import RatingImporter, iter_rating_rows
+from userauths.importing import open_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Import ratings from a CSV or JSONL file (or '-' for stdin) with the "
+        "columns course, user_email and rating, upserting them in batches. "
+        "Re-running the same file changes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or '-' to read stdin.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format. Defaults to the file extension.",
+        )
+        parser.add_argument("--batch-size", type=int, default=settings.RATING_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"]
+        if file_format is None:
+            if path.endswith(".csv"):
+                file_format = "csv"
+            elif path.endswith((".jsonl", ".ndjson")):
+                file_format = "jsonl"
+            else:
+                raise CommandError("Cannot tell the format from the file name; pass --format.")
+
+        importer = RatingImporter(batch_size=options["batch_size"])
+        try:
+            if path == "-":
+                report = importer.run(iter_rating_rows(open_text(sys.stdin.buffer), file_format))
+            else:
+                with open(path, "rb") as stream:
+                    report = importer.run(iter_rating_rows(open_text(stream), file_format))
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from api.cache import bump_versions
+from core.models import (
+    Course, CourseRanking, CourseRating, bayesian_average, rating_trend, refresh_rating_prior,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the course leaderboards: refresh the site-wide rating mean, "
+        "every top score and the rating part of every trending score. Meant to "
+        "run periodically (e.g. hourly from cron) to correct drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rankings written per query.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        with transaction.atomic():
+            trending = defaultdict(float)
+            for course_id, rating, created_at in CourseRating.objects.values_list(
+                "course_id", "rating", "created_at"
+            ).iterator():
+                trending[course_id] += rating_trend(rating, created_at)
+
+            mean = refresh_rating_prior()
+            CourseRanking.objects.bulk_create(
+                (
+                    CourseRanking(course_id=course_id)
+                    for course_id in Course.objects.filter(rating_count__gt=0)
+                    .values_list("id", flat=True)
+                    .iterator()
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            ranked = CourseRanking.objects.update(
+                top_score=Subquery(
+                    Course.objects.filter(pk=OuterRef("course_id"))
+                    .annotate(score=bayesian_average())
+                    .values("score")
+                ),
+                trending_ratings=0,
+            )
+            CourseRanking.objects.bulk_update(
+                [
+                    CourseRanking(course_id=course_id, trending_ratings=score)
+                    for course_id, score in trending.items()
+                ],
+                ["trending_ratings"],
+                batch_size=batch_size,
+            )
+            CourseRanking.objects.update(
+                trending_score=F("trending_ratings") + F("trending_enrollments")
+            )
+            # /courses/top/ and /courses/trending/ are cached under "courses".
+            transaction.on_commit(lambda: bump_versions("courses"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ranked {ranked} course(s) against a mean rating of {mean:.2f}."
+        ))
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from api.cache import bump_versions
+from core.models import Course, RATING_AGGREGATE_FIELDS, RATING_CHOICES
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized rating aggregates on Course from "
+        "CourseRating and report every course that had drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift, do not write the corrected values.",
+        )
+
+    def handle(self, *args, **options):
+        courses = (
+            Course.objects.annotate(
+                actual_rating_count=Count("ratings"),
+                actual_rating_sum=Sum("ratings__rating", default=0),
+                **{
+                    f"actual_rating_count_{stars}": Count(
+                        "ratings", filter=Q(ratings__rating=stars)
+                    )
+                    for stars in RATING_CHOICES
+                },
+            )
+            .only("id", "title", *RATING_AGGREGATE_FIELDS)
+            .order_by("id")
+        )
+
+        drifted = 0
+        rebuilt = []
+        with transaction.atomic():
+            for course in courses.iterator():
+                actual = {
+                    field: getattr(course, f"actual_{field}")
+                    for field in RATING_AGGREGATE_FIELDS
+                }
+                stored = {field: getattr(course, field) for field in RATING_AGGREGATE_FIELDS}
+                if actual == stored:
+                    continue
+
+                drifted += 1
+                changes = ", ".join(
+                    f"{field} {stored[field]} -> {actual[field]}"
+                    for field in RATING_AGGREGATE_FIELDS
+                    if stored[field] != actual[field]
+                )
+                self.stdout.write(f"Course {course.id} ({course.title}): {changes}")
+
+                if not options["dry_run"]:
+                    Course.objects.filter(pk=course.pk).update(**actual)
+                    rebuilt.append(course.pk)
+
+            if rebuilt:
+                # The course responses rendered the drifted values.
+                transaction.on_commit(lambda: bump_versions(
+                    "courses", *(f"course:{course_id}" for course_id in rebuilt)
+                ))
+
+        if drifted == 0:
+            self.stdout.write(self.style.SUCCESS("All rating aggregates are up to date."))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{drifted} course(s) have drifted."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates for {drifted} course(s)."))
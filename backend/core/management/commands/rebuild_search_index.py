@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the course full-text search index from the courses table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recreate",
+            action="store_true",
+            help="Drop and recreate the index table first (e.g. after changing its definition).",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options["recreate"]:
+                search.drop_index()
+                search.create_index()
+            indexed = search.rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} course(s)."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.models import Course, TeacherRoster
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized teacher -> students roster from course enrollments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of roster rows inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        rows = (
+            Course.students.through.objects.filter(course__teacher__isnull=False)
+            .values("course__teacher_id", "user_id")
+            .annotate(course_count=Count("id"))
+            .order_by()
+        )
+
+        # No cache versions to bump: /teacher/students/ reads the roster on
+        # every request rather than through api.cache.cached_response.
+        with transaction.atomic():
+            deleted, _ = TeacherRoster.objects.all().delete()
+            roster = TeacherRoster.objects.bulk_create(
+                (
+                    TeacherRoster(
+                        teacher_id=row["course__teacher_id"],
+                        student_id=row["user_id"],
+                        course_count=row["course_count"],
+                    )
+                    for row in rows.iterator()
+                ),
+                batch_size=options["batch_size"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt teacher roster: removed {deleted} row(s), inserted {len(roster)} row(s)."
+        ))
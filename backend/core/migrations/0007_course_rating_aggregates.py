@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:47
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Course = apps.get_model("core", "Course")
+    courses = Course.objects.annotate(
+        _count=Count("ratings"),
+        _sum=Sum("ratings__rating", default=0),
+        **{
+            f"_count_{stars}": Count("ratings", filter=Q(ratings__rating=stars))
+            for stars in range(1, 6)
+        },
+    ).filter(_count__gt=0)
+    for course in courses:
+        Course.objects.filter(pk=course.pk).update(
+            rating_count=course._count,
+            rating_sum=course._sum,
+            **{
+                f"rating_count_{stars}": getattr(course, f"_count_{stars}")
+                for stars in range(1, 6)
+            },
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_courserating_delete_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:49
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_teacher_roster(apps, schema_editor):
+    Course = apps.get_model("core", "Course")
+    TeacherRoster = apps.get_model("core", "TeacherRoster")
+    rows = (
+        Course.students.through.objects.filter(course__teacher__isnull=False)
+        .values("course__teacher_id", "user_id")
+        .annotate(course_count=Count("id"))
+    )
+    TeacherRoster.objects.bulk_create(
+        [
+            TeacherRoster(
+                teacher_id=row["course__teacher_id"],
+                student_id=row["user_id"],
+                course_count=row["course_count"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0007_course_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherRoster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_count', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='teacher_rosters', to=settings.AUTH_USER_MODEL)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roster', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('teacher', 'student')},
+            },
+        ),
+        migrations.RunPython(backfill_teacher_roster, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:08
+
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# core.models.rating_trend() as of this migration, copied so that later
+# changes to it leave the backfill alone.
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def rating_trend(rating, moment):
+    half_life = getattr(settings, "TRENDING_HALF_LIFE_DAYS", 7) * 86400
+    weight = math.exp(math.log(2) * (moment - TRENDING_EPOCH).total_seconds() / half_life)
+    return int(rating) / 5 * weight
+
+
+def backfill_course_rankings(apps, schema_editor):
+    Course = apps.get_model("core", "Course")
+    CourseRating = apps.get_model("core", "CourseRating")
+    CourseRanking = apps.get_model("core", "CourseRanking")
+
+    totals = Course.objects.aggregate(count=models.Sum("rating_count"), total=models.Sum("rating_sum"))
+    weight = float(getattr(settings, "RANKING_PRIOR_WEIGHT", 10))
+    mean = (weight * 3 + (totals["total"] or 0)) / (weight + (totals["count"] or 0))
+
+    trending = defaultdict(float)
+    for course_id, rating, created_at in CourseRating.objects.values_list(
+        "course_id", "rating", "created_at"
+    ).iterator():
+        trending[course_id] += rating_trend(rating, created_at)
+
+    CourseRanking.objects.bulk_create(
+        [
+            CourseRanking(
+                course_id=course_id,
+                top_score=(weight * mean + rating_sum) / (weight + rating_count),
+                trending_ratings=trending[course_id],
+                trending_score=trending[course_id],
+            )
+            for course_id, rating_count, rating_sum in Course.objects.filter(
+                rating_count__gt=0
+            ).values_list("id", "rating_count", "rating_sum").iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_course_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRanking',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='core.course')),
+                ('top_score', models.FloatField(null=True)),
+                ('trending_ratings', models.FloatField(default=0)),
+                ('trending_enrollments', models.FloatField(default=0)),
+                ('trending_score', models.FloatField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['top_score', 'course'], name='ranking_top_idx'), models.Index(fields=['trending_score', 'course'], name='ranking_trending_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_course_rankings, migrations.RunPython.noop),
+    ]
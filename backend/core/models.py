@@ -1,7 +1,35 @@
+import math
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.utils import timezone
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from userauths.models import User
 from django.conf import settings
 
+from core import search
+
+
+RATING_CHOICES = range(1, 6)
+
+# Denormalized per-course rating aggregates. They are only ever written with
+# F() expressions (see the CourseRating signal handlers below) or by the
+# ``rebuild_rating_aggregates`` management command.
+RATING_AGGREGATE_FIELDS = ("rating_count", "rating_sum") + tuple(
+    f"rating_count_{stars}" for stars in RATING_CHOICES
+)
+
+
+def average_rating(rating_sum, rating_count):
+    """
+    The mean rating from a course's rating aggregates; 0 when unrated.
+    """
+    if rating_count:
+        return rating_sum / rating_count
+    return 0
 
 
 class Course(models.Model):
@@ -21,14 +49,49 @@ class Course(models.Model):
         User, related_name="enrolled_courses", blank=True
     )
 
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_count_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # A teacher's courses, newest or oldest first
+            models.Index(fields=["teacher", "created_at"], name="course_teacher_created_idx"),
+            # Keyset pagination of /courses/
+            models.Index(fields=["created_at", "id"], name="course_created_id_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Never write the rating aggregates back from a (possibly stale)
+        # in-memory instance; concurrent ratings would be lost.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RATING_AGGREGATE_FIELDS
+            ]
+        super(Course, self).save(*args, **kwargs)
+
     def get_average_rating(self):
-        ratings = self.ratings.all()  # Use the related_name 'ratings' from the CourseRating model
-        if ratings.exists():
-            return sum(rating.rating for rating in ratings) / ratings.count()
-        return 0
+        return average_rating(self.rating_sum, self.rating_count)
+
+    @property
+    def rating_histogram(self):
+        return {stars: getattr(self, f"rating_count_{stars}") for stars in RATING_CHOICES}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored teacher so post_save can move the roster.
+        instance._loaded_teacher_id = instance.__dict__.get("teacher_id")
+        return instance
 
 class CourseRating(models.Model):
     course = models.ForeignKey('core.Course', on_delete=models.CASCADE, related_name='ratings')
@@ -38,6 +101,396 @@ class CourseRating(models.Model):
 
     class Meta:
         unique_together = ('course', 'user')  # Ensure a user can only rate a course once
+        indexes = [
+            # A course's ratings in the order they were given
+            models.Index(fields=["course", "created_at"], name="rating_course_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} rated {self.course.title} with {self.rating} stars"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what is stored so post_save can apply the difference.
+        instance._loaded_rating = (instance.__dict__.get("course_id"), instance.__dict__.get("rating"))
+        return instance
+
+
+class TeacherRoster(models.Model):
+    """
+    Materialized teacher -> student roster: one row per student enrolled in
+    at least one of the teacher's courses, with the number of such courses.
+    Kept current by the Course signal handlers below and rebuilt from scratch
+    by the ``rebuild_teacher_roster`` management command.
+    """
+    teacher = models.ForeignKey(User, on_delete=models.CASCADE, related_name="roster")
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="teacher_rosters")
+    course_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('teacher', 'student')
+
+    def __str__(self):
+        return f"{self.student_id} in {self.course_count} course(s) of {self.teacher_id}"
+
+
+class CourseRanking(models.Model):
+    """
+    Precomputed leaderboard scores for every course with rating or
+    enrollment activity, so /courses/top/ and /courses/trending/ read one
+    index-ordered page. Kept current by the CourseRating and enrollment
+    signal handlers below and recomputed by the ``rebuild_course_rankings``
+    management command.
+
+    `top_score` is the Bayesian average rating (NULL while unrated). The
+    trending columns sum exponentially decaying contributions measured
+    against TRENDING_EPOCH, so their order never changes just because time
+    passes; trending_now() converts them to the score at a given moment.
+    Enrollment times are not stored anywhere else, so only the rating part
+    can be recomputed. The weights double every half-life, which floats
+    hold for ~1000 half-lives (about 19 years at 7 days); moving the epoch
+    forward means multiplying the trending columns by the weight of the new
+    epoch.
+    """
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, primary_key=True, related_name="ranking"
+    )
+    top_score = models.FloatField(null=True)
+    trending_ratings = models.FloatField(default=0)
+    trending_enrollments = models.FloatField(default=0)
+    trending_score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["top_score", "course"], name="ranking_top_idx"),
+            models.Index(fields=["trending_score", "course"], name="ranking_trending_idx"),
+        ]
 
     def __str__(self):
-        return f"{self.user.email} rated {self.course.title} with {self.rating} stars"
\ No newline at end of file
+        return f"Ranking of course {self.course_id}"
+
+
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+RATING_PRIOR_CACHE_KEY = "core:rating-prior-mean"
+
+
+def trending_weight(moment):
+    """
+    Weight of an event at `moment` relative to TRENDING_EPOCH: it doubles
+    every TRENDING_HALF_LIFE_DAYS, which ranks exactly like halving every
+    older event's weight.
+    """
+    half_life = getattr(settings, "TRENDING_HALF_LIFE_DAYS", 7) * 86400
+    return math.exp(math.log(2) * (moment - TRENDING_EPOCH).total_seconds() / half_life)
+
+
+def trending_now(score, now=None):
+    return score / trending_weight(now or timezone.now())
+
+
+def rating_trend(rating, moment):
+    # A five-star rating counts as one unit of trend, a one-star as a fifth.
+    return int(rating) / max(RATING_CHOICES) * trending_weight(moment)
+
+
+def ranking_prior_weight():
+    return float(getattr(settings, "RANKING_PRIOR_WEIGHT", 10))
+
+
+def refresh_rating_prior():
+    """
+    Site-wide mean rating, itself pulled toward the middle of the scale
+    while there are few ratings, so the first one does not set the prior.
+    """
+    totals = Course.objects.aggregate(count=Sum("rating_count"), total=Sum("rating_sum"))
+    weight = ranking_prior_weight()
+    middle = (min(RATING_CHOICES) + max(RATING_CHOICES)) / 2
+    mean = (weight * middle + (totals["total"] or 0)) / (weight + (totals["count"] or 0))
+    cache.set(RATING_PRIOR_CACHE_KEY, mean, 3600)
+    return mean
+
+
+def bayesian_average():
+    """
+    Course's average rating blended with RANKING_PRIOR_WEIGHT ratings at the
+    site-wide mean, so a single five-star rating does not top the chart.
+    The mean is cached for an hour and refreshed by rebuild_course_rankings.
+    """
+    mean = cache.get(RATING_PRIOR_CACHE_KEY)
+    if mean is None:
+        mean = refresh_rating_prior()
+    weight = ranking_prior_weight()
+    return Case(
+        When(rating_count=0, then=None),
+        default=(Value(weight * mean) + F("rating_sum")) / (Value(weight) + F("rating_count")),
+        output_field=FloatField(),
+    )
+
+
+def update_ranking(course_id, rescore=False, ratings=0.0, enrollments=0.0, create=True):
+    """
+    Apply trending deltas to a course's ranking and optionally recompute its
+    top score, in one UPDATE. The row is only created for `create=True`, so
+    removals during a course delete do not resurrect it.
+    """
+    changes = {}
+    if rescore:
+        changes["top_score"] = Subquery(
+            Course.objects.filter(pk=OuterRef("course_id"))
+            .annotate(score=bayesian_average())
+            .values("score")
+        )
+    if ratings:
+        changes["trending_ratings"] = F("trending_ratings") + ratings
+    if enrollments:
+        changes["trending_enrollments"] = F("trending_enrollments") + enrollments
+    if ratings or enrollments:
+        changes["trending_score"] = F("trending_score") + (ratings + enrollments)
+    if not changes:
+        return
+
+    rankings = CourseRanking.objects.filter(course_id=course_id)
+    if not rankings.update(**changes) and create:
+        CourseRanking.objects.bulk_create([CourseRanking(course_id=course_id)], ignore_conflicts=True)
+        rankings.update(**changes)
+
+
+def rating_delta(rating, sign):
+    """
+    F() updates that add (sign=1) or remove (sign=-1) one rating from a
+    course's aggregates.
+    """
+    rating = int(rating)
+    delta = {
+        "rating_count": F("rating_count") + sign,
+        "rating_sum": F("rating_sum") + sign * rating,
+    }
+    if rating in RATING_CHOICES:
+        delta[f"rating_count_{rating}"] = F(f"rating_count_{rating}") + sign
+    return delta
+
+
+def deleted_with_course(origin):
+    # The course's aggregates and ranking go with it.
+    if isinstance(origin, models.QuerySet):
+        return origin.model is Course
+    return isinstance(origin, Course)
+
+
+def remember_stored_rating(sender, instance, raw=False, origin=None, **kwargs):
+    """
+    Make sure `instance._loaded_rating` holds the stored (course_id, rating)
+    before it is saved or deleted, reading it from the database for an
+    instance that was not loaded with both, e.g. CourseRating(pk=...) or one
+    from .only()/.defer(). Deferred fields the signal handlers read are
+    filled in too: once deleted, the row cannot be read any more.
+    """
+    if raw or instance.pk is None or deleted_with_course(origin):
+        return
+    fields = ("course_id", "rating", "created_at")
+    deferred = [field for field in fields if field not in instance.__dict__]
+    course_id, rating = getattr(instance, "_loaded_rating", (None, None))
+    if course_id is None or rating is None or deferred:
+        stored = CourseRating.objects.filter(pk=instance.pk).values(*fields).first()
+        if stored is None:
+            instance._loaded_rating = (None, None)
+            return
+        instance._loaded_rating = (stored["course_id"], stored["rating"])
+        for field in deferred:
+            setattr(instance, field, stored[field])
+
+
+def update_rating_aggregates(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    old_course_id, old_rating = getattr(instance, "_loaded_rating", (None, None))
+    new_rating = int(instance.rating)
+
+    if created:
+        Course.objects.filter(pk=instance.course_id).update(**rating_delta(new_rating, 1))
+        update_ranking(
+            instance.course_id, rescore=True, ratings=rating_trend(new_rating, instance.created_at)
+        )
+    elif old_rating is None:
+        pass  # the row was deleted between remember_stored_rating() and the UPDATE
+    elif old_course_id != instance.course_id:
+        Course.objects.filter(pk=old_course_id).update(**rating_delta(old_rating, -1))
+        Course.objects.filter(pk=instance.course_id).update(**rating_delta(new_rating, 1))
+        update_ranking(
+            old_course_id, rescore=True, ratings=-rating_trend(old_rating, instance.created_at),
+            create=False,
+        )
+        update_ranking(
+            instance.course_id, rescore=True, ratings=rating_trend(new_rating, instance.created_at)
+        )
+    elif int(old_rating) != new_rating:
+        old_rating = int(old_rating)
+        delta = {"rating_sum": F("rating_sum") + (new_rating - old_rating)}
+        if old_rating in RATING_CHOICES:
+            delta[f"rating_count_{old_rating}"] = F(f"rating_count_{old_rating}") - 1
+        if new_rating in RATING_CHOICES:
+            delta[f"rating_count_{new_rating}"] = F(f"rating_count_{new_rating}") + 1
+        Course.objects.filter(pk=instance.course_id).update(**delta)
+        update_ranking(
+            instance.course_id, rescore=True,
+            ratings=rating_trend(new_rating, instance.created_at)
+            - rating_trend(old_rating, instance.created_at),
+        )
+
+    instance._loaded_rating = (instance.course_id, new_rating)
+
+
+def remove_rating_aggregates(sender, instance, origin=None, **kwargs):
+    if deleted_with_course(origin):
+        return
+    old_course_id, old_rating = getattr(instance, "_loaded_rating", (None, None))
+    if old_rating is None:
+        return  # it was never stored
+    Course.objects.filter(pk=old_course_id).update(**rating_delta(old_rating, -1))
+    update_ranking(
+        old_course_id, rescore=True, ratings=-rating_trend(old_rating, instance.created_at),
+        create=False,
+    )
+
+
+def adjust_roster(pairs, sign):
+    """
+    Add (sign=1) or remove (sign=-1) enrollments from the roster.
+    `pairs` counts enrollments per (teacher_id, student_id).
+    """
+    by_amount = {}
+    for (teacher_id, student_id), amount in pairs.items():
+        if teacher_id is not None and amount:
+            by_amount.setdefault((teacher_id, amount), []).append(student_id)
+
+    if sign > 0:
+        TeacherRoster.objects.bulk_create(
+            [TeacherRoster(teacher_id=teacher_id, student_id=student_id)
+             for teacher_id, student_id in pairs if teacher_id is not None],
+            ignore_conflicts=True,
+        )
+    for (teacher_id, amount), student_ids in by_amount.items():
+        TeacherRoster.objects.filter(
+            teacher_id=teacher_id, student_id__in=student_ids
+        ).update(course_count=F("course_count") + sign * amount)
+    if sign < 0:
+        for teacher_id in {teacher_id for teacher_id, _ in by_amount}:
+            TeacherRoster.objects.filter(teacher_id=teacher_id, course_count__lte=0).delete()
+
+
+def course_enrollment_pairs(course_ids, student_id=None):
+    """
+    Count (teacher_id, student_id) enrollments for the given courses,
+    optionally restricted to a single student.
+    """
+    enrollments = Course.students.through.objects.filter(course_id__in=course_ids)
+    if student_id is not None:
+        enrollments = enrollments.filter(user_id=student_id)
+    return Counter(enrollments.values_list("course__teacher_id", "user_id"))
+
+
+def update_roster_on_enrollment(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action == "pre_clear":
+        # The cleared rows are gone by post_clear, so record them now.
+        if reverse:
+            instance._roster_cleared = course_enrollment_pairs(
+                instance.enrolled_courses.values("id"), student_id=instance.id
+            )
+        else:
+            instance._roster_cleared = course_enrollment_pairs([instance.id])
+        return
+    if action == "post_clear":
+        adjust_roster(getattr(instance, "_roster_cleared", Counter()), -1)
+        instance._roster_cleared = Counter()
+        return
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    if reverse:
+        teacher_ids = Course.objects.filter(pk__in=pk_set).values_list("teacher_id", flat=True)
+        pairs = Counter((teacher_id, instance.id) for teacher_id in teacher_ids)
+    else:
+        pairs = Counter((instance.teacher_id, student_id) for student_id in pk_set)
+    adjust_roster(pairs, 1 if action == "post_add" else -1)
+
+
+def update_ranking_on_enrollment(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        if reverse:
+            instance._ranking_cleared = Counter(instance.enrolled_courses.values_list("id", flat=True))
+        else:
+            instance._ranking_cleared = Counter({instance.pk: instance.students.count()})
+        return
+    if action == "post_clear":
+        counts, sign = getattr(instance, "_ranking_cleared", Counter()), -1
+        instance._ranking_cleared = Counter()
+    elif action in ("post_add", "post_remove") and pk_set:
+        counts = Counter(pk_set) if reverse else Counter({instance.pk: len(pk_set)})
+        sign = 1 if action == "post_add" else -1
+    else:
+        return
+
+    weight = getattr(settings, "TRENDING_ENROLLMENT_WEIGHT", 0.5) * trending_weight(timezone.now())
+    for course_id, count in counts.items():
+        if count:
+            update_ranking(course_id, enrollments=sign * count * weight, create=sign > 0)
+
+
+def update_roster_on_teacher_change(sender, instance, created, raw=False, **kwargs):
+    old_teacher_id = getattr(instance, "_loaded_teacher_id", instance.teacher_id)
+    instance._loaded_teacher_id = instance.teacher_id
+    if raw or created or old_teacher_id == instance.teacher_id:
+        return
+
+    student_ids = list(instance.students.values_list("id", flat=True))
+    adjust_roster(Counter((old_teacher_id, student_id) for student_id in student_ids), -1)
+    adjust_roster(Counter((instance.teacher_id, student_id) for student_id in student_ids), 1)
+
+
+def remove_roster_on_course_delete(sender, instance, **kwargs):
+    # Deleting a course removes its enrollments without m2m_changed.
+    adjust_roster(course_enrollment_pairs([instance.pk]), -1)
+
+
+# Course fields copied into the search index (see core.search)
+SEARCH_INDEXED_FIELDS = {"title", "description", "teacher", "teacher_id"}
+
+
+def index_course(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not SEARCH_INDEXED_FIELDS & set(update_fields)):
+        return
+    search.index_courses([instance.pk])
+
+
+def unindex_course(sender, instance, **kwargs):
+    search.unindex_courses([instance.pk])
+
+
+def note_teacher_rename(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Compared before userauths' post_save handler moves the loaded state on.
+    loaded = getattr(instance, "_loaded_profile_state", None)
+    instance._search_name_changed = not raw and (
+        loaded is None or loaded["full_name"] != instance.full_name
+    ) and (update_fields is None or "full_name" in update_fields)
+
+
+def reindex_teacher_name(sender, instance, created, **kwargs):
+    if not created and getattr(instance, "_search_name_changed", False):
+        search.rename_teacher(instance.pk, instance.full_name)
+    instance._search_name_changed = False
+
+
+pre_save.connect(remember_stored_rating, sender=CourseRating)
+post_save.connect(update_rating_aggregates, sender=CourseRating)
+pre_delete.connect(remember_stored_rating, sender=CourseRating)
+post_delete.connect(remove_rating_aggregates, sender=CourseRating)
+m2m_changed.connect(update_roster_on_enrollment, sender=Course.students.through)
+m2m_changed.connect(update_ranking_on_enrollment, sender=Course.students.through)
+post_save.connect(update_roster_on_teacher_change, sender=Course)
+pre_delete.connect(remove_roster_on_course_delete, sender=Course)
+post_save.connect(index_course, sender=Course)
+post_delete.connect(unindex_course, sender=Course)
+pre_save.connect(note_teacher_rename, sender=User)
+post_save.connect(reindex_teacher_name, sender=User)
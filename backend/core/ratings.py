@@ -0,0 +1,256 @@
+"""
+Bulk rating upserts (the bulk ratings endpoint, `manage.py import_ratings`
+and rate_course).
+
+A batch costs one lookup of its courses and users, an INSERT ... ON
+CONFLICT DO NOTHING RETURNING of all its ratings, a locked read of the ones
+that were already there and one UPDATE of those that changed. Whether a
+rating was created is decided by the INSERT itself, so two concurrent first
+submissions of the same rating can neither race into an IntegrityError nor
+both count as new. Raw SQL skips post_save, so the rating aggregates and
+rankings are updated here, one F() UPDATE per course, and
+`ratings_upserted` is sent for the response cache.
+"""
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+from core.models import (
+    Course, CourseRating, RATING_CHOICES, rating_trend, update_ranking,
+)
+from userauths.models import User
+
+# Sent after a batch is written, with the `course_ids` whose ratings changed.
+ratings_upserted = Signal()
+
+# Errors kept in an import report; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+def parse_rating(value):
+    """
+    The rating as an int, or None unless it is a whole number of stars.
+    """
+    try:
+        rating = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return rating if rating in RATING_CHOICES else None
+
+
+def parse_course_id(value):
+    """
+    The course id as an int, or None unless it is an int or a string of
+    digits (3.9 and true are not ids).
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        return int(value) if value.isascii() and value.isdigit() else None
+    return value if type(value) is int else None
+
+
+def is_rating_row(row):
+    # An object whose course and user_email, when given, have usable types.
+    return (
+        isinstance(row, dict)
+        and type(row.get("course")) in (int, str, type(None))
+        and type(row.get("user_email")) in (str, type(None))
+    )
+
+
+def apply_rating_changes(changes):
+    """
+    Fold (course_id, old_rating, new_rating, created_at) changes, old_rating
+    being None for a new rating, into the course aggregates and rankings.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    trends = defaultdict(float)
+    for course_id, old_rating, new_rating, created_at in changes:
+        delta = deltas[course_id]
+        if old_rating is None:
+            delta["rating_count"] += 1
+        else:
+            delta["rating_sum"] -= old_rating
+            delta[f"rating_count_{old_rating}"] -= 1
+            trends[course_id] -= rating_trend(old_rating, created_at)
+        delta["rating_sum"] += new_rating
+        delta[f"rating_count_{new_rating}"] += 1
+        trends[course_id] += rating_trend(new_rating, created_at)
+
+    for course_id, delta in deltas.items():
+        Course.objects.filter(pk=course_id).update(
+            **{field: F(field) + amount for field, amount in delta.items() if amount}
+        )
+        update_ranking(course_id, rescore=True, ratings=trends[course_id])
+
+
+def insert_new_ratings(ratings, created_at):
+    """
+    INSERT the {(course_id, user_id): rating} ratings, leaving the pairs that
+    already have one alone. Returns the pairs that were inserted.
+    """
+    quote = connection.ops.quote_name
+    columns = ["course_id", "user_id", "rating", "created_at"]
+    created_at = CourseRating._meta.get_field("created_at").get_db_prep_value(
+        created_at, connection
+    )
+    rows = [(course_id, user_id, rating, created_at) for (course_id, user_id), rating in ratings.items()]
+    batch_size = connection.ops.bulk_batch_size(columns, rows)
+
+    inserted = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.execute(
+                f"INSERT INTO {quote(CourseRating._meta.db_table)} "
+                f"({', '.join(map(quote, columns))}) VALUES "
+                + ", ".join(["(%s, %s, %s, %s)"] * len(batch))
+                + f" ON CONFLICT ({quote('course_id')}, {quote('user_id')}) DO NOTHING"
+                f" RETURNING {quote('course_id')}, {quote('user_id')}",
+                [value for row in batch for value in row],
+            )
+            inserted.update(map(tuple, cursor.fetchall()))
+    return inserted
+
+
+def upsert_ratings(entries):
+    """
+    Create or update ratings from (course_id, user_id, rating) entries whose
+    ids exist and whose ratings are valid; a later entry for the same pair
+    wins. Returns {(course_id, user_id): "created" | "updated" | "unchanged"}.
+    """
+    wanted = {(course_id, user_id): int(rating) for course_id, user_id, rating in entries}
+    if not wanted:
+        return {}
+
+    now = timezone.now()
+    statuses = {}
+    changes = []
+    updates = []
+    with transaction.atomic():
+        pending = wanted
+        while pending:
+            for pair in insert_new_ratings(pending, now):
+                statuses[pair] = "created"
+                changes.append((pair[0], None, pending[pair], now))
+
+            # The others were rated already, maybe by a concurrent request
+            # whose INSERT the one above waited for: lock and compare them.
+            conflicting = {pair: rating for pair, rating in pending.items() if pair not in statuses}
+            existing = {
+                (course_id, user_id): (pk, rating, created_at)
+                for pk, course_id, user_id, rating, created_at in CourseRating.objects
+                .select_for_update()
+                .filter(
+                    course_id__in={course_id for course_id, _ in conflicting},
+                    user_id__in={user_id for _, user_id in conflicting},
+                )
+                .values_list("id", "course_id", "user_id", "rating", "created_at")
+                if (course_id, user_id) in conflicting
+            }
+            for pair, (pk, old_rating, created_at) in existing.items():
+                rating = conflicting[pair]
+                if old_rating == rating:
+                    statuses[pair] = "unchanged"
+                    continue
+                statuses[pair] = "updated"
+                changes.append((pair[0], old_rating, rating, created_at))
+                updates.append(CourseRating(pk=pk, rating=rating))
+            # Deleted between the INSERT and the read: insert those again.
+            pending = {pair: rating for pair, rating in conflicting.items() if pair not in existing}
+
+        if updates:
+            CourseRating.objects.bulk_update(updates, ["rating"])
+        if changes:
+            apply_rating_changes(changes)
+
+    course_ids = {course_id for course_id, *_ in changes}
+    if course_ids:
+        ratings_upserted.send(sender=CourseRating, course_ids=course_ids)
+    return statuses
+
+
+def import_ratings(rows):
+    """
+    Upsert a batch of {"course", "user_email", "rating"} rows, looking the
+    courses and users up in one query each. Returns one status per row:
+    created, updated, unchanged, invalid_row (not an object, or a course or
+    user_email of the wrong type), invalid_rating, course_not_found or
+    user_not_found.
+    """
+    course_ids = set()
+    emails = set()
+    for row in rows:
+        if is_rating_row(row):
+            course_ids.add(parse_course_id(row.get("course")))
+            emails.add((row.get("user_email") or "").strip())
+
+    course_ids.discard(None)
+    known_courses = set(Course.objects.filter(id__in=course_ids).values_list("id", flat=True))
+    users_by_email = dict(User.objects.filter(email__in=emails).values_list("email", "id"))
+
+    resolved = []
+    for row in rows:
+        if not is_rating_row(row):
+            resolved.append("invalid_row")
+            continue
+        course_id = parse_course_id(row.get("course"))
+        user_id = users_by_email.get((row.get("user_email") or "").strip())
+        rating = parse_rating(row.get("rating"))
+        if rating is None:
+            resolved.append("invalid_rating")
+        elif course_id not in known_courses:
+            resolved.append("course_not_found")
+        elif user_id is None:
+            resolved.append("user_not_found")
+        else:
+            resolved.append((course_id, user_id, rating))
+
+    statuses = upsert_ratings(entry for entry in resolved if isinstance(entry, tuple))
+    return [
+        statuses[entry[:2]] if isinstance(entry, tuple) else entry
+        for entry in resolved
+    ]
+
+
+def iter_rating_rows(stream, file_format):
+    """
+    Yield one {"course", "user_email", "rating"} dict per rating from a CSV
+    (with those columns) or JSONL text stream.
+    """
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+    elif file_format == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported format {file_format!r}, expected csv or jsonl.")
+
+
+class RatingImporter:
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.report = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+
+    def run(self, rows):
+        rows = iter(rows)
+        line = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return self.report
+            for row, status in zip(batch, import_ratings(batch)):
+                line += 1
+                if status in self.report:
+                    self.report[status] += 1
+                else:
+                    self.report["failed"] += 1
+                    if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+                        self.report["errors"].append({"row": line, "error": status})
@@ -0,0 +1,229 @@
+"""
+Full-text search over courses.
+
+The index is a side table, `core_course_search`, holding each course's
+title, description and teacher name: an FTS5 virtual table keyed by rowid on
+SQLite and a table with a weighted, GIN-indexed tsvector on PostgreSQL. The
+signal handlers in core.models keep it in sync with single-row writes and
+`manage.py rebuild_search_index` refills it from scratch. On any other
+database there is no index: writes leave it alone and search_courses()
+raises NotImplementedError (check search_available() first).
+
+Matches are ranked title > teacher name > description. Highlights come back
+HTML-escaped with the matched terms wrapped in <mark>.
+"""
+import html
+import re
+from collections import namedtuple
+
+from django.db import connection
+
+TABLE = "core_course_search"
+
+# Search terms beyond this are ignored.
+MAX_TERMS = 8
+
+# Highlight delimiters inside the database; swapped for <mark> after escaping.
+START, STOP = "\x02", "\x03"
+
+SearchHit = namedtuple("SearchHit", ["course_id", "highlight"])
+
+SOURCE_SQL = """
+    SELECT c.id, c.title, c.description, COALESCE(u.full_name, '')
+    FROM core_course c LEFT JOIN userauths_user u ON u.id = c.teacher_id
+"""
+
+
+class SQLiteIndex:
+    create_sql = [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+            title, description, teacher_name,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )""",
+    ]
+    drop_sql = [f"DROP TABLE IF EXISTS {TABLE}"]
+    insert_sql = f"INSERT INTO {TABLE} (rowid, title, description, teacher_name) "
+    delete_sql = f"DELETE FROM {TABLE} WHERE rowid IN (%s)"
+    rename_teacher_sql = (
+        f"UPDATE {TABLE} SET teacher_name = %s "
+        f"WHERE rowid IN (SELECT id FROM core_course WHERE teacher_id = %s)"
+    )
+    search_sql = f"""
+        SELECT rowid,
+               highlight({TABLE}, 0, %s, %s),
+               snippet({TABLE}, 1, %s, %s, '…', 24),
+               highlight({TABLE}, 2, %s, %s)
+        FROM {TABLE}
+        WHERE {TABLE} MATCH %s
+        ORDER BY bm25({TABLE}, 10.0, 1.0, 5.0), rowid
+        LIMIT %s OFFSET %s
+    """
+
+    @staticmethod
+    def match(terms):
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def search_params(self, terms, limit, offset):
+        return [START, STOP] * 3 + [self.match(terms), limit, offset]
+
+
+class PostgreSQLIndex:
+    create_sql = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+            course_id bigint PRIMARY KEY
+                REFERENCES core_course (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+            title text NOT NULL,
+            description text NOT NULL,
+            teacher_name text NOT NULL,
+            document tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', title), 'A')
+                || setweight(to_tsvector('simple', teacher_name), 'B')
+                || setweight(to_tsvector('simple', description), 'C')
+            ) STORED
+        )""",
+        f"CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)",
+    ]
+    drop_sql = [f"DROP TABLE IF EXISTS {TABLE}"]
+    insert_sql = f"INSERT INTO {TABLE} (course_id, title, description, teacher_name) "
+    delete_sql = f"DELETE FROM {TABLE} WHERE course_id IN (%s)"
+    rename_teacher_sql = (
+        f"UPDATE {TABLE} SET teacher_name = %s "
+        f"WHERE course_id IN (SELECT id FROM core_course WHERE teacher_id = %s)"
+    )
+    # Rank and cut the page first so ts_headline only runs on that page.
+    search_sql = f"""
+        SELECT page.course_id,
+               ts_headline('simple', page.title, page.query, %s),
+               ts_headline('simple', page.description, page.query, %s),
+               ts_headline('simple', page.teacher_name, page.query, %s)
+        FROM (
+            SELECT s.course_id, s.title, s.description, s.teacher_name, q.query,
+                   ts_rank(s.document, q.query) AS rank
+            FROM {TABLE} s, to_tsquery('simple', %s) AS q(query)
+            WHERE s.document @@ q.query
+            ORDER BY rank DESC, s.course_id
+            LIMIT %s OFFSET %s
+        ) AS page
+        ORDER BY page.rank DESC, page.course_id
+    """
+
+    @staticmethod
+    def match(terms):
+        return " & ".join(f"{term}:*" for term in terms)
+
+    def search_params(self, terms, limit, offset):
+        whole = f'StartSel="{START}", StopSel="{STOP}", HighlightAll=true'
+        snippet = f'StartSel="{START}", StopSel="{STOP}", MaxWords=24, MinWords=8'
+        return [whole, snippet, whole, self.match(terms), limit, offset]
+
+
+INDEXES = {"sqlite": SQLiteIndex(), "postgresql": PostgreSQLIndex()}
+
+
+def get_index(conn=None):
+    """
+    The index implementation for the database of `conn`, or None.
+    """
+    return INDEXES.get((conn or connection).vendor)
+
+
+def search_available(conn=None):
+    return get_index(conn) is not None
+
+
+def search_terms(query):
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def create_index(conn=None):
+    conn = conn or connection
+    index = get_index(conn)
+    if index is None:
+        return
+    with conn.cursor() as cursor:
+        for sql in index.create_sql:
+            cursor.execute(sql)
+
+
+def drop_index(conn=None):
+    conn = conn or connection
+    index = get_index(conn)
+    if index is None:
+        return
+    with conn.cursor() as cursor:
+        for sql in index.drop_sql:
+            cursor.execute(sql)
+
+
+def rebuild_index(conn=None):
+    """
+    Refill the whole index from core_course; returns the number of courses.
+    """
+    conn = conn or connection
+    index = get_index(conn)
+    if index is None:
+        return 0
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(index.insert_sql + SOURCE_SQL)
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+        return cursor.fetchone()[0]
+
+
+def index_courses(course_ids):
+    index = get_index()
+    if not course_ids or index is None:
+        return
+    placeholders = ", ".join(["%s"] * len(course_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(index.delete_sql % placeholders, list(course_ids))
+        cursor.execute(
+            index.insert_sql + SOURCE_SQL + f" WHERE c.id IN ({placeholders})", list(course_ids)
+        )
+
+
+def unindex_courses(course_ids):
+    index = get_index()
+    if not course_ids or index is None:
+        return
+    placeholders = ", ".join(["%s"] * len(course_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(index.delete_sql % placeholders, list(course_ids))
+
+
+def rename_teacher(teacher_id, full_name):
+    index = get_index()
+    if index is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(index.rename_teacher_sql, [full_name, teacher_id])
+
+
+def mark(text):
+    if text is None:
+        return None
+    return html.escape(text).replace(START, "<mark>").replace(STOP, "</mark>")
+
+
+def search_courses(query, limit, offset=0):
+    """
+    Best matches for `query` first, as SearchHit(course_id, highlight).
+    Every term must match, each as a word prefix.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    index = get_index()
+    if index is None:
+        raise NotImplementedError(f"Course search is not available on {connection.vendor}.")
+    with connection.cursor() as cursor:
+        cursor.execute(index.search_sql, index.search_params(terms, limit, offset))
+        rows = cursor.fetchall()
+    return [
+        SearchHit(course_id, {
+            "title": mark(title),
+            "description": mark(description),
+            "teacher": mark(teacher_name),
+        })
+        for course_id, title, description, teacher_name in rows
+    ]
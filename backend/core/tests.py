@@ -1,3 +1,306 @@
+import json
+import os
+import re
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import ratings, search
+from core.models import Course, CourseRating, TeacherRoster
+from userauths.models import User
+
+
+class CourseRatingAggregateTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.alice = User.objects.create(email="alice@example.com")
+        self.bob = User.objects.create(email="bob@example.com")
+        self.course = Course.objects.create(
+            title="Algebra", description="Intro", teacher=self.teacher
+        )
+
+    def test_create_update_and_delete_keep_aggregates_current(self):
+        CourseRating.objects.create(course=self.course, user=self.alice, rating=4)
+        CourseRating.objects.update_or_create(
+            course=self.course, user=self.bob, defaults={"rating": "2"}
+        )
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_count, 2)
+        self.assertEqual(self.course.rating_sum, 6)
+        self.assertEqual(self.course.get_average_rating(), 3)
+
+        CourseRating.objects.update_or_create(
+            course=self.course, user=self.bob, defaults={"rating": 5}
+        )
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_sum, 9)
+        self.assertEqual(self.course.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        CourseRating.objects.get(course=self.course, user=self.alice).delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_count, 1)
+        self.assertEqual(self.course.rating_sum, 5)
+        self.assertEqual(self.course.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+
+    def test_saving_a_stale_course_does_not_clobber_aggregates(self):
+        stale = Course.objects.get(pk=self.course.pk)
+        CourseRating.objects.create(course=self.course, user=self.alice, rating=3)
+
+        stale.title = "Linear Algebra"
+        stale.save()
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.title, "Linear Algebra")
+        self.assertEqual(self.course.rating_count, 1)
+
+    def test_ratings_saved_without_loading_are_not_counted_twice(self):
+        rating = CourseRating.objects.create(course=self.course, user=self.alice, rating=4)
+
+        CourseRating(
+            pk=rating.pk, course=self.course, user=self.alice, rating=2, created_at=rating.created_at
+        ).save()
+        partial = CourseRating.objects.only("id", "user").get(pk=rating.pk)
+        partial.save()
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.rating_count, self.course.rating_sum), (1, 2))
+        self.assertEqual(self.course.rating_histogram, {1: 0, 2: 1, 3: 0, 4: 0, 5: 0})
+
+        CourseRating.objects.only("id").get(pk=rating.pk).delete()
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.rating_count, self.course.rating_sum), (0, 0))
+
+    def test_deleting_a_course_skips_its_ratings_aggregates(self):
+        CourseRating.objects.create(course=self.course, user=self.alice, rating=4)
+        CourseRating.objects.create(course=self.course, user=self.bob, rating=2)
+        with CaptureQueriesContext(connection) as queries:
+            self.course.delete()
+        self.assertFalse([
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "core_course"')
+        ])
+
+    def test_average_rating_needs_no_queries(self):
+        CourseRating.objects.create(course=self.course, user=self.alice, rating=5)
+        course = Course.objects.get(pk=self.course.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(course.get_average_rating(), 5)
+
+    def test_rebuild_command_reports_and_fixes_drift(self):
+        CourseRating.objects.create(course=self.course, user=self.alice, rating=4)
+        Course.objects.filter(pk=self.course.pk).update(rating_count=7, rating_sum=1)
+
+        out = StringIO()
+        call_command("rebuild_rating_aggregates", "--dry-run", stdout=out)
+        self.assertIn("rating_count 7 -> 1", out.getvalue())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_count, 7)
+
+        out = StringIO()
+        call_command("rebuild_rating_aggregates", stdout=out)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.rating_count, 1)
+        self.assertEqual(self.course.rating_sum, 4)
+
+        out = StringIO()
+        call_command("rebuild_rating_aggregates", stdout=out)
+        self.assertIn("up to date", out.getvalue())
+
+
+class TeacherRosterTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.other_teacher = User.objects.create(email="other@example.com", role="teacher")
+        self.alice = User.objects.create(email="alice@example.com")
+        self.bob = User.objects.create(email="bob@example.com")
+        self.algebra = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        self.geometry = Course.objects.create(title="Geometry", description="", teacher=self.teacher)
+
+    def roster(self, teacher):
+        return dict(
+            TeacherRoster.objects.filter(teacher=teacher).values_list("student__email", "course_count")
+        )
+
+    def test_enrollment_changes_update_course_counts(self):
+        self.algebra.students.add(self.alice, self.bob)
+        self.geometry.students.add(self.alice)
+        self.assertEqual(self.roster(self.teacher), {"alice@example.com": 2, "bob@example.com": 1})
+
+        self.algebra.students.remove(self.alice)
+        self.bob.enrolled_courses.clear()
+        self.assertEqual(self.roster(self.teacher), {"alice@example.com": 1})
+
+        self.alice.enrolled_courses.add(self.algebra)
+        self.geometry.students.clear()
+        self.assertEqual(self.roster(self.teacher), {"alice@example.com": 1})
+
+    def test_teacher_reassignment_and_course_deletion(self):
+        self.algebra.students.add(self.alice)
+        self.geometry.students.add(self.alice, self.bob)
+
+        course = Course.objects.get(pk=self.geometry.pk)
+        course.teacher = self.other_teacher
+        course.save()
+        self.assertEqual(self.roster(self.teacher), {"alice@example.com": 1})
+        self.assertEqual(self.roster(self.other_teacher), {"alice@example.com": 1, "bob@example.com": 1})
+
+        self.algebra.delete()
+        self.assertEqual(self.roster(self.teacher), {})
+
+    def test_rebuild_command(self):
+        self.algebra.students.add(self.alice)
+        self.geometry.students.add(self.alice)
+        TeacherRoster.objects.all().delete()
+
+        call_command("rebuild_teacher_roster", stdout=StringIO())
+        self.assertEqual(self.roster(self.teacher), {"alice@example.com": 2})
+
+
+class SQLiteConnectionTuningTests(TestCase):
+    def test_connections_are_initialized_with_the_configured_pragmas(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("SQLite-only settings")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+
+class HotQueryIndexTests(TestCase):
+    """
+    EXPLAIN the queries the API runs constantly and fail if any of them
+    falls back to scanning a whole table.
+    """
+
+    def setUp(self):
+        self.teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        self.course = Course.objects.create(title="Algebra", description="", teacher=self.teacher)
+        if connection.vendor == "postgresql":
+            # Tiny test tables are always cheaper to scan; ask for the index plan.
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def assert_no_full_scan(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == "sqlite":
+            # "SCAN <table>" without an index; "SCAN <table> USING INDEX" is fine.
+            full_scans = re.findall(r"SCAN (\w+)\s*$", plan, flags=re.MULTILINE)
+        else:
+            full_scans = re.findall(r"Seq Scan on (\w+)", plan)
+        self.assertEqual(full_scans, [], plan)
+
+    def test_user_queries_use_an_index(self):
+        self.assert_no_full_scan(User.objects.filter(role="teacher"))
+        self.assert_no_full_scan(User.objects.filter(email="alice@example.com", role="student"))
+
+    def test_course_queries_use_an_index(self):
+        self.assert_no_full_scan(Course.objects.filter(teacher=self.teacher).order_by("created_at"))
+        self.assert_no_full_scan(Course.objects.order_by("created_at", "id")[:50])
+
+    def test_rating_queries_use_an_index(self):
+        self.assert_no_full_scan(CourseRating.objects.filter(course=self.course).order_by("created_at"))
+
+
+class SearchIndexCommandTests(TestCase):
+    def test_rebuild_restores_a_stale_index(self):
+        teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        course = Course.objects.create(title="Algebra", description="", teacher=teacher)
+        Course.objects.filter(pk=course.pk).update(title="Geometry")  # no signals
+
+        self.assertEqual([hit.course_id for hit in search.search_courses("algebra", 10)], [course.id])
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indexed 1 course(s).", out.getvalue())
+        self.assertEqual(search.search_courses("algebra", 10), [])
+        self.assertEqual([hit.course_id for hit in search.search_courses("geo", 10)], [course.id])
+
+
+class RatingImportTests(TestCase):
+    def test_import_upserts_keeps_aggregates_and_is_repeatable(self):
+        teacher = User.objects.create(email="teacher@example.com", role="teacher")
+        course = Course.objects.create(title="Algebra", description="", teacher=teacher)
+        alice = User.objects.create(email="alice@example.com")
+        User.objects.create(email="bob@example.com")
+        CourseRating.objects.create(course=course, user=alice, rating=2)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as upload:
+            upload.write(
+                "course,user_email,rating\n"
+                f"{course.id},alice@example.com,4\n"
+                f"{course.id},bob@example.com,5\n"
+                f"{course.id},bob@example.com,6\n"
+                f"999,bob@example.com,3\n"
+                f"{course.id},nobody@example.com,3\n"
+            )
+        self.addCleanup(os.unlink, upload.name)
+
+        out = StringIO()
+        call_command("import_ratings", upload.name, "--batch-size", "2", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual((report["created"], report["updated"], report["failed"]), (1, 1, 3))
+        self.assertEqual(
+            [error["error"] for error in report["errors"]],
+            ["invalid_rating", "course_not_found", "user_not_found"],
+        )
+
+        course.refresh_from_db()
+        self.assertEqual((course.rating_count, course.rating_sum), (2, 9))
+        self.assertEqual(course.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+        out = StringIO()
+        call_command("rebuild_rating_aggregates", "--dry-run", stdout=out)
+        self.assertIn("up to date", out.getvalue())
+
+        out = StringIO()
+        call_command("import_ratings", upload.name, stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["unchanged"], 2)
+
+    def test_rows_of_the_wrong_shape_are_rejected(self):
+        course = Course.objects.create(title="Algebra", description="")
+        User.objects.create(email="alice@example.com")
+        rows = [
+            [course.id, "alice@example.com", 4],
+            {"course": True, "user_email": "alice@example.com", "rating": 4},
+            {"course": float(course.id) + 0.9, "user_email": "alice@example.com", "rating": 4},
+            {"course": [course.id], "user_email": "alice@example.com", "rating": 4},
+            {"course": course.id, "user_email": 5, "rating": 4},
+            {"course": course.id, "user_email": "alice@example.com", "rating": 4},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as upload:
+            upload.write("\n".join(json.dumps(row) for row in rows))
+        self.addCleanup(os.unlink, upload.name)
+
+        out = StringIO()
+        call_command("import_ratings", upload.name, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual((report["created"], report["failed"]), (1, 5))
+        self.assertEqual({error["error"] for error in report["errors"]}, {"invalid_row"})
+        self.assertEqual(CourseRating.objects.get().course_id, course.id)
+
+    def test_concurrent_first_submissions_count_once(self):
+        course = Course.objects.create(title="Algebra", description="")
+        alice = User.objects.create(email="alice@example.com")
+        insert = ratings.insert_new_ratings
+
+        def submitted_concurrently(wanted, created_at):
+            # The other request's first submission lands just before ours.
+            with mock.patch("core.ratings.insert_new_ratings", insert):
+                self.assertEqual(
+                    ratings.upsert_ratings([(course.id, alice.id, 2)]), {(course.id, alice.id): "created"}
+                )
+            return insert(wanted, created_at)
+
+        with mock.patch("core.ratings.insert_new_ratings", submitted_concurrently):
+            statuses = ratings.upsert_ratings([(course.id, alice.id, 5)])
+        self.assertEqual(statuses, {(course.id, alice.id): "updated"})
 
-# Create your tests here.
+        course.refresh_from_db()
+        self.assertEqual((course.rating_count, course.rating_sum), (1, 5))
+        self.assertEqual(course.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
+        self.assertEqual(CourseRating.objects.get().rating, 5)
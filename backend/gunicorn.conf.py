@@ -0,0 +1,60 @@
+"""
+gunicorn settings, read automatically when gunicorn runs from this directory:
+
+    gunicorn backend.wsgi -w 4 -b 127.0.0.1:8000
+    API_ONLY=1 gunicorn backend.wsgi -w 8  # API-only workers, see settings.py
+
+The application (settings, apps and every view, see backend/wsgi.py) is
+loaded once in the master and the workers are forked from it, so their
+memory starts out shared copy-on-write instead of each worker importing
+everything again.
+
+Caches the workers must share (the API response cache, AUTH_USER_CACHE and
+TOKEN_REVOCATION_CACHE) are checked on start: with more than one worker, a
+per-process cache such as LocMemCache would leave every worker but the one
+that made a write serving stale data, so gunicorn refuses to start.
+"""
+import gc
+
+preload_app = True
+
+
+def process_local_caches():
+    """
+    Aliases of the caches workers must share that each process keeps to
+    itself.
+    """
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.core.cache.backends.locmem import LocMemCache
+
+    aliases = {
+        getattr(settings, "API_CACHE_ALIAS", "default"),
+        getattr(settings, "AUTH_USER_CACHE", None),
+        getattr(settings, "TOKEN_REVOCATION_CACHE", None),
+    }
+    return sorted(
+        alias for alias in aliases if alias and isinstance(caches[alias], LocMemCache)
+    )
+
+
+def on_starting(server):
+    # Runs after the app was preloaded, so the settings are configured.
+    local = process_local_caches()
+    if server.cfg.workers > 1 and local:
+        server.log.error(
+            "Cache(s) %s are local to each process but %d workers share them; "
+            "configure a shared backend (see CACHES in settings.py) or run one worker.",
+            ", ".join(local), server.cfg.workers,
+        )
+        raise SystemExit(1)
+
+
+def pre_fork(server, worker):
+    from django.db import connections
+
+    # A connection opened while loading must not be shared by the workers.
+    connections.close_all()
+    # Move everything loaded so far out of the collector's reach: collections
+    # write to every object they visit, which would copy the shared pages.
+    gc.freeze()
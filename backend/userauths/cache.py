@@ -0,0 +1,81 @@
+"""
+Authentication state of users (role, active and staff flags) shared by
+every worker.
+
+With AUTH_USER_CACHE set to a cache alias that all workers share (Redis,
+Memcached), api.authentication.ClaimsJWTAuthentication trusts the claims of
+a token unless a later change to the user was pinned in that cache, and
+loads users from tokens without the claims at most once per
+AUTH_USER_CACHE_TTL. Unset, every request reads the user's state from the
+database, so a deactivated or demoted user loses access on every worker at
+once. A cache that each process keeps to itself (LocMemCache) would only
+tell the worker that saved the user.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Fields of User that authentication needs; everything else is loaded lazily.
+AUTH_USER_FIELDS = ("id", "email", "username", "full_name", "role", "is_active", "is_staff")
+
+
+def user_cache():
+    alias = getattr(settings, "AUTH_USER_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def cache_ttl():
+    return getattr(settings, "AUTH_USER_CACHE_TTL", 60)
+
+
+def invalidation_ttl():
+    # An invalidated entry must outlive every access token that still
+    # carries the old claims.
+    lifetime = getattr(settings, "SIMPLE_JWT", {}).get("ACCESS_TOKEN_LIFETIME", timedelta(minutes=5))
+    return max(lifetime.total_seconds(), cache_ttl())
+
+
+def snapshot_user(user):
+    return {field: getattr(user, field) for field in AUTH_USER_FIELDS}
+
+
+def cached_user(user_id):
+    """
+    The cached dict of AUTH_USER_FIELDS of a user, or None.
+    """
+    cache = user_cache()
+    return None if cache is None else cache.get(user_key(user_id))
+
+
+def remember_user(user_id, snapshot):
+    cache = user_cache()
+    if cache is not None:
+        cache.set(user_key(user_id), snapshot, cache_ttl())
+
+
+def invalidate_user(user_id, snapshot=None):
+    """
+    Replace the cached state of a user after their role (or active/staff
+    flag) changed, overriding the claims of tokens issued before the change.
+    Call this after bulk `.update()`s that bypass User.save(); pass an empty
+    snapshot for a user that no longer exists.
+    """
+    cache = user_cache()
+    if cache is None:
+        return  # every request reads the database already
+    if snapshot is None:
+        from django.contrib.auth import get_user_model
+
+        snapshot = (
+            get_user_model().objects.filter(pk=user_id).values(*AUTH_USER_FIELDS).first()
+        )
+    if not snapshot:
+        # Deleted users are pinned as inactive so their tokens stop working.
+        snapshot = {field: None for field in AUTH_USER_FIELDS}
+        snapshot.update(id=user_id, is_active=False, is_staff=False)
+    cache.set(user_key(user_id), snapshot, invalidation_ttl())
@@ -0,0 +1,31 @@
+"""
+Password hashers whose cost comes from settings, so it can be tuned per
+deployment without a code change. Hashes made with another cost still
+verify, and Django rehashes them on the user's next successful login.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return getattr(settings, "SCRYPT_WORK_FACTOR", ScryptPasswordHasher.work_factor)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Needs the argon2-cffi package.
+    """
+
+    @property
+    def time_cost(self):
+        return getattr(settings, "ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, "ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
@@ -0,0 +1,220 @@
+"""
+Streaming bulk import of users for cohort onboarding.
+
+Rows are read lazily from CSV or JSONL and handled one batch at a time, so
+memory stays flat however long the file is. Each batch costs one lookup of
+existing emails, one parallel round of password hashing in a process pool,
+one bulk INSERT of users, one of profiles, and one of enrollments per course.
+bulk_create() skips post_save, so `users_imported` is sent for the response
+cache instead.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.dispatch import Signal
+
+from userauths.models import PROFILE_MIRRORED_FIELDS, Profile, User
+from userauths.services import build_user
+
+# Sent after a batch is written, with the `users` it created.
+users_imported = Signal()
+
+# Errors kept in the report; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+def iter_rows(stream, file_format):
+    """
+    Yield one dict per user from a text stream.
+
+    CSV needs an `email` column and may have `password`, `full_name`,
+    `role` and `courses` (course ids separated by `;`). JSONL has one object
+    per line with the same keys, `courses` being a list. A line that is not
+    such an object raises ValueError naming the line.
+    """
+    if file_format == "csv":
+        for row in csv.DictReader(stream):
+            courses = row.get("courses") or ""
+            row["courses"] = [course for course in courses.split(";") if course.strip()]
+            yield row
+    elif file_format == "jsonl":
+        for number, line in enumerate(stream, 1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    raise ValueError(f"Line {number}: {exc}")
+                check_row(row, number)
+                yield row
+    else:
+        raise ValueError(f"Unsupported format {file_format!r}, expected csv or jsonl.")
+
+
+def check_row(row, number):
+    if not isinstance(row, dict):
+        raise ValueError(f"Line {number}: expected an object, got {type(row).__name__}.")
+    for field in ("email", "password", "full_name", "role"):
+        if row.get(field) is not None and not isinstance(row[field], str):
+            raise ValueError(f"Line {number}: {field} must be a string.")
+    courses = row.get("courses")
+    if courses is not None and not (
+        isinstance(courses, list)
+        and all(type(course) in (int, str) for course in courses)
+    ):
+        raise ValueError(f"Line {number}: courses must be a list of course ids.")
+
+
+def open_text(binary_stream):
+    return io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+
+
+def _init_worker():
+    # Spawned (non-forked) workers need Django configured to read PASSWORD_HASHERS.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    import django
+
+    django.setup()
+
+
+def _hash_password(password):
+    return make_password(password or None)
+
+
+class UserImporter:
+    def __init__(self, batch_size=1000, workers=None, enroll=True):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.enroll = enroll
+        self.report = {
+            "created": 0,
+            "skipped_existing": 0,
+            "failed": 0,
+            "enrolled": 0,
+            "errors": [],
+            "unknown_courses": [],
+        }
+
+    def run(self, rows):
+        """
+        Import every row and return the report. `workers=0` hashes in this
+        process instead of a pool (handy for small files and tests).
+        """
+        rows = iter(rows)
+        if self.workers == 0:
+            self.import_batches(rows, map)
+        else:
+            with ProcessPoolExecutor(self.workers, initializer=_init_worker) as pool:
+                workers = self.workers or os.cpu_count() or 1
+
+                def pool_map(function, values):
+                    chunksize = max(1, len(values) // (4 * workers))
+                    return pool.map(function, values, chunksize=chunksize)
+
+                self.import_batches(rows, pool_map)
+        return self.report
+
+    def import_batches(self, rows, hash_map):
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch, hash_map)
+
+    def error(self, row_email, message):
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"email": row_email, "error": message})
+
+    def import_batch(self, batch, hash_map):
+        rows_by_email = {}
+        for row in batch:
+            email = (row.get("email") or "").strip()
+            if not email or "@" not in email:
+                self.error(email, "A valid email is required.")
+            elif (row.get("role") or "student") not in dict(User.ROLE_CHOICES):
+                self.error(email, f"Unknown role {row.get('role')!r}.")
+            elif email in rows_by_email:
+                self.report["skipped_existing"] += 1
+            else:
+                rows_by_email[email] = row
+
+        existing = set(
+            User.objects.filter(email__in=list(rows_by_email)).values_list("email", flat=True)
+        )
+        self.report["skipped_existing"] += len(existing)
+        rows = [row for email, row in rows_by_email.items() if email not in existing]
+        if not rows:
+            return
+
+        hashes = hash_map(_hash_password, [row.get("password") for row in rows])
+        users = []
+        for row, password_hash in zip(rows, hashes):
+            user = build_user(
+                row["email"].strip(), None,
+                full_name=row.get("full_name") or None,
+                role=row.get("role") or "student",
+            )
+            user.password = password_hash
+            users.append((user, row))
+
+        try:
+            with transaction.atomic():
+                created = self.insert([user for user, _ in users])
+        except IntegrityError:
+            # A username/full_name clash somewhere in the batch: retry row by
+            # row so one bad row does not sink the others.
+            created = []
+            for user, _ in users:
+                user.pk = None
+            for user, _ in users:
+                try:
+                    with transaction.atomic():
+                        created += self.insert([user])
+                except IntegrityError as exc:
+                    self.error(user.email, str(exc))
+
+        self.report["created"] += len(created)
+        if created:
+            users_imported.send(sender=User, users=created)
+        if self.enroll:
+            self.enroll_users(created, {user.email: row for user, row in users})
+
+    @staticmethod
+    def insert(users):
+        users = User.objects.bulk_create(users)
+        # bulk_create skips post_save, so create the profiles here.
+        Profile.objects.bulk_create([
+            Profile(user=user, **{field: getattr(user, field) for field in PROFILE_MIRRORED_FIELDS})
+            for user in users
+        ])
+        return users
+
+    def enroll_users(self, users, rows_by_email):
+        from core.enrollment import bulk_add_students
+        from core.models import Course
+
+        student_ids_by_course = {}
+        for user in users:
+            if user.role != "student":
+                continue
+            for course_id in rows_by_email[user.email].get("courses") or []:
+                student_ids_by_course.setdefault(str(course_id).strip(), set()).add(user.id)
+        if not student_ids_by_course:
+            return
+
+        valid_ids = [course_id for course_id in student_ids_by_course if course_id.isdigit()]
+        courses = Course.objects.in_bulk([int(course_id) for course_id in valid_ids])
+        for course_id, student_ids in student_ids_by_course.items():
+            course = courses.get(int(course_id)) if course_id.isdigit() else None
+            if course is None:
+                unknown = self.report["unknown_courses"]
+                if course_id not in unknown and len(unknown) < MAX_REPORTED_ERRORS:
+                    unknown.append(course_id)
+                continue
+            self.report["enrolled"] += len(bulk_add_students(course, student_ids))
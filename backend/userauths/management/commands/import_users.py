@@ -0,0 +1,64 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from userauths.importing import UserImporter, iter_rows, open_text
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV or JSONL file (or '-' for stdin), hashing "
+        "passwords in a process pool and inserting them in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or '-' to read stdin.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format. Defaults to the file extension.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes (default: one per CPU, 0 = no pool).",
+        )
+        parser.add_argument(
+            "--no-enroll",
+            action="store_true",
+            help="Ignore the courses column.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"]
+        if file_format is None:
+            if path.endswith(".csv"):
+                file_format = "csv"
+            elif path.endswith((".jsonl", ".ndjson")):
+                file_format = "jsonl"
+            else:
+                raise CommandError("Cannot tell the format from the file name; pass --format.")
+
+        importer = UserImporter(
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            enroll=not options["no_enroll"],
+        )
+        try:
+            if path == "-":
+                report = importer.run(iter_rows(open_text(sys.stdin.buffer), file_format))
+            else:
+                with open(path, "rb") as stream:
+                    report = importer.run(iter_rows(open_text(stream), file_format))
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} user(s), skipped {report['skipped_existing']}, "
+            f"failed {report['failed']}, enrolled {report['enrolled']}."
+        ))
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from api.tokens import revocation_cache, revocation_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired refresh tokens (and their blacklist entries) in chunks. "
+        "Meant to run on a schedule, e.g. nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Tokens deleted per query, so no single DELETE holds locks for long.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the expired tokens.",
+        )
+        parser.add_argument(
+            "--warm-revocation-cache",
+            action="store_true",
+            help="Also copy the unexpired blacklisted tokens into TOKEN_REVOCATION_CACHE.",
+        )
+
+    def handle(self, *args, **options):
+        now = aware_utcnow()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} expired token(s) would be deleted.")
+        else:
+            deleted = 0
+            last_id = 0
+            while True:
+                ids = list(
+                    expired.filter(id__gt=last_id)
+                    .order_by("id")
+                    .values_list("id", flat=True)[:options["batch_size"]]
+                )
+                if not ids:
+                    break
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+                last_id = ids[-1]
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired token(s)."))
+
+        if options["warm_revocation_cache"]:
+            cache = revocation_cache()
+            if cache is None:
+                raise CommandError("TOKEN_REVOCATION_CACHE is not set.")
+            revoked = BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list(
+                "token__jti", "token__expires_at"
+            )
+            count = 0
+            for jti, expires_at in revoked.iterator():
+                cache.set(revocation_key(jti), True, int((expires_at - now).total_seconds()) + 1)
+                count += 1
+            self.stdout.write(self.style.SUCCESS(f"Cached {count} revoked token(s)."))
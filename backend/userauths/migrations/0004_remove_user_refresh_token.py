@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userauths', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='refresh_token',
+        ),
+    ]
@@ -1,6 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
+
+from userauths.cache import invalidate_user, snapshot_user
+
+# User fields copied onto the user's Profile
+PROFILE_MIRRORED_FIELDS = ("full_name", "role")
+
 
 class User(AbstractUser):
     ROLE_CHOICES = [
@@ -12,12 +18,21 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     full_name = models.CharField(unique=True, max_length=100)
     otp = models.CharField(max_length=100, null=True, blank=True)
-    refresh_token = models.CharField(max_length=1000, null=True, blank=True)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='student')  # New field
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Lookups by role, and by email + role when enrolling students
+            models.Index(fields=["role", "email"], name="user_role_email_idx"),
+            # The teacher list; partial where the database supports it
+            models.Index(
+                fields=["full_name"], condition=models.Q(role="teacher"), name="user_teacher_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.email} ({self.role})"
     
@@ -29,6 +44,20 @@ class User(AbstractUser):
             self.username = email_username
         super(User, self).save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_auth_state = instance._auth_state()
+        instance._loaded_profile_state = instance._profile_state()
+        return instance
+
+    def _auth_state(self):
+        return tuple(self.__dict__.get(field) for field in ("role", "is_active", "is_staff"))
+
+    def _profile_state(self):
+        # The user fields mirrored on Profile
+        return {field: self.__dict__.get(field) for field in PROFILE_MIRRORED_FIELDS}
+
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -50,14 +79,77 @@ class Profile(models.Model):
         if self.full_name == "" or self.full_name == None:
             self.full_name == self.user.username
         super(Profile, self).save(*args, **kwargs)
+        self._loaded_values = self._current_values()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._current_values()
+        return instance
+
+    def _current_values(self):
+        return {
+            field.attname: self.__dict__.get(field.attname)
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+        }
+
+    def changed_fields(self):
+        """
+        Names of the fields modified since the profile was loaded or saved.
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        current = self._current_values()
+        if loaded is None:
+            return list(current)
+        return [name for name, value in current.items() if loaded.get(name) != value]
 
 
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
+        Profile.objects.create(
+            user=instance, **{field: getattr(instance, field) for field in PROFILE_MIRRORED_FIELDS}
+        )
+
+def save_user_profile(sender, instance, created, **kwargs):
+    """
+    Write the profile only when something on it changed: either a mirrored
+    user field (full_name, role) or the already-loaded `user.profile` itself.
+    """
+    loaded_state = getattr(instance, "_loaded_profile_state", None)
+    instance._loaded_profile_state = instance._profile_state()
+    if created:
+        return
+
+    user_changed = loaded_state is not None and loaded_state != instance._loaded_profile_state
+    profile = getattr(instance, "profile", None) if User.profile.is_cached(instance) else None
+    if profile is None:
+        if not user_changed:
+            return
+        profile = Profile.objects.filter(user=instance).first()
+        if profile is None:
+            create_user_profile(sender, instance, created=True)
+            return
+
+    if user_changed:
+        for field in PROFILE_MIRRORED_FIELDS:
+            setattr(profile, field, getattr(instance, field))
+    changed = profile.changed_fields()
+    if changed:
+        profile.save(update_fields=changed)
+
+def invalidate_cached_user(sender, instance, created, **kwargs):
+    loaded_state = getattr(instance, "_loaded_auth_state", None)
+    instance._loaded_auth_state = instance._auth_state()
+    # A user saved without being loaded may have changed too.
+    if created or loaded_state == instance._loaded_auth_state:
+        return
+    invalidate_user(instance.pk, snapshot_user(instance))
 
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk, {})
 
 post_save.connect(create_user_profile, sender=User)
-post_save.connect(save_user_profile, sender=User)
\ No newline at end of file
+post_save.connect(save_user_profile, sender=User)
+post_save.connect(invalidate_cached_user, sender=User)
+post_delete.connect(invalidate_deleted_user, sender=User)
\ No newline at end of file
@@ -0,0 +1,31 @@
+from django.db import transaction
+
+from userauths.models import User
+
+
+def build_user(email, password, full_name=None, role="student", **extra_fields):
+    """
+    Build an unsaved User with its password already hashed and the
+    username/full_name defaults that User.save() would apply.
+    """
+    email_username = email.split("@")[0]
+    user = User(
+        email=email,
+        username=extra_fields.pop("username", None) or email_username,
+        full_name=full_name or email_username,
+        role=role,
+        **extra_fields,
+    )
+    user.set_password(password)
+    return user
+
+
+def register_user(email, password, full_name=None, role="student"):
+    """
+    Create a user and their profile: one hash, two INSERTs, one transaction.
+    """
+    user = build_user(email, password, full_name=full_name, role=role)
+    with transaction.atomic():
+        # post_save's create_user_profile inserts the Profile.
+        user.save(force_insert=True)
+    return user
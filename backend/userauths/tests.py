@@ -1,3 +1,222 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from core.models import Course
+from userauths.models import Profile, User
+from userauths.services import register_user
+
+
+def writes(queries):
+    return [
+        query["sql"] for query in queries
+        if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+
+class RegistrationTests(TestCase):
+    def test_register_endpoint_issues_exactly_two_inserts(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().post("/api/v1/user/register/", {
+                "full_name": "Alice Smith",
+                "email": "alice@example.com",
+                "password": "a-Long-passw0rd",
+                "password_matched": "a-Long-passw0rd",
+                "role": "teacher",
+            }, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+        statements = writes(queries.captured_queries)
+        self.assertEqual(len(statements), 2, statements)
+        self.assertTrue(statements[0].startswith('INSERT INTO "userauths_user"'))
+        self.assertTrue(statements[1].startswith('INSERT INTO "userauths_profile"'))
+
+        user = User.objects.get(email="alice@example.com")
+        self.assertEqual(user.username, "alice")
+        self.assertTrue(user.check_password("a-Long-passw0rd"))
+        self.assertEqual(user.profile.full_name, "Alice Smith")
+        self.assertEqual(user.profile.role, "teacher")
+
+
+class ProfileSyncTests(TestCase):
+    def setUp(self):
+        register_user("bob@example.com", "a-Long-passw0rd")
+        self.user = User.objects.get(email="bob@example.com")
+
+    def test_unrelated_user_changes_do_not_touch_the_profile(self):
+        self.user.otp = "123456"
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save()
+        self.assertEqual(len(writes(queries.captured_queries)), 1)
+
+    def test_mirrored_fields_are_copied_to_the_profile(self):
+        self.user.role = "teacher"
+        self.user.save()
+        self.assertEqual(Profile.objects.get(user=self.user).role, "teacher")
+
+    def test_changes_to_a_loaded_profile_are_saved_with_the_user(self):
+        self.user.profile.country = "Romania"
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save()
+        statements = writes(queries.captured_queries)
+        self.assertEqual(len(statements), 2, statements)
+        self.assertEqual(Profile.objects.get(user=self.user).country, "Romania")
+
+
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title="Algebra", description="")
+        User.objects.create(email="existing@example.com")
+
+    def import_file(self, suffix, content, *args):
+        with tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False) as handle:
+            handle.write(content)
+        self.addCleanup(os.unlink, handle.name)
+        out = StringIO()
+        call_command("import_users", handle.name, *args, stdout=out)
+        # The JSON report is followed by a one-line summary.
+        return json.loads(out.getvalue().rsplit("\n", 2)[0])
+
+    def test_csv_import_creates_users_profiles_and_enrollments(self):
+        report = self.import_file(".csv", (
+            "email,password,full_name,role,courses\n"
+            f"ana@example.com,a-Long-passw0rd,Ana Pop,student,{self.course.id};999\n"
+            "dan@example.com,,,teacher,\n"
+            "existing@example.com,x,,student,\n"
+            "ana@example.com,x,,student,\n"
+            "not-an-email,x,,student,\n"
+        ), "--workers", "0", "--batch-size", "2")
+
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(report["skipped_existing"], 2)
+        self.assertEqual(report["failed"], 1)
+        self.assertEqual(report["enrolled"], 1)
+        self.assertEqual(report["unknown_courses"], ["999"])
+
+        ana = User.objects.get(email="ana@example.com")
+        self.assertEqual((ana.username, ana.full_name), ("ana", "Ana Pop"))
+        self.assertTrue(ana.check_password("a-Long-passw0rd"))
+        self.assertEqual(ana.profile.full_name, "Ana Pop")
+        self.assertEqual(list(self.course.students.all()), [ana])
+
+        dan = User.objects.get(email="dan@example.com")
+        self.assertEqual((dan.full_name, dan.role), ("dan", "teacher"))
+        self.assertFalse(dan.has_usable_password())
+
+    def test_jsonl_import_hashes_in_a_process_pool(self):
+        report = self.import_file(".jsonl", "\n".join(
+            json.dumps({"email": f"user{index}@example.com", "password": "a-Long-passw0rd"})
+            for index in range(3)
+        ), "--workers", "2")
+        self.assertEqual(report["created"], 3)
+        self.assertTrue(User.objects.get(email="user2@example.com").check_password("a-Long-passw0rd"))
+
+    def test_batch_with_a_clash_falls_back_to_row_by_row(self):
+        report = self.import_file(".csv", (
+            "email,full_name\n"
+            "one@example.com,Taken\n"
+            "two@example.com,Taken\n"
+        ), "--workers", "0")
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(report["failed"], 1)
+
+    def test_api_endpoint_is_admin_only(self):
+        upload = SimpleUploadedFile("users.csv", b"email\nvia-api@example.com\n")
+        client = APIClient()
+        client.force_authenticate(User.objects.get(email="existing@example.com"))
+        response = client.post("/api/v1/users/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 403)
+
+        admin = User.objects.create(email="admin@example.com", is_staff=True)
+        client.force_authenticate(admin)
+        upload.seek(0)
+        with self.settings(USER_IMPORT_REQUEST_WORKERS=0):
+            response = client.post("/api/v1/users/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+
+    def test_api_endpoint_rejects_malformed_jsonl_rows(self):
+        admin = User.objects.create(email="admin@example.com", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        good = json.dumps({"email": "good@example.com"})
+        for bad, message in [
+            ("[1, 2]", "Line 2: expected an object, got list."),
+            ('{"email": 5}', "Line 2: email must be a string."),
+            ('{"email": "seven@example.com", "password": 7}', "Line 2: password must be a string."),
+            ('{"email": "c@example.com", "courses": "1;2"}',
+             "Line 2: courses must be a list of course ids."),
+            ("{", None),
+        ]:
+            upload = SimpleUploadedFile("users.jsonl", f"{good}\n{bad}\n".encode())
+            with self.settings(USER_IMPORT_REQUEST_WORKERS=0):
+                response = client.post("/api/v1/users/import/", {"file": upload}, format="multipart")
+            self.assertEqual(response.status_code, 400, bad)
+            if message:
+                self.assertEqual(response.data["error"], message)
+            else:
+                self.assertTrue(response.data["error"].startswith("Line 2: "))
+        self.assertFalse(User.objects.filter(email="good@example.com").exists())
+
+    def test_import_invalidates_cached_user_lists(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(email="existing@example.com"))
+        etag = client.get("/api/v1/teachers/")["ETag"]
+
+        self.import_file(".csv", "email,role\nnew-teacher@example.com,teacher\n", "--workers", "0")
+        response = client.get("/api/v1/teachers/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("new-teacher@example.com", [teacher["email"] for teacher in response.data])
+
+    @override_settings(USER_IMPORT_REQUEST_MAX_ROWS=1)
+    def test_api_endpoint_refuses_large_files(self):
+        admin = User.objects.create(email="admin@example.com", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile("users.csv", b"email\none@example.com\ntwo@example.com\n")
+        response = client.post("/api/v1/users/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(User.objects.filter(email="one@example.com").exists())
+
+        upload = SimpleUploadedFile("users.csv", b"email\none@example.com\n")
+        response = client.post("/api/v1/users/import/", {"file": upload}, format="multipart")
+        self.assertEqual(response.data["created"], 1)
+
+
+class PruneTokensTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(email="learner@example.com")
+        now = aware_utcnow()
+        for index, expires_at in enumerate(
+            [now - timedelta(days=1)] * 3 + [now + timedelta(days=1)] * 2
+        ):
+            token = OutstandingToken.objects.create(
+                user=user, jti=f"jti-{index}", token="token", expires_at=expires_at
+            )
+            BlacklistedToken.objects.create(token=token)
+
+    def test_expired_tokens_are_deleted_in_chunks(self):
+        out = StringIO()
+        call_command("prune_tokens", "--dry-run", stdout=out)
+        self.assertIn("3 expired token(s)", out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 5)
+
+        call_command("prune_tokens", "--batch-size", "2", stdout=out)
+        self.assertIn("Deleted 3 expired token(s).", out.getvalue())
+        self.assertEqual(
+            sorted(OutstandingToken.objects.values_list("jti", flat=True)), ["jti-3", "jti-4"]
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
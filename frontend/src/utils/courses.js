@@ -5,9 +5,21 @@ export const leaveReview = async (courseId, data) => {
   return await apiInstance.post(`/courses/${courseId}/review/`, data);
 };
 
-// Function to get all courses
-export const getCourses = async () => {
-  return await apiInstance.get("/courses/");
+// Function to get one page of courses (pass response.data.next for the following one)
+export const getCourses = async (cursorUrl = null) => {
+  return await apiInstance.get(cursorUrl || "/courses/");
+};
+
+// Function to search courses (one ranked page; pass response.data.next for the following one)
+export const searchCourses = async (query, pageUrl = null) => {
+  return await apiInstance.get(pageUrl || "/courses/search/", {
+    params: pageUrl ? undefined : { q: query },
+  });
+};
+
+// Function to get one page of the students enrolled in a course
+export const getCourseStudents = async (courseId, cursorUrl = null) => {
+  return await apiInstance.get(cursorUrl || `/courses/${courseId}/students/`);
 };
 
 // Function to get all teachers
@@ -19,6 +19,7 @@ import { useAuthStore } from "../../store/auth";
 const Courses = () => {
   const { user, loadingState } = useAuthStore();
   const [courses, setCourses] = useState([]);
+  const [nextCoursesUrl, setNextCoursesUrl] = useState(null); // Cursor of the next page
   const [teachers, setTeachers] = useState([]);
   const [formData, setFormData] = useState({ title: "", description: "", teacher_id: "" });
   const [enrollData, setEnrollData] = useState({});
@@ -27,13 +28,15 @@ const Courses = () => {
   const [editDescription, setEditDescription] = useState("");
   const [userReviews, setUserReviews] = useState({}); // Store user reviews for each course
 
-  const fetchCourses = async (currentUser) => {
+  // Load the first page of courses, or append the page at cursorUrl ("Load more")
+  const fetchCourses = async (currentUser, cursorUrl = null) => {
     try {
-      const response = await getCourses();
-      const allCourses = response.data;
+      const response = await getCourses(cursorUrl);
+      const pageCourses = response.data.results;
+      setNextCoursesUrl(response.data.next);
 
       // Map courses to include user-specific reviews
-      const updatedCourses = allCourses.map((course) => ({
+      const updatedCourses = pageCourses.map((course) => ({
         ...course,
         user_review: course.user_review || null, // Add user_review field
       }));
@@ -43,14 +46,14 @@ const Courses = () => {
           course.students.includes(currentUser.email)
         );
         console.log("Enrolled Courses:", enrolledCourses);
-        setCourses(enrolledCourses);
+        setCourses((prev) => (cursorUrl ? [...prev, ...enrolledCourses] : enrolledCourses));
       } else {
-        setCourses(updatedCourses);
+        setCourses((prev) => (cursorUrl ? [...prev, ...updatedCourses] : updatedCourses));
       }
 
-      // Fetch user reviews for each course
+      // Fetch user reviews for each course of this page
       const reviews = {};
-      for (const course of allCourses) {
+      for (const course of pageCourses) {
         try {
           const reviewResponse = await getUserReview(course.id);
           reviews[course.id] = reviewResponse.data.rating; // Store the rating
@@ -62,7 +65,7 @@ const Courses = () => {
           }
         }
       }
-      setUserReviews(reviews);
+      setUserReviews((prev) => (cursorUrl ? { ...prev, ...reviews } : reviews));
     } catch (error) {
       console.error("Error fetching courses:", error);
     }
@@ -489,6 +492,15 @@ const Courses = () => {
           </div>
         ))}
       </div>
+
+      {nextCoursesUrl && (
+        <button
+          onClick={() => fetchCourses(user, nextCoursesUrl)}
+          style={{ marginTop: "1rem", padding: "0.5rem 1rem" }}
+        >
+          Load more courses
+        </button>
+      )}
     </div>
   );
 };
@@ -3,22 +3,32 @@ import apiInstance from "../../utils/axios"; // Import the configured Axios inst
 
 const TeacherStudents = () => {
   const [students, setStudents] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null); // Cursor of the next page
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
 
-  useEffect(() => {
-    const fetchStudents = async () => {
-      try {
-        const response = await apiInstance.get("/teacher/students/");
-        setStudents(response.data);
-      } catch (err) {
-        setError("Failed to fetch students. Please try again.");
-      } finally {
-        setLoading(false);
-      }
-    };
+  // Fetch the first page of the roster, or append the page at cursorUrl ("Load more")
+  const fetchStudents = async (cursorUrl = null) => {
+    try {
+      const response = await apiInstance.get(cursorUrl || "/teacher/students/");
+      setStudents((prev) =>
+        cursorUrl ? [...prev, ...response.data.results] : response.data.results
+      );
+      setNextUrl(response.data.next);
+    } catch (err) {
+      setError("Failed to fetch students. Please try again.");
+    }
+  };
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchStudents(nextUrl);
+    setLoadingMore(false);
+  };
 
-    fetchStudents();
+  useEffect(() => {
+    fetchStudents().finally(() => setLoading(false));
   }, []);
 
   if (loading) return <p>Loading students...</p>;
@@ -36,6 +46,7 @@ const TeacherStudents = () => {
               <th>#</th>
               <th>Full Name</th>
               <th>Email</th>
+              <th>Country</th>
             </tr>
           </thead>
           <tbody>
@@ -44,11 +55,17 @@ const TeacherStudents = () => {
                 <td>{index + 1}</td>
                 <td>{student.full_name}</td>
                 <td>{student.email}</td>
+                <td>{student.country || "—"}</td>
               </tr>
             ))}
           </tbody>
         </table>
       )}
+      {nextUrl && (
+        <button className="btn btn-outline-primary" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? "Loading..." : "Load more students"}
+        </button>
+      )}
     </div>
   );
 };